@@ -0,0 +1,107 @@
+import bisect
+from dataclasses import dataclass, field
+import threading
+from typing import Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+V = TypeVar('V')
+
+# One process-wide sequence, like a database sequence, so versions recorded by
+# different repositories (e.g. the shards of one store) can be compared. It is
+# not persisted: it starts again at 1 in every process, so a watermark is only
+# meaningful to the process that handed it out (see ChangeSet.resync).
+_versions_lock = threading.Lock()
+_last_version = 0
+
+
+def next_change_version() -> int:
+    global _last_version
+    with _versions_lock:
+        _last_version += 1
+        return _last_version
+
+
+def last_change_version() -> int:
+    return _last_version
+
+
+@dataclass(slots=True, frozen=True)
+class Change(Generic[V]):
+    version: int
+    entity: V
+
+
+@dataclass(slots=True, frozen=True)
+class ChangeSet(Generic[V]):
+
+    # version is the watermark to ask for next: the last change returned, or
+    # the requested one when nothing changed since. resync means the requested
+    # watermark cannot be continued from: changes after it were compacted
+    # away (deletions may be missing) or it was handed out by another
+    # process. The client should drop its copy and start again from 0.
+
+    items: List[Change[V]]
+    version: int
+    has_more: bool = False
+    resync: bool = False
+
+
+@dataclass(slots=True)
+class ChangeLog(Generic[V]):
+
+    # Append-only (version, key, value) entries in version order. An entry is
+    # stale once its key is recorded again; stale entries are skipped on read
+    # and dropped once they outnumber the live ones. _horizon is the latest
+    # version of a forgotten key: a watermark below it may have missed that
+    # change.
+
+    _versions: List[int] = field(default_factory=lambda: [])
+    _keys: List[Hashable] = field(default_factory=lambda: [])
+    _values: List[V] = field(default_factory=lambda: [])
+    _latest: Dict[Hashable, int] = field(default_factory=lambda: {})
+    _horizon: int = 0
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def record(self, key: Hashable, value: V) -> int:
+        version = next_change_version()
+        self._versions.append(version)
+        self._keys.append(key)
+        self._values.append(value)
+        self._latest[key] = version
+        if len(self._versions) > 2 * len(self._latest) + 16:
+            self.__drop_stale()
+        return version
+
+    def since(self, version: int, limit: Optional[int] = None) -> ChangeSet[V]:
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be at least 1')
+        items = []
+        latest = self._latest
+        resync = 0 < version < self._horizon or version > last_change_version()
+        start = bisect.bisect_right(self._versions, version)
+        for position in range(start, len(self._versions)):
+            entry_version = self._versions[position]
+            if latest.get(self._keys[position]) != entry_version:
+                continue
+            if limit is not None and len(items) == limit:
+                return ChangeSet(items, items[-1].version if items else version, True, resync)
+            items.append(Change(entry_version, self._values[position]))
+        return ChangeSet(items, items[-1].version if items else version, False, resync)
+
+    def forget(self, keys: Iterable[Hashable]) -> None:
+        # Purged keys: their entries go stale and are never returned again.
+        # Watermarks from before their last change now need a resync.
+        for key in keys:
+            version = self._latest.pop(key, None)
+            if version is not None:
+                self._horizon = max(self._horizon, version)
+
+    def __drop_stale(self) -> None:
+        live = [
+            position for position, key in enumerate(self._keys)
+            if self._latest.get(key) == self._versions[position]
+        ]
+        self._versions = [self._versions[position] for position in live]
+        self._keys = [self._keys[position] for position in live]
+        self._values = [self._values[position] for position in live]
@@ -0,0 +1,55 @@
+import unittest
+
+from .changes import Change, ChangeLog, ChangeSet, next_change_version
+
+
+class ChangeLogUnitTests(unittest.TestCase):
+
+    def test_next_change_version_is_monotonic(self):
+        first = next_change_version()
+        self.assertGreater(next_change_version(), first)
+
+    def test_since(self):
+        log = ChangeLog()
+        start = next_change_version()
+        first = log.record('a', 'a1')
+        second = log.record('b', 'b1')
+        third = log.record('a', 'a2')
+
+        self.assertEqual(len(log), 2)
+        self.assertEqual(
+            log.since(start), ChangeSet([Change(second, 'b1'), Change(third, 'a2')], third))
+        self.assertEqual(log.since(second), ChangeSet([Change(third, 'a2')], third))
+        self.assertEqual(log.since(third), ChangeSet([], third))
+        self.assertEqual(log.since(first, limit=1), ChangeSet([Change(second, 'b1')], second, True))
+        self.assertEqual(log.since(start, limit=2), ChangeSet(
+            [Change(second, 'b1'), Change(third, 'a2')], third))
+        for limit in (0, -1):
+            with self.assertRaises(ValueError):
+                log.since(start, limit=limit)
+
+    def test_forget(self):
+        log = ChangeLog()
+        start = next_change_version()
+        log.record('a', 'a1')
+        version = log.record('b', 'b1')
+        log.forget(['a', 'fake'])
+        # A watermark from before the forgotten change may have missed it.
+        self.assertEqual(
+            log.since(start), ChangeSet([Change(version, 'b1')], version, resync=True))
+        self.assertEqual(log.since(0), ChangeSet([Change(version, 'b1')], version))
+        self.assertEqual(log.since(version), ChangeSet([], version))
+
+    def test_watermark_from_another_process_needs_a_resync(self):
+        log = ChangeLog()
+        version = log.record('a', 'a1')
+        self.assertFalse(log.since(version).resync)
+        self.assertTrue(log.since(version + 1000).resync)
+
+    def test_drops_stale_entries(self):
+        log = ChangeLog()
+        start = next_change_version()
+        for i in range(100):
+            log.record(i % 3, i)
+        self.assertLessEqual(len(log._versions), 2 * 3 + 16)
+        self.assertEqual([change.entity for change in log.since(start).items], [97, 98, 99])
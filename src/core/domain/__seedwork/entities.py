@@ -1,10 +1,15 @@
 from abc import ABC
-from dataclasses import Field, dataclass, field, asdict
+from dataclasses import MISSING, Field, dataclass, field
 from datetime import datetime
-from typing import Any, Optional
+import functools
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Generic, List, Optional, Tuple, TypeVar
 
+from .notification import Notification
 from .value_objects import UniqueEntityId
 
+E = TypeVar('E', bound='GenericEntity')
+
 
 @dataclass(frozen=True, slots=True)
 class GenericEntity(ABC):
@@ -14,43 +19,99 @@ class GenericEntity(ABC):
 
     @property
     def id(self) -> str:
-        return str(self.unique_entity_id)
+        return self.unique_entity_id.id_
 
     is_active: Optional[bool] = True
     created_at: Optional[datetime] = field(default_factory=lambda: datetime.now())
     updated_at: Optional[datetime] = None
+    # Set by repositories on every write; an update is only applied over the
+    # version it was read at (optimistic concurrency).
+    version: int = 0
+
+    # None means "new or untracked": every field counts as changed.
+    __changed_fields: Optional[FrozenSet[str]] = field(
+        default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
+        if not isinstance(self.unique_entity_id, UniqueEntityId):
+            object.__setattr__(
+                self, 'unique_entity_id', UniqueEntityId(self.unique_entity_id))
         if not self.created_at:
             object.__setattr__(self, 'created_at', datetime.now())
 
+    @property
+    def changed_fields(self) -> FrozenSet[str]:
+        if self.__changed_fields is None:
+            return frozenset(_to_dict_fields(self.__class__)[0]) | {'unique_entity_id'}
+        return self.__changed_fields
+
+    def clear_changes(self) -> None:
+        object.__setattr__(self, '_GenericEntity__changed_fields', frozenset())
+
     def _set_attr(self, attr: str, value: any):
         object.__setattr__(self, attr, value)
+        self.__mark_changed(attr)
         self.__refresh_updated_at()
         return self
 
     def _set_attrs_dict(self, attrs: dict):
         for attr, value in attrs.items():
             object.__setattr__(self, attr, value)
+        self.__mark_changed(*attrs)
         self.__refresh_updated_at()
         return self
 
     def to_dict(self):
-        entity_as_dict = asdict(self)
-        entity_as_dict.pop('unique_entity_id')
+        fields_names, get_values = _to_dict_fields(self.__class__)
+        entity_as_dict = dict(zip(fields_names, get_values(self)))
         entity_as_dict['id'] = self.id
         return entity_as_dict
 
     def activate(self):
         object.__setattr__(self, 'is_active', True)
+        self.__mark_changed('is_active')
         self.__refresh_updated_at()
 
     def deactivate(self):
         object.__setattr__(self, 'is_active', False)
+        self.__mark_changed('is_active')
         self.__refresh_updated_at()
 
     def __refresh_updated_at(self):
         object.__setattr__(self, 'updated_at', datetime.now())
+        self.__mark_changed('updated_at')
+
+    def __mark_changed(self, *fields_names: str) -> None:
+        # A new frozenset on every change: copies made with copy.copy share the
+        # previous one, so tracking never leaks between copies.
+        if self.__changed_fields is not None:
+            object.__setattr__(
+                self, '_GenericEntity__changed_fields', self.__changed_fields.union(fields_names))
+
+    @classmethod
+    def rehydrate(cls: type[E], data: dict) -> E:
+        # Trusted path for already persisted data (the to_dict() shape):
+        # no __post_init__, so no validation and no fresh timestamps.
+        entity = object.__new__(cls)
+        for field_name, field_ in cls.__dataclass_fields__.items():
+            if not field_.init:
+                continue
+            if field_name == 'unique_entity_id':
+                value = data.get(field_name, data.get('id', MISSING))
+                if value is not MISSING and not isinstance(value, UniqueEntityId):
+                    value = UniqueEntityId.rehydrate(value)
+            else:
+                value = data.get(field_name, MISSING)
+            if value is MISSING and field_.default_factory is not MISSING:
+                value = field_.default_factory()
+            elif value is MISSING:
+                value = field_.default
+            if value is MISSING:
+                raise TypeError(
+                    f"{cls.__name__}.rehydrate() missing required field: '{field_name}'")
+            object.__setattr__(entity, field_name, value)
+        entity.clear_changes()
+        return entity
 
     @classmethod
     def get_field(cls, field_name: str) -> Field:
@@ -59,3 +120,24 @@ class GenericEntity(ABC):
     @classmethod
     def get_field_default(cls, field_name: str) -> Any:
         return cls.__dataclass_fields__[field_name].default
+
+
+@functools.cache
+def _to_dict_fields(cls: type) -> Tuple[Tuple[str, ...], Callable[[Any], tuple]]:
+    # Shallow replacement for dataclasses.asdict: field values are taken as they
+    # are, without recursing into (and deep-copying) nested objects.
+    fields_names = tuple(
+        field_name for field_name, field_ in cls.__dataclass_fields__.items()
+        if field_.init and field_name != 'unique_entity_id'
+    )
+    get_values = attrgetter(*fields_names)
+    if len(fields_names) == 1:
+        return fields_names, lambda entity: (get_values(entity),)
+    return fields_names, get_values
+
+
+@dataclass(frozen=True, slots=True)
+class EntityBatch(Generic[E]):
+
+    entities: List[E] = field(default_factory=lambda: [])
+    errors: Dict[int, Notification] = field(default_factory=lambda: {})
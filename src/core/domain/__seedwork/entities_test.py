@@ -1,10 +1,12 @@
 from abc import ABC
+import copy
 from dataclasses import dataclass, is_dataclass
 from datetime import datetime
 import unittest
+from unittest.mock import patch
 import uuid
 
-from .entities import GenericEntity
+from .entities import EntityBatch, GenericEntity
 from .value_objects import UniqueEntityId
 
 
@@ -47,6 +49,10 @@ class GenericEntityUnitTests(unittest.TestCase):
         entity = GenericEntityStub(unique_entity_id=uuid_test)
         # Assert:
         self.assertEqual(entity.id, str(uuid_test))
+        self.assertEqual(entity.unique_entity_id, UniqueEntityId(uuid_test))
+        self.assertEqual(
+            GenericEntityStub(unique_entity_id=str(uuid_test)).unique_entity_id,
+            UniqueEntityId(uuid_test))
 
     def test_to_dict_method(self):
         # Arrange/Act:
@@ -58,9 +64,20 @@ class GenericEntityUnitTests(unittest.TestCase):
             'prop_': entity.prop_,
             'is_active': entity.is_active,
             'updated_at': entity.updated_at,
-            'created_at': entity.created_at
+            'created_at': entity.created_at,
+            'version': 0
         })
 
+    def test_to_dict_method_is_shallow(self):
+        # Arrange:
+        prop_test = ['any value']
+        entity = GenericEntityStub(prop=prop_test)
+        # Act:
+        entity_as_dict = entity.to_dict()
+        # Assert:
+        self.assertIs(entity_as_dict['prop'], prop_test)
+        self.assertEqual(list(entity_as_dict)[-1], 'id')
+
     def test_deactivate_method(self):
         # Arrange:
         entity = GenericEntity()
@@ -99,3 +116,82 @@ class GenericEntityUnitTests(unittest.TestCase):
         self.assertEqual(entity_stub.prop, prop_test)
         self.assertEqual(entity_stub.prop_, prop_test)
         self.assertNotEqual(entity_stub.updated_at, initial_datetime)
+
+    def test_rehydrate_method(self):
+        # Arrange:
+        entity = GenericEntityStub(prop='foo', is_active=False, updated_at=datetime.now())
+        # Act:
+        with patch.object(GenericEntityStub, '__post_init__') as mock_post_init:
+            rehydrated = GenericEntityStub.rehydrate(entity.to_dict())
+        # Assert:
+        mock_post_init.assert_not_called()
+        self.assertEqual(rehydrated, entity)
+        self.assertIsInstance(rehydrated.unique_entity_id, UniqueEntityId)
+        self.assertEqual(
+            GenericEntityStub.rehydrate({'unique_entity_id': entity.unique_entity_id}).id,
+            entity.id)
+
+    def test_rehydrate_method_uses_defaults_for_missing_fields(self):
+        # Arrange:
+        created_at = datetime.now()
+        entity_id = str(uuid.uuid4())
+        # Act:
+        entity = GenericEntityStub.rehydrate({'id': entity_id, 'created_at': created_at})
+        # Assert:
+        self.assertEqual(entity.id, entity_id)
+        self.assertEqual(entity.prop, 'value')
+        self.assertEqual(entity.created_at, created_at)
+        self.assertTrue(entity.is_active)
+        self.assertIsNone(entity.updated_at)
+
+    def test_changed_fields_of_new_entity(self):
+        # Arrange/Act:
+        entity = GenericEntityStub()
+        # Assert:
+        self.assertEqual(entity.changed_fields, {
+            'unique_entity_id', 'prop', 'prop_', 'is_active', 'created_at', 'updated_at',
+            'version'
+        })
+
+    def test_changed_fields_tracking(self):
+        # Arrange:
+        entity = GenericEntityStub.rehydrate(GenericEntityStub().to_dict())
+        self.assertEqual(entity.changed_fields, frozenset())
+        # Act:
+        entity._set_attr('prop', 'any value')
+        # Assert:
+        self.assertEqual(entity.changed_fields, {'prop', 'updated_at'})
+        entity.clear_changes()
+        entity._set_attrs_dict({'prop': 'foo', 'prop_': 'bar'})
+        self.assertEqual(entity.changed_fields, {'prop', 'prop_', 'updated_at'})
+        entity.clear_changes()
+        entity.deactivate()
+        self.assertEqual(entity.changed_fields, {'is_active', 'updated_at'})
+        entity.clear_changes()
+        entity.activate()
+        self.assertEqual(entity.changed_fields, {'is_active', 'updated_at'})
+
+    def test_changed_fields_are_not_shared_between_copies(self):
+        # Arrange:
+        entity = GenericEntityStub()
+        entity.clear_changes()
+        entity_copy = copy.copy(entity)
+        # Act:
+        entity._set_attr('prop', 'any value')
+        # Assert:
+        self.assertEqual(entity.changed_fields, {'prop', 'updated_at'})
+        self.assertEqual(entity_copy.changed_fields, frozenset())
+        self.assertNotIn('_GenericEntity__changed_fields', entity.to_dict())
+
+
+class EntityBatchUnitTests(unittest.TestCase):
+
+    def test_constructor_default_values(self):
+        # Arrange/Act:
+        batch_1 = EntityBatch()
+        batch_2 = EntityBatch()
+        # Assert:
+        self.assertEqual(batch_1.entities, [])
+        self.assertEqual(batch_1.errors, {})
+        self.assertIsNot(batch_1.entities, batch_2.entities)
+        self.assertIsNot(batch_1.errors, batch_2.errors)
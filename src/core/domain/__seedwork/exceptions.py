@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Any, Dict, List
 
 
 class InvalidUuidException(Exception):
@@ -23,3 +23,32 @@ class EntityNotFoundException(Exception):
 class EntityAlreadyExistsException(Exception):
     def __init__(self, error='Entity already exists') -> None:
         super().__init__(error)
+
+
+class DuplicateValueException(EntityAlreadyExistsException):
+
+    field_name: str
+    value: Any
+
+    def __init__(self, field_name: str, value: Any) -> None:
+        self.field_name = field_name
+        self.value = value
+        super().__init__(f'Entity already exists using {field_name}: {value}')
+
+
+class EntityVersionConflictException(Exception):
+
+    expected_version: int
+    current_version: int
+
+    def __init__(self, id_: str, expected_version: int, current_version: int) -> None:
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f'Entity using ID: {id_} is at version {current_version}, '
+            f'not {expected_version}')
+
+
+class InvalidFilterException(Exception):
+    def __init__(self, error='Invalid filter') -> None:
+        super().__init__(error)
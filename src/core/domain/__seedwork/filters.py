@@ -0,0 +1,178 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import functools
+import locale
+import types
+from typing import Any, ClassVar, Mapping, Tuple, Union, get_args, get_origin
+
+from .exceptions import InvalidFilterException
+
+
+# Collation used by every in-memory engine for text sort keys and filters:
+# strings are compared by their Unicode case fold (str.casefold, which also
+# folds characters such as 'ß' to 'ss'), then by code point; non-text values
+# compare as-is. A database backend matches this with a case-insensitive, accent-
+# sensitive collation ordered by code point (e.g. PostgreSQL's
+# ORDER BY lower(col) COLLATE "C", or an ICU "und-u-ks-level2" collation for
+# full case folding). locale_sort_key orders folded text by the process
+# LC_COLLATE locale instead; a backend has to use the same locale then.
+def casefold_sort_key(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
+
+
+def locale_sort_key(value: Any) -> Any:
+    return locale.strxfrm(value.casefold()) if isinstance(value, str) else value
+
+
+@functools.lru_cache(maxsize=None)
+def fields_types(entity_class: type) -> Mapping[str, Tuple[type, ...]]:
+    # Operand types a filter may compare each public field of a dataclass
+    # entity with; numbers compare with numbers of either kind.
+    result = {'id': (str,)}
+    for name, field_ in entity_class.__dataclass_fields__.items():
+        if name.startswith('_'):
+            continue
+        hint = field_.type
+        if get_origin(hint) in (Union, types.UnionType):
+            hint_types = tuple(arg for arg in get_args(hint) if arg is not type(None))
+        else:
+            hint_types = (hint,)
+        if int in hint_types or float in hint_types:
+            hint_types = tuple(dict.fromkeys((*hint_types, int, float)))
+        result[name] = hint_types
+    return result
+
+
+class FilterExpression(ABC):
+
+    # Comparisons fold text with casefold_sort_key, so filters agree with the
+    # default sort keys and the sorted indexes built from them.
+
+    @abstractmethod
+    def matches(self, entity: Any) -> bool:
+        ...
+
+    @abstractmethod
+    def fields_names(self) -> Tuple[str, ...]:
+        ...
+
+    @abstractmethod
+    def validate(self, types_: Mapping[str, Tuple[type, ...]]) -> None:
+        # Raises InvalidFilterException for an unknown field or an operand the
+        # field cannot be compared with, before any row is compared.
+        ...
+
+    def conjuncts(self) -> Tuple['FilterExpression', ...]:
+        return (self,)
+
+    def __and__(self, other: 'FilterExpression') -> 'AllOf':
+        return AllOf((*self.conjuncts(), *other.conjuncts()))
+
+    def __or__(self, other: 'FilterExpression') -> 'AnyOf':
+        return AnyOf((self, other))
+
+
+@dataclass(frozen=True, slots=True)
+class FieldFilter(FilterExpression):
+
+    OPERATORS: ClassVar[Tuple[str, ...]] = (
+        'eq', 'contains', 'gt', 'gte', 'lt', 'lte', 'between'
+    )
+
+    field: str
+    op: str
+    value: Any
+
+    def __post_init__(self):
+        if self.op not in self.OPERATORS:
+            raise InvalidFilterException(f'Invalid filter operator: {self.op}')
+        if self.op == 'between' and (
+                not isinstance(self.value, (tuple, list)) or len(self.value) != 2):
+            raise InvalidFilterException('between takes a (start, end) pair')
+
+    @classmethod
+    def between(cls, field: str, start: Any = None, end: Any = None) -> 'FieldFilter':
+        # Half-open [start, end); a missing bound is unbounded.
+        return cls(field, 'between', (start, end))
+
+    def bounds(self) -> Tuple[Any, bool, Any, bool]:
+        # (low, low inclusive, high, high inclusive), folded; None is unbounded.
+        value = casefold_sort_key(self.value)
+        if self.op == 'eq':
+            return value, True, value, True
+        if self.op in ('gt', 'gte'):
+            return value, self.op == 'gte', None, False
+        if self.op in ('lt', 'lte'):
+            return None, False, value, self.op == 'lte'
+        start, end = self.value
+        return casefold_sort_key(start), True, casefold_sort_key(end), False
+
+    def matches(self, entity: Any) -> bool:
+        value = casefold_sort_key(getattr(entity, self.field))
+        if self.op == 'eq':
+            return value == casefold_sort_key(self.value)
+        if value is None:
+            return False
+        if self.op == 'contains':
+            return casefold_sort_key(self.value) in value
+        low, low_inclusive, high, high_inclusive = self.bounds()
+        if low is not None and (value < low or (value == low and not low_inclusive)):
+            return False
+        if high is not None and (value > high or (value == high and not high_inclusive)):
+            return False
+        return True
+
+    def fields_names(self) -> Tuple[str, ...]:
+        return (self.field,)
+
+    def validate(self, types_: Mapping[str, Tuple[type, ...]]) -> None:
+        field_types = types_.get(self.field)
+        if field_types is None:
+            raise InvalidFilterException(f'Invalid filter field: {self.field}')
+        operands = self.value if self.op == 'between' else (self.value,)
+        if self.op == 'contains':
+            valid = str in field_types and isinstance(self.value, str)
+        else:
+            valid = all(
+                operand is None or isinstance(operand, field_types) for operand in operands)
+        if not valid:
+            raise InvalidFilterException(
+                f'Invalid filter value for {self.field}: {self.value!r}')
+
+
+@dataclass(frozen=True, slots=True)
+class AllOf(FilterExpression):
+
+    filters: Tuple[FilterExpression, ...]
+
+    def matches(self, entity: Any) -> bool:
+        return all(filter_.matches(entity) for filter_ in self.filters)
+
+    def fields_names(self) -> Tuple[str, ...]:
+        return tuple(name for filter_ in self.filters for name in filter_.fields_names())
+
+    def validate(self, types_: Mapping[str, Tuple[type, ...]]) -> None:
+        for filter_ in self.filters:
+            filter_.validate(types_)
+
+    def conjuncts(self) -> Tuple[FilterExpression, ...]:
+        return tuple(term for filter_ in self.filters for term in filter_.conjuncts())
+
+
+@dataclass(frozen=True, slots=True)
+class AnyOf(FilterExpression):
+
+    filters: Tuple[FilterExpression, ...]
+
+    def matches(self, entity: Any) -> bool:
+        return any(filter_.matches(entity) for filter_ in self.filters)
+
+    def fields_names(self) -> Tuple[str, ...]:
+        return tuple(name for filter_ in self.filters for name in filter_.fields_names())
+
+    def validate(self, types_: Mapping[str, Tuple[type, ...]]) -> None:
+        for filter_ in self.filters:
+            filter_.validate(types_)
+
+    def __or__(self, other: FilterExpression) -> 'AnyOf':
+        return AnyOf((*self.filters, other))
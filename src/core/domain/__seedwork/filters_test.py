@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import unittest
+from unittest.mock import patch
+
+from .exceptions import InvalidFilterException
+from .filters import (
+    AllOf, AnyOf, FieldFilter, casefold_sort_key, fields_types, locale_sort_key
+)
+
+
+class EntityStub:
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+@dataclass
+class DataclassStub:
+    name: str
+    created_at: Optional[datetime] = None
+    count: int | None = None
+    _private: int = 0
+
+
+class SortKeyUnitTests(unittest.TestCase):
+
+    def test_casefold_sort_key(self):
+        self.assertEqual(casefold_sort_key('Straße'), 'strasse')
+        self.assertEqual(casefold_sort_key(1.5), 1.5)
+        self.assertIsNone(casefold_sort_key(None))
+
+    def test_locale_sort_key(self):
+        with patch('locale.strxfrm', side_effect=lambda value: f'x:{value}') as strxfrm:
+            self.assertEqual(locale_sort_key('ABC'), 'x:abc')
+            self.assertEqual(locale_sort_key(2), 2)
+        strxfrm.assert_called_once_with('abc')
+
+
+class FieldFilterUnitTests(unittest.TestCase):
+
+    def test_invalid_filters(self):
+        with self.assertRaises(InvalidFilterException) as assert_error:
+            FieldFilter('name', 'like', 'foo')
+        self.assertEqual(assert_error.exception.args[0], 'Invalid filter operator: like')
+        with self.assertRaises(InvalidFilterException):
+            FieldFilter('created_at', 'between', datetime(2022, 1, 1))
+
+    def test_fields_types(self):
+        self.assertEqual(fields_types(DataclassStub), {
+            'id': (str,), 'name': (str,), 'created_at': (datetime,), 'count': (int, float)
+        })
+
+    def test_validate(self):
+        types_ = fields_types(DataclassStub)
+        for filter_ in [
+            FieldFilter('name', 'contains', 'foo'),
+            FieldFilter('created_at', 'gt', datetime(2020, 1, 1)),
+            FieldFilter('created_at', 'eq', None),
+            FieldFilter('count', 'lte', 1.5),
+            FieldFilter.between('count', None, 2),
+            FieldFilter('id', 'eq', 'foo') | FieldFilter('name', 'gte', 'a'),
+        ]:
+            filter_.validate(types_)
+
+        arrange = [
+            (FieldFilter('fake', 'eq', 1), 'Invalid filter field: fake'),
+            (FieldFilter('_private', 'eq', 1), 'Invalid filter field: _private'),
+            (FieldFilter('created_at', 'gt', '2020-01-01'),
+             "Invalid filter value for created_at: '2020-01-01'"),
+            (FieldFilter.between('count', 1, 'z'), "Invalid filter value for count: (1, 'z')"),
+            (FieldFilter('count', 'contains', 1), 'Invalid filter value for count: 1'),
+            (FieldFilter('name', 'contains', None), 'Invalid filter value for name: None'),
+            (FieldFilter('name', 'eq', 'a') & FieldFilter('count', 'eq', 'b'),
+             "Invalid filter value for count: 'b'"),
+        ]
+        for filter_, message in arrange:
+            with self.assertRaises(InvalidFilterException) as assert_error:
+                filter_.validate(types_)
+            self.assertEqual(assert_error.exception.args[0], message, msg=f'Failed with: {filter_}')
+
+    def test_matches(self):
+        entity = EntityStub(name='Straße', description=None, count=5)
+        arrange = [
+            (FieldFilter('name', 'eq', 'STRASSE'), True),
+            (FieldFilter('name', 'contains', 'ass'), True),
+            (FieldFilter('name', 'contains', 'foo'), False),
+            (FieldFilter('description', 'eq', None), True),
+            (FieldFilter('description', 'contains', 'foo'), False),
+            (FieldFilter('description', 'gt', 'a'), False),
+            (FieldFilter('count', 'gt', 5), False),
+            (FieldFilter('count', 'gte', 5), True),
+            (FieldFilter('count', 'lt', 5), False),
+            (FieldFilter('count', 'lte', 5), True),
+            (FieldFilter.between('count', 5, 6), True),
+            (FieldFilter.between('count', 4, 5), False),
+            (FieldFilter.between('count', None, 6), True),
+            (FieldFilter.between('count', 6), False),
+        ]
+        for filter_, expected in arrange:
+            self.assertEqual(filter_.matches(entity), expected, msg=f'Failed with: {filter_}')
+
+    def test_bounds(self):
+        self.assertEqual(FieldFilter('name', 'eq', 'Foo').bounds(), ('foo', True, 'foo', True))
+        self.assertEqual(FieldFilter('count', 'gt', 1).bounds(), (1, False, None, False))
+        self.assertEqual(FieldFilter('count', 'lte', 1).bounds(), (None, False, 1, True))
+        self.assertEqual(FieldFilter.between('count', 1, 2).bounds(), (1, True, 2, False))
+
+    def test_combinations(self):
+        is_active = FieldFilter('is_active', 'eq', True)
+        name = FieldFilter('name', 'contains', 'foo')
+        count = FieldFilter('count', 'gt', 1)
+
+        all_of = is_active & name & count
+        self.assertEqual(all_of, AllOf((is_active, name, count)))
+        self.assertEqual(all_of.conjuncts(), (is_active, name, count))
+        self.assertEqual(all_of.fields_names(), ('is_active', 'name', 'count'))
+        self.assertTrue(all_of.matches(EntityStub(is_active=True, name='Foo', count=2)))
+        self.assertFalse(all_of.matches(EntityStub(is_active=True, name='Foo', count=1)))
+
+        any_of = is_active | name | count
+        self.assertEqual(any_of, AnyOf((is_active, name, count)))
+        self.assertEqual(any_of.conjuncts(), (any_of,))
+        self.assertTrue(any_of.matches(EntityStub(is_active=False, name='bar', count=2)))
+        self.assertFalse(any_of.matches(EntityStub(is_active=False, name='bar', count=1)))
+
+        mixed = any_of & is_active
+        self.assertEqual(mixed.conjuncts(), (any_of, is_active))
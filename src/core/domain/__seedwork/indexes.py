@@ -0,0 +1,208 @@
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+import re
+import sys
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+
+@dataclass(slots=True)
+class SortedIndex:
+
+    # Row numbers ordered by key, with the keys alongside for bisect. Rows
+    # whose key is None are left out: no range predicate can match them. When
+    # built with ties (e.g. the entity IDs), rows with equal keys are ordered
+    # by them, like the ID tie-break of sorts; otherwise by insertion.
+
+    keys: List[Any] = field(default_factory=lambda: [])
+    rows: List[int] = field(default_factory=lambda: [])
+    ties: Optional[List[Any]] = None
+
+    @classmethod
+    def build(cls, column: List[Any], ties: Optional[List[Any]] = None) -> 'SortedIndex':
+        rows = [row for row, key in enumerate(column) if key is not None]
+        if ties is not None:
+            # Two stable sorts are cheaper than one on (key, tie) pairs.
+            rows.sort(key=ties.__getitem__)
+        rows.sort(key=column.__getitem__)
+        return cls(
+            list(map(column.__getitem__, rows)), rows,
+            None if ties is None else list(map(ties.__getitem__, rows)))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, row: int, key: Any, tie: Any = None) -> None:
+        if key is not None:
+            position = bisect.bisect_right(self.keys, key)
+            if self.ties is not None:
+                start = bisect.bisect_left(self.keys, key, 0, position)
+                position = bisect.bisect_right(self.ties, tie, start, position)
+                self.ties.insert(position, tie)
+            self.keys.insert(position, key)
+            self.rows.insert(position, row)
+
+    def remove(self, row: int, key: Any, tie: Any = None) -> None:
+        if key is not None:
+            start = bisect.bisect_left(self.keys, key)
+            stop = bisect.bisect_right(self.keys, key, start)
+            if self.ties is not None and tie is not None:
+                start = bisect.bisect_left(self.ties, tie, start, stop)
+                stop = min(start + 1, stop)
+            position = start + self.rows[start:stop].index(row)
+            del self.keys[position]
+            del self.rows[position]
+            if self.ties is not None:
+                del self.ties[position]
+
+    def renumber(self, new_rows: List[int]) -> None:
+        # new_rows[row] is the row's new number; the order is unchanged.
+        self.rows = list(map(new_rows.__getitem__, self.rows))
+
+    def span(
+        self, low: Any = None, low_inclusive: bool = True,
+        high: Any = None, high_inclusive: bool = False
+    ) -> Tuple[int, int]:
+        # Positions [start, stop) of the keys within the bounds; None is unbounded.
+        start, stop = 0, len(self.keys)
+        if low is not None:
+            start = (bisect.bisect_left if low_inclusive else bisect.bisect_right)(self.keys, low)
+        if high is not None:
+            stop = (bisect.bisect_right if high_inclusive else bisect.bisect_left)(
+                self.keys, high, start)
+        return start, max(start, stop)
+
+    def prefix_span(self, prefix: str) -> Tuple[int, int]:
+        # Text keys starting with prefix sort in [prefix, prefix with its last
+        # character bumped).
+        stem = prefix.rstrip(chr(sys.maxunicode))
+        return self.span(prefix, True, stem[:-1] + chr(ord(stem[-1]) + 1) if stem else None)
+
+    def scan(self, start: int, stop: int) -> List[int]:
+        return self.rows[start:stop]
+
+
+_WORD = re.compile(r'\w+')
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    # pg_trgm style: every case-folded word padded with two spaces in front
+    # and one behind, so word starts weigh more than word ends.
+    grams = set()
+    for word in _WORD.findall(text.casefold() if text else ''):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(text: Optional[str], other: Optional[str]) -> float:
+    grams, other_grams = trigrams(text), trigrams(other)
+    if not grams or not other_grams:
+        return 0.0
+    common = len(grams & other_grams)
+    return common / (len(grams) + len(other_grams) - common)
+
+
+@dataclass(slots=True)
+class TrigramIndex:
+
+    # Inverted index from trigram to rows, plus each row's trigram count so
+    # similarity (shared / union of trigrams) needs no access to the text.
+
+    postings: Dict[str, Set[int]] = field(default_factory=lambda: {})
+    sizes: Dict[int, int] = field(default_factory=lambda: {})
+
+    @classmethod
+    def build(cls, column: List[Optional[str]]) -> 'TrigramIndex':
+        index = cls()
+        for row, text in enumerate(column):
+            index.add(row, text)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def add(self, row: int, text: Optional[str]) -> None:
+        grams = trigrams(text)
+        if grams:
+            self.sizes[row] = len(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(row)
+
+    def remove(self, row: int, text: Optional[str]) -> None:
+        if self.sizes.pop(row, None) is not None:
+            for gram in trigrams(text):
+                self.postings[gram].discard(row)
+
+    def renumber(self, new_rows: List[int]) -> None:
+        # new_rows[row] is the row's new number.
+        self.postings = {
+            gram: set(map(new_rows.__getitem__, rows)) for gram, rows in self.postings.items()
+        }
+        self.sizes = {new_rows[row]: size for row, size in self.sizes.items()}
+
+    def similar(
+        self, text: str, threshold: float, tie: Optional[Callable[[int], Any]] = None
+    ) -> List[Tuple[float, int]]:
+        # (similarity, row) at or above threshold, best first, then by tie(row)
+        # (e.g. the row's ID) or by row. Only rows sharing a trigram with text
+        # are looked at, and rows sharing fewer than threshold * len(query)
+        # trigrams cannot reach the threshold.
+        grams = trigrams(text)
+        if not grams:
+            return []
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))
+        minimum = threshold * len(grams)
+        matches = []
+        for row, common in counts.items():
+            if common >= minimum:
+                score = common / (len(grams) + self.sizes[row] - common)
+                if score >= threshold:
+                    matches.append((score, row))
+        tie = tie or (lambda row: row)
+        matches.sort(key=lambda match: (-match[0], tie(match[1])))
+        return matches
+
+    def containing(self, text: str) -> Optional[Set[int]]:
+        # Candidate rows for a substring match: every trigram inside one word
+        # of the substring is indexed for the rows that contain it. None when
+        # the substring has no such trigram (e.g. shorter than 3 characters).
+        folded = text.casefold()
+        grams = {
+            gram for gram in (folded[i:i + 3] for i in range(len(folded) - 2))
+            if _WORD.fullmatch(gram)
+        }
+        if not grams:
+            return None
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        return postings[0].intersection(*postings[1:])
+
+
+@dataclass(slots=True)
+class UniqueIndex:
+
+    # One key per owner (a row or an ID) and, for each key, the owner holding
+    # it. A None key is recorded for the owner but never conflicts; when
+    # duplicates were let in, the first owner keeps the key.
+
+    owners: Dict[Hashable, Hashable] = field(default_factory=lambda: {})
+    keys: Dict[Hashable, Hashable] = field(default_factory=lambda: {})
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def conflicts(self, owner: Hashable, key: Hashable) -> bool:
+        return key is not None and self.owners.get(key, owner) != owner
+
+    def put(self, owner: Hashable, key: Hashable) -> None:
+        self.discard(owner)
+        self.keys[owner] = key
+        if key is not None:
+            self.owners.setdefault(key, owner)
+
+    def discard(self, owner: Hashable) -> None:
+        key = self.keys.pop(owner, None)
+        if key is not None and self.owners.get(key) == owner:
+            del self.owners[key]
@@ -0,0 +1,142 @@
+import unittest
+
+from .indexes import SortedIndex, TrigramIndex, UniqueIndex, trigram_similarity, trigrams
+
+
+class SortedIndexUnitTests(unittest.TestCase):
+
+    def test_build(self):
+        index = SortedIndex.build(['c', None, 'a', 'b', 'a'])
+        self.assertEqual(index.keys, ['a', 'a', 'b', 'c'])
+        self.assertEqual(index.rows, [2, 4, 3, 0])
+        self.assertEqual(len(index), 4)
+
+    def test_add_and_remove(self):
+        index = SortedIndex.build([1, 3])
+        index.add(2, 2)
+        index.add(3, 2)
+        index.add(4, None)
+        self.assertEqual((index.keys, index.rows), ([1, 2, 2, 3], [0, 2, 3, 1]))
+        index.remove(3, 2)
+        index.remove(4, None)
+        self.assertEqual((index.keys, index.rows), ([1, 2, 3], [0, 2, 1]))
+        with self.assertRaises(ValueError):
+            index.remove(5, 2)
+
+    def test_ties(self):
+        index = SortedIndex.build(['b', 'a', None, 'a'], ['x', 'z', 'w', 'y'])
+        self.assertEqual(
+            (index.keys, index.rows, index.ties), (['a', 'a', 'b'], [3, 1, 0], ['y', 'z', 'x']))
+        index.add(4, 'a', 'x')
+        index.add(5, 'a', 'zz')
+        index.add(6, 'b', 'w')
+        self.assertEqual(index.rows, [4, 3, 1, 5, 6, 0])
+        index.remove(1, 'a')
+        self.assertEqual((index.rows, index.ties), ([4, 3, 5, 6, 0], ['x', 'y', 'zz', 'w', 'x']))
+
+    def test_renumber(self):
+        index = SortedIndex.build(['b', None, 'a', None, 'c'])
+        index.renumber([0, -1, 1, -1, 2])
+        self.assertEqual((index.keys, index.rows), (['a', 'b', 'c'], [1, 0, 2]))
+
+    def test_span_and_scan(self):
+        index = SortedIndex.build([10, 20, 20, 30, 40])
+        arrange = [
+            ({}, (0, 5)),
+            ({'low': 20}, (1, 5)),
+            ({'low': 20, 'low_inclusive': False}, (3, 5)),
+            ({'high': 30}, (0, 3)),
+            ({'high': 30, 'high_inclusive': True}, (0, 4)),
+            ({'low': 20, 'high': 20, 'high_inclusive': True}, (1, 3)),
+            ({'low': 35, 'high': 15}, (4, 4)),
+        ]
+        for kwargs, expected in arrange:
+            self.assertEqual(index.span(**kwargs), expected, msg=f'Failed with: {kwargs}')
+        self.assertEqual(index.scan(*index.span(low=20, high=40)), [1, 2, 3])
+
+    def test_prefix_span(self):
+        index = SortedIndex.build(['mob', 'mo', 'm', 'mp', 'n', 'mo\U0010ffff', 'ab'])
+        self.assertEqual(index.scan(*index.prefix_span('mo')), [1, 0, 5])
+        self.assertEqual(index.scan(*index.prefix_span('mo\U0010ffff')), [5])
+        self.assertEqual(index.scan(*index.prefix_span('m')), [2, 1, 0, 5, 3])
+        self.assertEqual(index.scan(*index.prefix_span('x')), [])
+        self.assertEqual(len(index.scan(*index.prefix_span(''))), 7)
+
+
+class TrigramUnitTests(unittest.TestCase):
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams('Cat'), {'  c', ' ca', 'cat', 'at '})
+        self.assertEqual(trigrams('a-B'), {'  a', ' a ', '  b', ' b '})
+        self.assertEqual(trigrams('Straße'), trigrams('STRASSE'))
+        self.assertEqual(trigrams(''), set())
+        self.assertEqual(trigrams(None), set())
+
+    def test_trigram_similarity(self):
+        self.assertEqual(trigram_similarity('movie', 'MOVIE'), 1.0)
+        self.assertAlmostEqual(trigram_similarity('movei', 'movie'), 1 / 3)
+        self.assertEqual(trigram_similarity('abc', 'xyz'), 0.0)
+        self.assertEqual(trigram_similarity('movie', None), 0.0)
+
+
+class TrigramIndexUnitTests(unittest.TestCase):
+
+    def test_build_add_and_remove(self):
+        index = TrigramIndex.build(['cat', None, 'car'])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.postings[' ca'], {0, 2})
+        index.add(3, 'cart')
+        index.remove(0, 'cat')
+        index.remove(1, None)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.postings[' ca'], {2, 3})
+        self.assertEqual(index.postings['cat'], set())
+
+    def test_renumber(self):
+        index = TrigramIndex.build([None, 'cat', None, 'car'])
+        index.renumber([-1, 0, -1, 1])
+        self.assertEqual(index.postings[' ca'], {0, 1})
+        self.assertEqual(index.sizes, {0: 4, 1: 4})
+
+    def test_similar(self):
+        index = TrigramIndex.build(['Movie', 'Documentary', 'Movies', 'Music', 'movie'])
+        self.assertEqual(
+            [row for _, row in index.similar('movei', 0.3)], [0, 4, 2])
+        self.assertEqual(index.similar('movie', 1.0), [(1.0, 0), (1.0, 4)])
+        self.assertEqual(index.similar('movie', 1.0, lambda row: -row), [(1.0, 4), (1.0, 0)])
+        self.assertEqual(index.similar('zzz', 0.1), [])
+        self.assertEqual(index.similar('', 0.1), [])
+        for score, row in index.similar('mu', 0.01):
+            self.assertAlmostEqual(
+                score,
+                trigram_similarity('mu', ['Movie', 'Documentary', 'Movies', 'Music', 'movie'][row]))
+
+    def test_containing(self):
+        index = TrigramIndex.build(['Movie night', 'Documentary', 'Movies'])
+        self.assertEqual(index.containing('OVIE'), {0, 2})
+        # Candidates only: trigrams spanning words are not indexed.
+        self.assertEqual(index.containing('ovie ni'), {0, 2})
+        self.assertEqual(index.containing('xyz'), set())
+        self.assertIsNone(index.containing('mo'))
+        self.assertIsNone(index.containing('e n'))
+
+
+class UniqueIndexUnitTests(unittest.TestCase):
+
+    def test_put_conflicts_and_discard(self):
+        index = UniqueIndex()
+        index.put('a', 'movie')
+        index.put('b', None)
+        self.assertEqual(len(index), 2)
+        self.assertTrue(index.conflicts('c', 'movie'))
+        self.assertFalse(index.conflicts('a', 'movie'))
+        self.assertFalse(index.conflicts('c', None))
+        index.put('a', 'film')
+        self.assertFalse(index.conflicts('c', 'movie'))
+        self.assertTrue(index.conflicts('c', 'film'))
+        index.put('c', 'film')
+        index.discard('c')
+        self.assertTrue(index.conflicts('c', 'film'))
+        index.discard('a')
+        index.discard('a')
+        self.assertEqual((index.owners, index.keys), ({}, {'b': None}))
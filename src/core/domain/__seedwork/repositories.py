@@ -1,12 +1,26 @@
 from abc import ABC, abstractmethod
 import asyncio
+import bisect
+from collections import Counter
 import copy
 from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 import math
-from typing import Any, List, Optional, TypeVar, Generic
+import operator
+import sys
+from typing import (
+    Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple,
+    Type, TypeVar, Generic
+)
 
-from .exceptions import EntityAlreadyExistsException, EntityNotFoundException
-from .value_objects import UniqueEntityId
+from .changes import Change, ChangeLog, ChangeSet
+from .exceptions import (
+    DuplicateValueException, EntityAlreadyExistsException, EntityNotFoundException,
+    EntityVersionConflictException, InvalidFilterException
+)
+from .filters import FieldFilter, FilterExpression, casefold_sort_key, fields_types
+from .indexes import SortedIndex, TrigramIndex, UniqueIndex
+from .value_objects import UniqueEntityId, canonical_id
 from .entities import GenericEntity
 
 T = TypeVar('T', bound=GenericEntity)
@@ -26,6 +40,14 @@ class RepositoryInterface(Generic[T, Input, Output], ABC):
     async def insert_async(self, entity: T) -> None:
         ...
 
+    def insert_many(self, entities: List[T]) -> None:
+        for entity in entities:
+            self.insert(entity)
+
+    async def insert_many_async(self, entities: List[T]) -> None:
+        for entity in entities:
+            await self.insert_async(entity)
+
     @abstractmethod
     def update(self, entity: T) -> None:
         ...
@@ -34,6 +56,14 @@ class RepositoryInterface(Generic[T, Input, Output], ABC):
     async def update_async(self, entity: T) -> None:
         ...
 
+    def update_many(self, entities: List[T]) -> None:
+        for entity in entities:
+            self.update(entity)
+
+    async def update_many_async(self, entities: List[T]) -> None:
+        for entity in entities:
+            await self.update_async(entity)
+
     @abstractmethod
     def delete(self, id_: str | UniqueEntityId) -> None:
         ...
@@ -42,6 +72,14 @@ class RepositoryInterface(Generic[T, Input, Output], ABC):
     async def delete_async(self, id_: str | UniqueEntityId) -> None:
         ...
 
+    def delete_many(self, ids: List[str | UniqueEntityId]) -> None:
+        for id_ in ids:
+            self.delete(id_)
+
+    async def delete_many_async(self, ids: List[str | UniqueEntityId]) -> None:
+        for id_ in ids:
+            await self.delete_async(id_)
+
     @abstractmethod
     def find_by_id(self, id_: str | UniqueEntityId) -> T:
         ...
@@ -50,6 +88,36 @@ class RepositoryInterface(Generic[T, Input, Output], ABC):
     async def find_by_id_async(self, id_: str | UniqueEntityId) -> T:
         ...
 
+    def find_known_ids(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        # The IDs (canonical) an insert would reject: held by a live or a
+        # deleted entity. Repositories that keep deleted entities override
+        # this; the fallback only sees live ones.
+        return set(self.find_versions(ids))
+
+    async def find_known_ids_async(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        return set(await self.find_versions_async(ids))
+
+    def find_versions(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        # Version of each live entity among ids, by canonical ID.
+        versions = {}
+        for id_ in ids:
+            try:
+                entity = self.find_by_id(id_)
+            except EntityNotFoundException:
+                continue
+            versions[entity.id] = entity.version
+        return versions
+
+    async def find_versions_async(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        versions = {}
+        for id_ in ids:
+            try:
+                entity = await self.find_by_id_async(id_)
+            except EntityNotFoundException:
+                continue
+            versions[entity.id] = entity.version
+        return versions
+
     @abstractmethod
     def find_all(self) -> List[T]:
         ...
@@ -79,6 +147,8 @@ class SearchParams(Generic[Filter]):
     sort_by: Optional[str] = None
     sort_dir: Optional[str] = None
     filter_: Optional[Filter] = None
+    # Comma separated facet names, counted over the filtered items.
+    facets: Optional[str] = None
 
     def __post_init__(self):
         self.__normalize_page()
@@ -86,6 +156,7 @@ class SearchParams(Generic[Filter]):
         self.__normalize_sort_by()
         self.__normalize_sort_dir()
         self.__normalize_filter()
+        self.__normalize_facets()
 
     def __normalize_page(self):
         default = self.__get_field('page').default
@@ -97,11 +168,22 @@ class SearchParams(Generic[Filter]):
         per_page = self.__convert_value_to_int(self.per_page, default)
         self.per_page = default if per_page < 1 else per_page
 
+    @property
+    def sort_order(self) -> List[Tuple[str, str]]:
+        return parse_sort(self.sort_by, self.sort_dir)
+
     def __normalize_sort_by(self):
+        if isinstance(self.sort_by, (list, tuple)) and self.sort_by:
+            self.sort_by = ','.join(map(str, self.sort_by))
+        if isinstance(self.sort_by, str) and ',' in self.sort_by:
+            self.sort_by = ','.join(_split_sort(self.sort_by))
         self.sort_by = None if self.sort_by == '' or self.sort_by is None \
             else str(self.sort_by)
 
     def __normalize_sort_dir(self):
+        if self.sort_by is not None and ',' in self.sort_by:
+            self.sort_dir = ','.join(direction for _, direction in self.sort_order)
+            return
         if self.sort_dir == '' or self.sort_dir is None:
             self.sort_dir = 'asc' if self.sort_by else None
             return
@@ -112,9 +194,18 @@ class SearchParams(Generic[Filter]):
         self.sort_dir = 'asc' if sort_dir not in ['asc', 'desc'] else sort_dir
 
     def __normalize_filter(self):
+        if isinstance(self.filter_, FilterExpression):
+            return
         self.filter_ = None if self.filter_ == '' or self.filter_ is None \
             else str(self.filter_)
 
+    @property
+    def facets_names(self) -> List[str]:
+        return _split_sort(self.facets)
+
+    def __normalize_facets(self):
+        self.facets = ','.join(_split_sort(self.facets)) or None
+
     def __convert_value_to_int(self, value: Any, default=0) -> int:
         try:
             return int(value)
@@ -136,6 +227,8 @@ class SearchResult(Generic[T, Filter]):
     sort_by: Optional[str] = None
     sort_dir: Optional[str] = None
     filter_: Optional[Filter] = None
+    # Facet name -> value -> count, when facets were requested.
+    facets: Optional[Dict[str, Dict[Any, int]]] = None
 
     def __post_init__(self):
         object.__setattr__(self, 'last_page', math.ceil(
@@ -150,10 +243,129 @@ class SearchResult(Generic[T, Filter]):
             'last_page': self.last_page,
             'sort_by': self.sort_by,
             'sort_dir': self.sort_dir,
-            'filter': self.filter_
+            'filter': self.filter_,
+            'facets': self.facets
         }
 
 
+# Multi-field sorts are comma separated: sort_by='name,created_at' with
+# sort_dir='desc,asc' (lists are accepted too). Each field without a direction
+# sorts ascending, like SQL's ORDER BY. Null values sort last in either
+# direction (see nulls_last). Engines break remaining ties by entity ID in the
+# direction of the last field, so pages are stable.
+def parse_sort(sort_by: Any, sort_dir: Any = None) -> List[Tuple[str, str]]:
+    directions = [direction.lower() for direction in _split_sort(sort_dir)]
+    return [
+        (field_name, directions[index] if index < len(directions)
+         and directions[index] in ('asc', 'desc') else 'asc')
+        for index, field_name in enumerate(_split_sort(sort_by))
+    ]
+
+
+def nulls_last(value: Any, descending: bool = False) -> Tuple[bool, Any]:
+    # Sort key putting None after every value, in a sort reversed for
+    # descending or not. Two Nones compare equal without comparing values.
+    return (value is None) != descending, value
+
+
+def _split_sort(value: Any) -> List[str]:
+    if value is None:
+        return []
+    values = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    return [part for part in (str(item).strip() for item in values) if part]
+
+
+def _order_ties(
+    indexes: List[int], columns: List[List[Any]], tie: Callable[[int], Any], is_reverse: bool
+) -> None:
+    # Orders each run of indexes with equal keys in every column by tie, in
+    # place: one pass over the sorted keys, then only the ties are sorted.
+    keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+    sorted_keys = list(map(keys.__getitem__, indexes))
+    equal = list(map(operator.eq, sorted_keys, sorted_keys[1:]))
+    start = 0
+    while True:
+        try:
+            start = equal.index(True, start)
+        except ValueError:
+            return
+        stop = start + 1
+        while stop < len(equal) and equal[stop]:
+            stop += 1
+        indexes[start:stop + 1] = sorted(indexes[start:stop + 1], key=tie, reverse=is_reverse)
+        start = stop
+
+
+def _same_items(items: List[Any], other: List[Any]) -> bool:
+    return len(items) == len(other) and all(map(operator.is_, items, other))
+
+
+def _check_version(stored: Any, entity: Any) -> None:
+    # The compare half of compare-and-swap; a database does both in one
+    # UPDATE ... SET version = version + 1 WHERE id = ? AND version = ?.
+    if entity.version != stored.version:
+        raise EntityVersionConflictException(entity.id, entity.version, stored.version)
+
+
+def _set_version(entity: Any, version: int) -> None:
+    object.__setattr__(entity, 'version', version)
+
+
+def _nonzero(counts: Counter) -> Dict[Any, int]:
+    return {value: count for value, count in counts.items() if count}
+
+
+@dataclass(slots=True)
+class StringPool:
+
+    # Deduplicates equal strings so every stored entity shares one object.
+    # intern() takes a reference to the pooled string and release() gives it
+    # back; a string leaves the pool with its last reference. bytes_saved is
+    # the size (sys.getsizeof) of the equal copies that were dropped for a
+    # pooled string still referenced in their place.
+
+    hits: int = 0
+    bytes_saved: int = 0
+    _values: Dict[str, str] = field(default_factory=lambda: {})
+    _references: Dict[str, int] = field(default_factory=lambda: {})
+    _copies: Dict[str, int] = field(default_factory=lambda: {})
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        pooled = self._values.setdefault(value, value)
+        self._references[value] = self._references.get(value, 0) + 1
+        if pooled is not value:
+            self.hits += 1
+            self._copies[value] = self._copies.get(value, 0) + 1
+            self.bytes_saved += sys.getsizeof(value)
+        return pooled
+
+    def release(self, value: Optional[str]) -> None:
+        references = self._references.get(value)
+        if references is None:
+            return
+        if references == 1:
+            del self._values[value], self._references[value]
+            self._copies.pop(value, None)
+            return
+        self._references[value] = references - 1
+        # At most one reference per dropped copy is left besides the first.
+        copies = self._copies.get(value, 0)
+        if copies > references - 2:
+            if copies == 1:
+                del self._copies[value]
+            else:
+                self._copies[value] = copies - 1
+            self.bytes_saved -= sys.getsizeof(value)
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._values), 'hits': self.hits, 'bytes_saved': self.bytes_saved}
+
+
 @dataclass(slots=True)
 class InMemoryRepository(
         Generic[T, Filter],
@@ -164,12 +376,59 @@ class InMemoryRepository(
 
     TEST_ASYNC_DELAY = 0.001
 
+    entity_class: ClassVar[Type[T]]
+    interned_fields: ClassVar[Tuple[str, ...]] = ()
+    # Text fields with a trigram index, for fuzzy and substring lookups.
+    trigram_fields: ClassVar[Tuple[str, ...]] = ()
+    # Facet name -> function giving an entity's value for that facet.
+    facet_fields: ClassVar[Dict[str, Callable[[Any], Any]]] = {}
+    # Fields no two live entities may share (text compared case-folded) when
+    # the repository is created with enforce_unique.
+    unique_fields: ClassVar[Tuple[str, ...]] = ()
+    # Collation of the text fields; other fields sort by their own values.
+    sort_key: ClassVar[Callable[[Any], Any]] = staticmethod(casefold_sort_key)
+
     _items: List[T] = field(default_factory=lambda: [])
+    _tombstones: Dict[str, T] = field(default_factory=lambda: {})
+    # Sort keys computed at write time: one column per sortable text field
+    # (other fields are read from the owners), aligned with _sort_owners, the
+    # entities they were computed for, and _sort_rows, the row of each of them
+    # by ID. A row keeps its number while its entity is live; removing it
+    # leaves an empty row (None owner and keys, listed in _empty_rows) until
+    # empty rows outnumber the others and the rows are renumbered. A sort only
+    # uses the columns when handed the owners in row order (e.g. an unfiltered
+    # search); otherwise the keys are computed during the sort.
+    _sort_columns: Dict[str, List[Any]] = field(
+        default_factory=lambda: {}, repr=False, compare=False)
+    _sort_owners: List[Optional[T]] = field(
+        default_factory=lambda: [], repr=False, compare=False)
+    _sort_rows: Dict[str, int] = field(default_factory=lambda: {}, repr=False, compare=False)
+    _empty_rows: List[int] = field(default_factory=lambda: [], repr=False, compare=False)
+    # Sorted indexes over the same rows (key then ID), built on first use by a
+    # lookup or a whole-table sort and kept in step with every write.
+    _sorted_indexes: Dict[str, SortedIndex] = field(
+        default_factory=lambda: {}, repr=False, compare=False)
+    # Same rows and lifecycle for the trigram indexes of trigram_fields.
+    _trigram_indexes: Dict[str, TrigramIndex] = field(
+        default_factory=lambda: {}, repr=False, compare=False)
+    # Facet counters over the same rows, kept up to date once built; they
+    # answer facets for unfiltered searches without counting again.
+    _facet_counts: Dict[str, Counter] = field(
+        default_factory=lambda: {}, repr=False, compare=False)
+    # Latest version of every live or deleted entity, for incremental sync.
+    _changes: ChangeLog[T] = field(default_factory=ChangeLog, repr=False, compare=False)
+    # Live entity IDs by unique_fields value, built on the first checked write.
+    _unique_indexes: Dict[str, UniqueIndex] = field(
+        default_factory=lambda: {}, repr=False, compare=False)
+    string_pool: Optional[StringPool] = None
+    enforce_unique: bool = False
 
     def insert(self, entity: T) -> None:
-        found = next(filter(lambda e: e.id == str(entity.id), self._items), None)
-        if found is None:
-            self._items.append(copy.copy(entity))
+        entity_id = entity.id
+        found = next(filter(lambda e: e.id == entity_id, self._items), None)
+        if found is None and entity.id not in self._tombstones:
+            self.__check_unique([entity])
+            self.__store(self.__persist(entity))
         else:
             raise EntityAlreadyExistsException(
                 f'Entity already exists using ID: {entity.id}')
@@ -178,28 +437,110 @@ class InMemoryRepository(
         await asyncio.sleep(self.TEST_ASYNC_DELAY)
         self.insert(entity)
 
+    def insert_many(self, entities: List[T]) -> None:
+        known_ids = self.__known_ids()
+        for entity in entities:
+            if entity.id in known_ids:
+                raise EntityAlreadyExistsException(
+                    f'Entity already exists using ID: {entity.id}')
+            known_ids.add(entity.id)
+        self.__check_unique(entities)
+        for entity in entities:
+            self.__store(self.__persist(entity))
+
+    async def insert_many_async(self, entities: List[T]) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.insert_many(entities)
+
     def update(self, entity: T) -> None:
         found = self.find_by_id(entity.id)
         found_index = self._items.index(found)
-        self._items[found_index] = copy.copy(entity)
+        _check_version(found, entity)
+        self.__check_unique([entity])
+        self.__replace(found_index, found, entity)
 
     async def update_async(self, entity: T) -> None:
         await asyncio.sleep(self.TEST_ASYNC_DELAY)
         self.update(entity)
 
+    def update_many(self, entities: List[T]) -> None:
+        # One pass over _items for the whole batch, and nothing is written
+        # unless every entity is found.
+        latest = {entity.id: entity for entity in entities}
+        positions = self.__positions(list(latest))
+        for entity_id, index in positions.items():
+            _check_version(self._items[index], latest[entity_id])
+        self.__check_unique(list(latest.values()))
+        # From the last row back: a deactivated entity leaves _items without
+        # moving the rows still to be written.
+        for entity_id, index in sorted(positions.items(), key=lambda item: -item[1]):
+            self.__replace(index, self._items[index], latest[entity_id])
+
+    async def update_many_async(self, entities: List[T]) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.update_many(entities)
+
     def delete(self, id_: str | UniqueEntityId) -> None:
         found = self.find_by_id(id_)
         found_index = self._items.index(found)
-        found.deactivate()
-        self._items[found_index] = copy.copy(found)
+        self.__remove(found_index, found)
 
     async def delete_async(self, id_: str | UniqueEntityId) -> None:
         await asyncio.sleep(self.TEST_ASYNC_DELAY)
         self.delete(id_)
 
+    def delete_many(self, ids: List[str | UniqueEntityId]) -> None:
+        positions = self.__positions(list(dict.fromkeys(map(canonical_id, ids))))
+        for index in sorted(positions.values(), reverse=True):
+            self.__remove(index, copy.copy(self._items[index]))
+
+    async def delete_many_async(self, ids: List[str | UniqueEntityId]) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.delete_many(ids)
+
+    def load(self, rows: Iterable[dict]) -> None:
+        known_ids = self.__known_ids()
+        for row in rows:
+            entity = self.entity_class.rehydrate(row)
+            if entity.id in known_ids:
+                raise EntityAlreadyExistsException(
+                    f'Entity already exists using ID: {entity.id}')
+            known_ids.add(entity.id)
+            self.__check_unique([entity])
+            self.__store(self.__intern(entity))
+
+    def restore(self, id_: str | UniqueEntityId) -> T:
+        entity_id = canonical_id(id_)
+        entity = self._tombstones.get(entity_id)
+        if entity is None:
+            raise EntityNotFoundException(
+                f'Entity not found using ID: {id_}')
+        # Another live entity may have taken a unique value meanwhile.
+        self.__check_unique([entity], active_only=False)
+        del self._tombstones[entity_id]
+        entity.activate()
+        _set_version(entity, entity.version + 1)
+        self.__append_sort_keys(entity)
+        self.__index_unique(entity)
+        self._items.append(entity)
+        self._changes.record(entity.id, entity)
+        return copy.copy(entity)
+
+    def compact(self, retention: timedelta) -> int:
+        limit = datetime.now() - retention
+        expired = [
+            id_ for id_, entity in self._tombstones.items()
+            if (entity.updated_at or entity.created_at) < limit
+        ]
+        for id_ in expired:
+            self.__release(self._tombstones.pop(id_))
+        self._changes.forget(expired)
+        return len(expired)
+
     def find_by_id(self, id_: str | UniqueEntityId) -> T:
-        entity = next(filter(lambda e: e.id == str(id_), self._items), None)
-        if entity is None or entity.is_active is False:
+        entity_id = canonical_id(id_)
+        entity = next(filter(lambda e: e.id == entity_id, self._items), None)
+        if entity is None:
             raise EntityNotFoundException(
                 f'Entity not found using ID: {id_}')
         else:
@@ -209,8 +550,26 @@ class InMemoryRepository(
         await asyncio.sleep(self.TEST_ASYNC_DELAY)
         return self.find_by_id(id_)
 
+    def find_known_ids(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        wanted = set(map(canonical_id, ids))
+        known_ids = {item.id for item in self._items if item.id in wanted}
+        known_ids.update(wanted & self._tombstones.keys())
+        return known_ids
+
+    async def find_known_ids_async(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_known_ids(ids)
+
+    def find_versions(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        wanted = set(map(canonical_id, ids))
+        return {item.id: item.version for item in self._items if item.id in wanted}
+
+    async def find_versions_async(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_versions(ids)
+
     def find_all(self) -> List[T]:
-        return copy.copy(list(filter(lambda e: e.is_active, self._items)))
+        return copy.copy(self._items)
 
     async def find_all_async(self) -> List[T]:
         await asyncio.sleep(self.TEST_ASYNC_DELAY)
@@ -218,7 +577,10 @@ class InMemoryRepository(
 
     def search(self, input_: SearchParams[Filter]) -> SearchResult[T, Filter]:
 
-        items_filtered = self._apply_filter(self.find_all(), input_.filter_)
+        if isinstance(input_.filter_, FilterExpression):
+            items_filtered = self._apply_filter_expression(input_.filter_)
+        else:
+            items_filtered = self._apply_filter(self.find_all(), input_.filter_)
         items_sorted = self._apply_sort(
             items_filtered, input_.sort_by, input_.sort_dir)
         items_paginated = self._apply_pagination(
@@ -231,7 +593,8 @@ class InMemoryRepository(
             per_page=input_.per_page,
             sort_by=input_.sort_by,
             sort_dir=input_.sort_dir,
-            filter_=input_.filter_
+            filter_=input_.filter_,
+            facets=self._apply_facets(items_filtered, input_.facets_names)
         )
 
     async def search_async(self, input_: SearchParams[Filter]) -> SearchResult[T, Filter]:
@@ -242,20 +605,478 @@ class InMemoryRepository(
     def _apply_filter(self, items: List[T], filter_: Filter | None) -> List[T]:
         ...
 
+    def _apply_filter_expression(self, expression: FilterExpression) -> List[T]:
+        expression.validate(fields_types(self.entity_class))
+        self.__sync_sort_columns()
+        rows = self._plan_filter(expression)
+        candidates = self._items if rows is None else map(
+            self._sort_owners.__getitem__, sorted(rows))
+        return [item for item in candidates if expression.matches(item)]
+
+    def _plan_filter(self, expression: FilterExpression) -> Optional[List[int]]:
+        # Picks the most selective index scan over the AND-ed terms; the whole
+        # expression is still evaluated on the rows it returns. None means a
+        # full scan.
+        best = None
+        for term in expression.conjuncts():
+            scan = self._index_scan(term)
+            if scan is not None and (best is None or scan[0] < best[0]):
+                best = scan
+        return None if best is None else best[1]()
+
+    def _index_scan(
+        self, term: FilterExpression
+    ) -> Optional[Tuple[int, Callable[[], List[int]]]]:
+        # (estimated rows, fetch rows) for a term an index can answer.
+        if not isinstance(term, FieldFilter) or term.value is None:
+            return None
+        if term.op == 'contains':
+            if term.field not in self.trigram_fields:
+                return None
+            rows = self.__trigram_index(term.field).containing(term.value)
+            return None if rows is None else (len(rows), lambda: list(rows))
+        if term.field != 'id' and term.field not in self.sortable_fields:
+            return None
+        low, low_inclusive, high, high_inclusive = term.bounds()
+        if self.sort_key is not casefold_sort_key and (
+                isinstance(low, str) or isinstance(high, str)):
+            # The index is ordered by another collation than the filter.
+            return None
+        index = self.__sorted_index(term.field)
+        start, stop = index.span(low, low_inclusive, high, high_inclusive)
+        return stop - start, lambda: index.scan(start, stop)
+
+    def _changes_since(self, version: int, limit: Optional[int] = None) -> ChangeSet[T]:
+        # The log holds the stored entities, so callers get copies like from
+        # any other read.
+        changes = self._changes.since(version, limit)
+        return ChangeSet(
+            [Change(change.version, copy.copy(change.entity)) for change in changes.items],
+            changes.version,
+            changes.has_more,
+            changes.resync
+        )
+
+    def _find_similar(
+        self, field_name: str, text: str, threshold: float, limit: Optional[int] = None
+    ) -> List[T]:
+        # Entities whose field has a trigram similarity of at least threshold
+        # with text, most similar first, then by ID.
+        if field_name not in self.trigram_fields:
+            raise InvalidFilterException(f'Invalid filter field: {field_name}')
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold must be in (0, 1]')
+
+        def rows() -> List[int]:
+            owners = self._sort_owners
+            matches = self.__trigram_index(field_name).similar(
+                text, threshold, lambda row: owners[row].id)
+            return [row for _, row in matches[:limit]]
+        return self.__index_lookup(rows)
+
+    def _find_range(self, field_name: str, start: Any = None, end: Any = None) -> List[T]:
+        # Entities with start <= field < end (None is unbounded), ordered by the
+        # field then by ID, straight from its sorted index.
+        if field_name != 'id' and field_name not in self.sortable_fields:
+            raise InvalidFilterException(f'Invalid filter field: {field_name}')
+        FieldFilter.between(field_name, start, end).validate(fields_types(self.entity_class))
+        if field_name in self.__text_fields():
+            start, end = self.sort_key(start), self.sort_key(end)
+
+        def rows() -> List[int]:
+            index = self.__sorted_index(field_name)
+            return index.scan(*index.span(start, True, end, False))
+        return self.__index_lookup(rows)
+
+    def _find_prefix(self, field_name: str, prefix: str, limit: Optional[int] = None) -> List[T]:
+        # Entities whose text field starts with prefix (case-insensitively),
+        # ordered by the field then by ID: one bisect plus the rows returned.
+        if field_name not in self.sortable_fields:
+            raise InvalidFilterException(f'Invalid filter field: {field_name}')
+        folded = casefold_sort_key(prefix)
+        if self.sort_key is not casefold_sort_key:
+            # Another collation does not keep a prefix's keys contiguous.
+            matches = [
+                item for item in self._items
+                if casefold_sort_key(getattr(item, field_name) or '').startswith(folded)
+            ]
+            return self._apply_sort(matches, field_name)[:limit]
+
+        def rows() -> List[int]:
+            index = self.__sorted_index(field_name)
+            start, stop = index.prefix_span(folded)
+            return index.scan(start, stop if limit is None else min(stop, start + limit))
+        return self.__index_lookup(rows)
+
     def _apply_sort(
         self,
         items: List[T],
         sort_by: str | None,
         sort_dir: str | None = None
     ) -> List[T]:
-        if sort_by and sort_by in self.sortable_fields:
-            is_reverse = sort_dir == 'desc'
-            key = (lambda i: getattr(i, sort_by).lower() if isinstance(
-                getattr(i, sort_by), str) else getattr(i, sort_by))
-            return sorted(items, key=key, reverse=is_reverse)
-        return items
+        order = [
+            (field_name, direction) for field_name, direction in parse_sort(sort_by, sort_dir)
+            if field_name in self.sortable_fields
+        ]
+        if not order:
+            return items
+        rows = self.__rows_of(items)
+        if rows is None:
+            indexes = list(range(len(items)))
+            ties_reverse = order[-1][1] == 'desc'
+        else:
+            # The last field's sorted index holds the rows ordered by it then
+            # by ID: only the fields before it are left to sort.
+            field_name, direction = order.pop()
+            indexes = self.__index_order(rows, field_name, direction == 'desc')
+        columns = self.__sort_columns(items, rows, [field_name for field_name, _ in order])
+        # Stable sorts from the least significant key.
+        for keys, (_, direction) in reversed(list(zip(columns, order))):
+            is_reverse = direction == 'desc'
+            if None in keys:
+                keys = [nulls_last(key, is_reverse) for key in keys]
+            indexes.sort(key=keys.__getitem__, reverse=is_reverse)
+        if rows is None:
+            _order_ties(indexes, columns, lambda index: items[index].id, ties_reverse)
+        return list(map(items.__getitem__, indexes))
+
+    def _on_update(self, old: T, new: T, changed_fields: FrozenSet[str]) -> None:
+        # Hook for engines keeping secondary structures: only the structures
+        # covering changed_fields need to be touched.
+        ...
+
+    def _apply_facets(
+        self, items: List[T], facets_names: List[str]
+    ) -> Optional[Dict[str, Dict[Any, int]]]:
+        names = [name for name in facets_names if name in self.facet_fields]
+        if not names:
+            return None
+        if _same_items(items, self._items):
+            self.__sync_sort_columns()
+            return {name: _nonzero(self.__facet_counts(name)) for name in names}
+        return {
+            name: dict(Counter(map(self.facet_fields[name], items))) for name in names
+        }
 
     def _apply_pagination(self, items: List[T], page: int, per_page: int) -> List[T]:
         start = (page - 1) * per_page
         limit = start + per_page
         return items[slice(start, limit)]
+
+    def __positions(self, ids: List[str]) -> Dict[str, int]:
+        wanted = set(ids)
+        positions = {
+            item.id: index for index, item in enumerate(self._items) if item.id in wanted
+        }
+        for id_ in ids:
+            if id_ not in positions:
+                raise EntityNotFoundException(f'Entity not found using ID: {id_}')
+        return positions
+
+    def __replace(self, index: int, found: T, entity: T) -> None:
+        changed_fields = entity.changed_fields
+        _set_version(entity, found.version + 1)
+        stored = self.__persist(entity)
+        self.__release(found)
+        self._changes.record(stored.id, stored)
+        if entity.is_active:
+            self.__replace_sort_keys(index, stored)
+            self.__index_unique(stored)
+            self._items[index] = stored
+            self._on_update(found, stored, changed_fields)
+        else:
+            self.__empty_sort_row(index)
+            self.__unindex_unique(stored)
+            del self._items[index]
+            self._tombstones[entity.id] = stored
+
+    def __remove(self, index: int, found: T) -> None:
+        self.__empty_sort_row(index)
+        self.__unindex_unique(found)
+        del self._items[index]
+        found.deactivate()
+        _set_version(found, found.version + 1)
+        self._tombstones[found.id] = copy.copy(found)
+        self._changes.record(found.id, self._tombstones[found.id])
+
+    def __persist(self, entity: T) -> T:
+        entity.clear_changes()
+        return self.__intern(copy.copy(entity))
+
+    def __intern(self, entity: T) -> T:
+        if self.string_pool is not None:
+            for field_name in self.interned_fields:
+                object.__setattr__(
+                    entity, field_name, self.string_pool.intern(getattr(entity, field_name)))
+        return entity
+
+    def __release(self, entity: T) -> None:
+        if self.string_pool is not None:
+            for field_name in self.interned_fields:
+                self.string_pool.release(getattr(entity, field_name))
+
+    def __known_ids(self) -> set:
+        known_ids = {entity.id for entity in self._items}
+        known_ids.update(self._tombstones)
+        return known_ids
+
+    def __store(self, entity: T) -> None:
+        # Inactive entities live in the tombstone store, so _items only ever
+        # holds live entities and reads never have to filter them out.
+        self._changes.record(entity.id, entity)
+        if entity.is_active:
+            self.__append_sort_keys(entity)
+            self.__index_unique(entity)
+            self._items.append(entity)
+        else:
+            self._tombstones[entity.id] = entity
+
+    def __check_unique(self, entities: List[T], active_only: bool = True) -> None:
+        if not self.enforce_unique:
+            return
+        for field_name in self.unique_fields:
+            index = self.__unique_index(field_name)
+            batch = {}
+            for entity in entities:
+                if active_only and not entity.is_active:
+                    continue
+                value = getattr(entity, field_name)
+                key = casefold_sort_key(value)
+                if index.conflicts(entity.id, key) or \
+                        key is not None and batch.setdefault(key, entity.id) != entity.id:
+                    raise DuplicateValueException(field_name, value)
+
+    def __unique_index(self, field_name: str) -> UniqueIndex:
+        # Every live entity has an entry, so a size mismatch means _items was
+        # changed directly.
+        index = self._unique_indexes.get(field_name)
+        if index is None or len(index) != len(self._items):
+            index = self._unique_indexes[field_name] = UniqueIndex()
+            for item in self._items:
+                index.put(item.id, casefold_sort_key(getattr(item, field_name)))
+        return index
+
+    def __index_unique(self, entity: T) -> None:
+        for field_name, index in self._unique_indexes.items():
+            index.put(entity.id, casefold_sort_key(getattr(entity, field_name)))
+
+    def __unindex_unique(self, entity: T) -> None:
+        for index in self._unique_indexes.values():
+            index.discard(entity.id)
+
+    def __text_fields(self) -> List[str]:
+        types_ = fields_types(self.entity_class)
+        return [
+            field_name for field_name in self.sortable_fields
+            if str in types_.get(field_name, ())
+        ]
+
+    def __sort_keys(self, entity: T) -> Dict[str, Any]:
+        sort_key = self.sort_key
+        return {
+            field_name: sort_key(getattr(entity, field_name))
+            for field_name in self.__text_fields()
+        }
+
+    def __row_key(self, row: int, field_name: str) -> Any:
+        column = self._sort_columns.get(field_name)
+        return getattr(self._sort_owners[row], field_name) if column is None else column[row]
+
+    def __append_sort_keys(self, entity: T) -> None:
+        if len(self._sort_rows) != len(self._items):
+            return
+        row = len(self._sort_owners)
+        self._sort_owners.append(entity)
+        self._sort_rows[entity.id] = row
+        for field_name, key in self.__sort_keys(entity).items():
+            self._sort_columns.setdefault(field_name, []).append(key)
+        for field_name, index in self._sorted_indexes.items():
+            index.add(row, self.__row_key(row, field_name), entity.id)
+        for field_name, index in self._trigram_indexes.items():
+            index.add(row, getattr(entity, field_name))
+        for name, counts in self._facet_counts.items():
+            counts[self.facet_fields[name](entity)] += 1
+
+    def __replace_sort_keys(self, index: int, entity: T) -> None:
+        row = self.__sort_row(index)
+        if row is not None:
+            for field_name, trigram_index in self._trigram_indexes.items():
+                trigram_index.remove(row, getattr(self._sort_owners[row], field_name))
+                trigram_index.add(row, getattr(entity, field_name))
+            for name, counts in self._facet_counts.items():
+                counts[self.facet_fields[name](self._sort_owners[row])] -= 1
+                counts[self.facet_fields[name](entity)] += 1
+            old_keys = {
+                field_name: self.__row_key(row, field_name) for field_name in self._sorted_indexes
+            }
+            self._sort_owners[row] = entity
+            for field_name, key in self.__sort_keys(entity).items():
+                self._sort_columns[field_name][row] = key
+            for field_name, index in self._sorted_indexes.items():
+                key = self.__row_key(row, field_name)
+                if old_keys[field_name] != key:
+                    index.remove(row, old_keys[field_name], entity.id)
+                    index.add(row, key, entity.id)
+
+    def __empty_sort_row(self, index: int) -> None:
+        row = self.__sort_row(index)
+        if row is not None:
+            owner = self._sort_owners[row]
+            for name, counts in self._facet_counts.items():
+                counts[self.facet_fields[name](owner)] -= 1
+            for field_name, sorted_index in self._sorted_indexes.items():
+                sorted_index.remove(row, self.__row_key(row, field_name), owner.id)
+            for column in self._sort_columns.values():
+                column[row] = None
+            for field_name, index in self._trigram_indexes.items():
+                index.remove(row, getattr(owner, field_name))
+            self._sort_owners[row] = None
+            del self._sort_rows[owner.id]
+            bisect.insort(self._empty_rows, row)
+            if 2 * len(self._sort_rows) < len(self._sort_owners):
+                self.__renumber_sort_rows()
+
+    def __renumber_sort_rows(self) -> None:
+        # Drops the empty rows: O(n) once they outnumber the others, so O(1)
+        # per removal on average, and the indexes keep their order.
+        rows = self.__live_rows()
+        new_rows = [-1] * len(self._sort_owners)
+        for new_row, row in enumerate(rows):
+            new_rows[row] = new_row
+        self._sort_owners = list(map(self._sort_owners.__getitem__, rows))
+        self._sort_rows = {owner.id: row for row, owner in enumerate(self._sort_owners)}
+        self._empty_rows = []
+        for field_name, column in self._sort_columns.items():
+            self._sort_columns[field_name] = list(map(column.__getitem__, rows))
+        for index in self._sorted_indexes.values():
+            index.renumber(new_rows)
+        for index in self._trigram_indexes.values():
+            index.renumber(new_rows)
+
+    def __sort_row(self, index: int) -> Optional[int]:
+        # The row of _items[index]. When _items was changed without going
+        # through the repository: None, and the columns are dropped for the
+        # next full sort to rebuild them.
+        item = self._items[index]
+        row = self._sort_rows.get(item.id)
+        if row is not None and self._sort_owners[row] is item and \
+                len(self._sort_rows) == len(self._items):
+            return row
+        self._sort_owners = []
+        self._sort_rows = {}
+        self._empty_rows = []
+        self._sort_columns = {}
+        self._sorted_indexes = {}
+        self._trigram_indexes = {}
+        self._facet_counts = {}
+        return None
+
+    def __live_rows(self) -> Sequence[int]:
+        owners = self._sort_owners
+        if not self._empty_rows:
+            return range(len(owners))
+        return [row for row, owner in enumerate(owners) if owner is not None]
+
+    def __is_synced(self, items: List[T]) -> bool:
+        # Whether items are the owners in row order.
+        return len(items) == len(self._sort_rows) and all(map(
+            operator.is_, items, map(self._sort_owners.__getitem__, self.__live_rows())))
+
+    def __rows_of(self, items: List[T]) -> Optional[Sequence[int]]:
+        # The rows of items when they are all live entities in _items order
+        # (rebuilding the columns if _items was changed directly); None for
+        # any other list.
+        if not items or not _same_items(items, self._items):
+            return None
+        self.__sync_sort_columns()
+        return self.__live_rows()
+
+    def __sort_columns(
+        self, items: List[T], rows: Optional[Sequence[int]], fields_names: List[str]
+    ) -> List[List[Any]]:
+        if rows is None:
+            sort_key, text_fields = self.sort_key, self.__text_fields()
+            return [
+                [sort_key(getattr(item, field_name)) for item in items]
+                if field_name in text_fields else list(map(operator.attrgetter(field_name), items))
+                for field_name in fields_names
+            ]
+        columns = list(map(self.__column, fields_names))
+        if len(rows) == len(self._sort_owners):
+            return columns
+        return [list(map(column.__getitem__, rows)) for column in columns]
+
+    def __sync_sort_columns(self) -> None:
+        if self.__is_synced(self._items):
+            return
+        self._sort_owners = list(self._items)
+        self._sort_rows = {item.id: row for row, item in enumerate(self._items)}
+        self._empty_rows = []
+        self._sort_columns = {field_name: [] for field_name in self.__text_fields()}
+        self._sorted_indexes = {}
+        self._trigram_indexes = {}
+        self._facet_counts = {}
+        for item in self._items:
+            for field_name, key in self.__sort_keys(item).items():
+                self._sort_columns.setdefault(field_name, []).append(key)
+
+    def __sorted_index(self, field_name: str) -> SortedIndex:
+        if field_name not in self._sorted_indexes:
+            self._sorted_indexes[field_name] = SortedIndex.build(
+                self.__column(field_name), self.__column('id'))
+        return self._sorted_indexes[field_name]
+
+    def __column(self, field_name: str) -> List[Any]:
+        column = self._sort_columns.get(field_name)
+        if column is None:
+            column = [
+                None if owner is None else getattr(owner, field_name)
+                for owner in self._sort_owners
+            ]
+        return column
+
+    def __index_lookup(self, rows_of: Callable[[], List[int]]) -> List[T]:
+        if len(self._sort_rows) != len(self._items):
+            self.__sync_sort_columns()
+        rows = rows_of()
+        # Only the rows returned are checked against _items (a row's position
+        # is its number less the empty rows before it), keeping lookups
+        # O(log n + k); a mismatch means _items was changed directly.
+        items, owners, empty_rows = self._items, self._sort_owners, self._empty_rows
+        if not all(
+                items[row - bisect.bisect_left(empty_rows, row)] is owners[row] for row in rows):
+            self.__sync_sort_columns()
+            rows = rows_of()
+        return list(map(self._sort_owners.__getitem__, rows))
+
+    def __trigram_index(self, field_name: str) -> TrigramIndex:
+        if field_name not in self._trigram_indexes:
+            self._trigram_indexes[field_name] = TrigramIndex.build([
+                None if owner is None else getattr(owner, field_name)
+                for owner in self._sort_owners
+            ])
+        return self._trigram_indexes[field_name]
+
+    def __facet_counts(self, name: str) -> Counter:
+        if name not in self._facet_counts:
+            self._facet_counts[name] = Counter(map(self.facet_fields[name], self._items))
+        return self._facet_counts[name]
+
+    def __index_order(self, rows: Sequence[int], field_name: str, is_reverse: bool) -> List[int]:
+        # Positions of rows (every live row) by the field then by ID, nulls
+        # last, read off the field's sorted index, which leaves nulls out.
+        index_rows = self.__sorted_index(field_name).rows
+        nulls = []
+        if len(index_rows) < len(rows):
+            column, owners = self.__column(field_name), self._sort_owners
+            nulls = sorted(
+                (row for row in rows if column[row] is None), key=lambda row: owners[row].id)
+        if is_reverse:
+            index_rows, nulls = index_rows[::-1], nulls[::-1]
+        order = index_rows + nulls
+        if len(rows) == len(self._sort_owners):
+            return order
+        positions = [-1] * len(self._sort_owners)
+        for position, row in enumerate(rows):
+            positions[row] = position
+        return list(map(positions.__getitem__, order))
@@ -1,13 +1,21 @@
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 import random
-from typing import Optional, List
+import sys
+from typing import Any, Dict, Optional, List
 import unittest
+from unittest.mock import patch
 
 from .entities import GenericEntity
+from .exceptions import (
+    DuplicateValueException, EntityNotFoundException, EntityVersionConflictException,
+    InvalidFilterException
+)
+from .filters import FieldFilter
 from .repositories import (
     RepositoryInterface, T,
     SearchParams, SearchResult, Filter,
-    InMemoryRepository
+    InMemoryRepository, StringPool, nulls_last, parse_sort
 )
 
 
@@ -44,7 +52,8 @@ class SearchParamsUnitTests(unittest.TestCase):
             'per_page': Optional[int],
             'sort_by': Optional[str],
             'sort_dir': Optional[str],
-            'filter_': Optional[Filter]
+            'filter_': Optional[Filter],
+            'facets': Optional[str]
         })
 
     def test_props_default_value(self):
@@ -172,6 +181,63 @@ class SearchParamsUnitTests(unittest.TestCase):
                 sort_by='foo',
                 sort_dir=i['value']).sort_dir, i['expected'], msg=msg)
 
+    def test_multi_field_sort_props(self):
+        arrange = [
+            {'sort_by': 'name,created_at', 'sort_dir': 'DESC',
+             'expected': ('name,created_at', 'desc,asc')},
+            {'sort_by': ' name , ,created_at,', 'sort_dir': 'desc,fake,asc',
+             'expected': ('name,created_at', 'desc,asc')},
+            {'sort_by': ['name', 'created_at'], 'sort_dir': ['asc', 'desc'],
+             'expected': ('name,created_at', 'asc,desc')},
+            {'sort_by': ('name',), 'sort_dir': None, 'expected': ('name', 'asc')},
+            {'sort_by': ',', 'sort_dir': 'desc', 'expected': (None, None)},
+        ]
+        for i in arrange:
+            msg = f'Failed with data: {i}'
+            params = SearchParams(sort_by=i['sort_by'], sort_dir=i['sort_dir'])
+            self.assertEqual((params.sort_by, params.sort_dir), i['expected'], msg=msg)
+
+    def test_sort_order_prop(self):
+        self.assertEqual(SearchParams().sort_order, [])
+        self.assertEqual(SearchParams(sort_by='name').sort_order, [('name', 'asc')])
+        self.assertEqual(
+            SearchParams(sort_by='name,created_at', sort_dir='desc').sort_order,
+            [('name', 'desc'), ('created_at', 'asc')])
+
+    def test_parse_sort(self):
+        self.assertEqual(parse_sort(None), [])
+        self.assertEqual(parse_sort('foo', 'DESC'), [('foo', 'desc')])
+        self.assertEqual(
+            parse_sort(['foo', 'bar', 'baz'], 'desc,,fake'),
+            [('foo', 'desc'), ('bar', 'asc'), ('baz', 'asc')])
+
+    def test_nulls_last(self):
+        values = ['b', None, 'a', None]
+        self.assertEqual(sorted(values, key=nulls_last), ['a', 'b', None, None])
+        self.assertEqual(
+            sorted(values, key=lambda value: nulls_last(value, True), reverse=True),
+            ['b', 'a', None, None])
+
+    def test_facets_prop(self):
+        arrange = [
+            {'value': None, 'expected': (None, [])},
+            {'value': '', 'expected': (None, [])},
+            {'value': ' , ', 'expected': (None, [])},
+            {'value': 'is_active', 'expected': ('is_active', ['is_active'])},
+            {
+                'value': ' is_active, ,created_month ',
+                'expected': ('is_active,created_month', ['is_active', 'created_month'])
+            },
+            {
+                'value': ['is_active', 'created_month'],
+                'expected': ('is_active,created_month', ['is_active', 'created_month'])
+            },
+        ]
+        for i in arrange:
+            msg = f'Failed with data: {i}'
+            params = SearchParams(facets=i['value'])
+            self.assertEqual((params.facets, params.facets_names), i['expected'], msg=msg)
+
     def test_filter_prop(self):
         arrange = [
             {'value': None, 'expected': None},
@@ -191,6 +257,9 @@ class SearchParamsUnitTests(unittest.TestCase):
             msg = f'Failed with data: {i}'
             self.assertEqual(SearchParams(filter_=i['value']).filter_, i['expected'], msg=msg)
 
+        expression = FieldFilter('foo', 'eq', 'a') & FieldFilter('bar', 'gt', 1.0)
+        self.assertIs(SearchParams(filter_=expression).filter_, expression)
+
 
 class SearchResultUnitTests(unittest.TestCase):
 
@@ -203,7 +272,8 @@ class SearchResultUnitTests(unittest.TestCase):
             'per_page': int,
             'sort_by': Optional[str],
             'sort_dir': Optional[str],
-            'filter_': Optional[Filter]
+            'filter_': Optional[Filter],
+            'facets': Optional[Dict[str, Dict[Any, int]]]
         })
 
     def test_constructor(self):
@@ -226,7 +296,8 @@ class SearchResultUnitTests(unittest.TestCase):
             'last_page': 50,
             'sort_by': 'foo',
             'sort_dir': 'desc',
-            'filter': 'value'
+            'filter': 'value',
+            'facets': None
         })
 
     def test_constructor_with_default_values(self):
@@ -246,7 +317,8 @@ class SearchResultUnitTests(unittest.TestCase):
             'last_page': 50,
             'sort_by': None,
             'sort_dir': None,
-            'filter': None
+            'filter': None,
+            'facets': None
         })
 
     def test_last_page_when_per_page_is_greater_than_total(self):
@@ -277,8 +349,49 @@ class SearchResultUnitTests(unittest.TestCase):
         self.assertEqual(result.last_page, 10)
 
 
+class StringPoolUnitTests(unittest.TestCase):
+
+    def test_intern(self):
+        pool = StringPool()
+        first = ''.join(['foo', 'bar'])
+        second = ''.join(['foo', 'bar'])
+        self.assertIsNot(first, second)
+
+        self.assertIs(pool.intern(first), first)
+        self.assertIs(pool.intern(second), first)
+        self.assertIs(pool.intern(first), first)
+        self.assertIsNone(pool.intern(None))
+        self.assertEqual(
+            pool.stats(), {'size': 1, 'hits': 1, 'bytes_saved': sys.getsizeof(second)})
+        self.assertEqual(len(pool), 1)
+
+    def test_release(self):
+        pool = StringPool()
+        first, second = ''.join(['foo', 'bar']), ''.join(['foo', 'bar'])
+        pool.intern(first)
+        pool.intern(first)
+        pool.intern(second)
+        self.assertEqual(pool.bytes_saved, sys.getsizeof(second))
+
+        # Two references are left on one object: the dropped copy still counts.
+        pool.release(first)
+        self.assertEqual(pool.bytes_saved, sys.getsizeof(second))
+        pool.release(first)
+        self.assertEqual(pool.stats(), {'size': 1, 'hits': 1, 'bytes_saved': 0})
+        pool.release(first)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual((pool._values, pool._references, pool._copies), ({}, {}, {}))
+        pool.release(first)
+        pool.release(None)
+
+        third = ''.join(['foo', 'bar'])
+        self.assertIs(pool.intern(third), third)
+
+
 class InMemoryRepositoryStub(InMemoryRepository[EntityStub, str]):
 
+    entity_class = EntityStub
+
     sortable_fields = ['foo', 'bar']
 
     def _apply_filter(self, items: List[EntityStub], filter_: str | None) -> List[EntityStub]:
@@ -291,6 +404,26 @@ class InMemoryRepositoryStub(InMemoryRepository[EntityStub, str]):
         return items
 
 
+class InternedInMemoryRepositoryStub(InMemoryRepositoryStub):
+
+    interned_fields = ('foo',)
+
+
+class TrigramInMemoryRepositoryStub(InMemoryRepositoryStub):
+
+    trigram_fields = ('foo',)
+
+
+class FacetedInMemoryRepositoryStub(InMemoryRepositoryStub):
+
+    facet_fields = {'bar': lambda entity: entity.bar, 'initial': lambda entity: entity.foo[0]}
+
+
+class UniqueInMemoryRepositoryStub(InMemoryRepositoryStub):
+
+    unique_fields = ('foo',)
+
+
 class InMemoryRepositoryUnitTests(unittest.TestCase):
 
     repo: InMemoryRepository
@@ -307,6 +440,27 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
         self.repo.insert(entity)
         self.assertEqual(self.repo.find_all()[0], entity)
 
+    def test_insert_many_method(self):
+        entities = [EntityStub(foo=f'foo_{i}') for i in range(3)]
+        entities.append(EntityStub(is_active=False))
+        self.repo.insert_many(entities)
+        self.assertEqual(self.repo.find_all(), entities[:3])
+        self.assertEqual(self.repo._tombstones, {entities[3].id: entities[3]})
+        self.assertIsNot(self.repo._items[0], entities[0])
+
+    def test_already_exists_exception_in_insert_many(self):
+        entity = EntityStub()
+        self.repo.insert(entity)
+        arrange = [[EntityStub(), entity], [EntityStub()] * 2]
+        for entities in arrange:
+            with self.assertRaises(Exception) as assert_error:
+                self.repo.insert_many(entities)
+            self.assertEqual(
+                assert_error.exception.args[0],
+                f"Entity already exists using ID: {entities[1].id}"
+            )
+            self.assertEqual(self.repo.find_all(), [entity])
+
     def test_find_all_method(self):
         entity = EntityStub()
         inactive_entity = EntityStub(is_active=False)
@@ -336,6 +490,8 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
         self.assertEqual(found, entity)
         found = self.repo.find_by_id(entity.id)
         self.assertEqual(found, entity)
+        found = self.repo.find_by_id(entity.id.upper())
+        self.assertEqual(found, entity)
         # Change source entity state without updating repository
         found = self.repo.find_by_id(entity.id)
         entity.update(foo="other value")
@@ -373,6 +529,20 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
         found = self.repo.find_by_id(entity.id)
         self.assertEqual(entity, found)
 
+    def test_update_method_passes_changed_fields_to_hook(self):
+        entity = EntityStub()
+        self.repo.insert(entity)
+        self.assertEqual(entity.changed_fields, frozenset())
+        self.assertEqual(self.repo._items[0].changed_fields, frozenset())
+        old_entity = self.repo.find_by_id(entity.id)
+        entity.update(foo='other value')
+        with patch.object(self.repo, '_on_update') as mock_on_update:
+            self.repo.update(entity)
+        mock_on_update.assert_called_once_with(
+            old_entity, self.repo._items[0], frozenset({'foo', 'updated_at'}))
+        self.assertEqual(entity.changed_fields, frozenset())
+        self.assertEqual(self.repo._items[0].changed_fields, frozenset())
+
     def test_not_found_exception_in_update_entity(self):
         entity = EntityStub()
         with self.assertRaises(Exception) as assert_error:
@@ -390,6 +560,63 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
             f"Entity not found using ID: {inactive_entity.id}"
         )
 
+    def test_update_compares_and_bumps_version(self):
+        entity = EntityStub()
+        self.repo.insert(entity)
+        stale = self.repo.find_by_id(entity.id)
+        entity.update('first')
+        self.repo.update(entity)
+        self.assertEqual(entity.version, 1)
+        self.assertEqual(self.repo.find_by_id(entity.id).version, 1)
+
+        stale.update('second')
+        with self.assertRaises(EntityVersionConflictException) as assert_error:
+            self.repo.update(stale)
+        self.assertEqual(
+            assert_error.exception.args[0],
+            f'Entity using ID: {entity.id} is at version 1, not 0')
+        self.assertEqual(
+            (assert_error.exception.expected_version, assert_error.exception.current_version),
+            (0, 1))
+        self.assertEqual(self.repo.find_by_id(entity.id).foo, 'first')
+        with self.assertRaises(EntityVersionConflictException):
+            self.repo.update_many([entity, stale])
+        self.assertEqual(entity.version, 1)
+
+        self.repo.delete(entity.id)
+        self.assertEqual(self.repo._tombstones[entity.id].version, 2)
+        self.assertEqual(self.repo.restore(entity.id).version, 3)
+
+    def test_update_many_method(self):
+        entities = [EntityStub(foo=f'foo_{i}') for i in range(4)]
+        self.repo.insert_many(entities)
+        entities[0].update('updated_0')
+        entities[1].deactivate()
+        entities[3].update('updated_3')
+        with patch.object(self.repo, 'find_by_id') as mock_find_by_id:
+            self.repo.update_many([entities[3], entities[1], entities[0]])
+            mock_find_by_id.assert_not_called()
+        self.assertEqual(
+            [item.foo for item in self.repo.find_all()], ['updated_0', 'foo_2', 'updated_3'])
+        self.assertEqual(list(self.repo._tombstones), [entities[1].id])
+        self.assertEqual(entities[0].changed_fields, frozenset())
+
+        entities[2].update('updated_2')
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.update_many([entities[2], entities[1]])
+        self.assertEqual(self.repo.find_by_id(entities[2].id).foo, 'foo_2')
+
+    def test_delete_many_method(self):
+        entities = [EntityStub(foo=f'foo_{i}') for i in range(4)]
+        self.repo.insert_many(entities)
+        self.repo.delete_many(
+            [entities[2].id.upper(), entities[0].unique_entity_id, entities[2].id])
+        self.assertEqual(self.repo.find_all(), [entities[1], entities[3]])
+        self.assertFalse(self.repo._tombstones[entities[0].id].is_active)
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.delete_many([entities[1].id, entities[0].id])
+        self.assertEqual(self.repo.find_all(), [entities[1], entities[3]])
+
     def test_delete_method(self):
         entity = EntityStub()
         self.repo.insert(entity)
@@ -412,6 +639,285 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
             f"Entity not found using ID: {entity.unique_entity_id}"
         )
 
+    def test_delete_moves_entity_to_tombstones(self):
+        entity = EntityStub()
+        self.repo.insert(entity)
+        self.repo.delete(entity.id)
+        self.assertEqual(self.repo._items, [])
+        self.assertEqual(list(self.repo._tombstones), [entity.id])
+        self.assertFalse(self.repo._tombstones[entity.id].is_active)
+        with self.assertRaises(Exception) as assert_error:
+            self.repo.insert(entity)
+        self.assertEqual(
+            assert_error.exception.args[0],
+            f"Entity already exists using ID: {entity.id}"
+        )
+
+    def test_find_known_ids_and_versions(self):
+        live, deleted = EntityStub(), EntityStub()
+        self.repo.insert_many([live, deleted])
+        self.repo.delete(deleted.id)
+        ids = [live.id.upper(), deleted.unique_entity_id, EntityStub().id, 'fake id']
+        self.assertEqual(self.repo.find_known_ids(ids), {live.id, deleted.id})
+        self.assertEqual(self.repo.find_versions(ids), {live.id: live.version})
+
+    def test_insert_inactive_entity_goes_to_tombstones(self):
+        inactive_entity = EntityStub(is_active=False)
+        self.repo.insert(inactive_entity)
+        self.assertEqual(self.repo._items, [])
+        self.assertEqual(self.repo._tombstones[inactive_entity.id], inactive_entity)
+
+    def test_update_inactive_entity_moves_it_to_tombstones(self):
+        entity = EntityStub()
+        self.repo.insert(entity)
+        entity.deactivate()
+        self.repo.update(entity)
+        self.assertEqual(self.repo.find_all(), [])
+        self.assertEqual(self.repo._tombstones[entity.id], entity)
+
+    def test_load_method(self):
+        entities = [EntityStub(foo=f'foo_{i}') for i in range(3)]
+        entities.append(EntityStub(is_active=False))
+        self.repo.load(entity.to_dict() for entity in entities)
+        self.assertEqual(self.repo.find_all(), entities[:3])
+        self.assertEqual(self.repo._tombstones, {entities[3].id: entities[3]})
+        for entity in entities:
+            with self.assertRaises(Exception) as assert_error:
+                self.repo.load([entity.to_dict()])
+            self.assertEqual(
+                assert_error.exception.args[0],
+                f"Entity already exists using ID: {entity.id}"
+            )
+
+    def test_string_pool_dedups_interned_fields(self):
+        self.repo = InternedInMemoryRepositoryStub(string_pool=StringPool())
+        entities = [EntityStub(foo=''.join(['foo', '_shared'])) for _ in range(2)]
+        self.repo.insert(entities[0])
+        self.repo.load([entities[1].to_dict()])
+        self.assertIs(self.repo._items[0].foo, self.repo._items[1].foo)
+
+        entities[0].update(''.join(['foo', '_shared']))
+        self.repo.update(entities[0])
+        self.assertIs(self.repo._items[0].foo, self.repo._items[1].foo)
+        self.assertEqual(self.repo.string_pool.hits, 2)
+        # Two stored entities share one string: one copy saved, not one per write.
+        self.assertEqual(self.repo.string_pool.bytes_saved, sys.getsizeof('foo_shared'))
+
+        entities[0].update('foo_other')
+        self.repo.update(entities[0])
+        self.assertEqual(self.repo.string_pool.bytes_saved, 0)
+        self.repo.delete(entities[0].id)
+        self.assertEqual(len(self.repo.string_pool), 2)
+        with patch('core.domain.__seedwork.repositories.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime.now() + timedelta(days=2)
+            self.repo.compact(timedelta(days=1))
+        self.assertEqual(len(self.repo.string_pool), 1)
+
+        # Nothing is left once every holder is gone.
+        self.repo.delete(entities[1].id)
+        with patch('core.domain.__seedwork.repositories.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime.now() + timedelta(days=2)
+            self.repo.compact(timedelta(days=1))
+        pool = self.repo.string_pool
+        self.assertEqual((pool._values, pool._references, pool._copies), ({}, {}, {}))
+        self.assertEqual(pool.stats(), {'size': 0, 'hits': 2, 'bytes_saved': 0})
+
+    def test_sort_key_only_applies_to_text_fields(self):
+        items = [EntityStub(foo=foo, bar=bar) for foo, bar in [('b', 10.0), ('A', 2.0)]]
+        with patch.object(InMemoryRepositoryStub, 'sort_key', staticmethod(str)):
+            repo = InMemoryRepositoryStub()
+            repo.insert_many(items)
+            self.assertEqual(repo._apply_sort(repo.find_all(), 'bar'), [items[1], items[0]])
+            self.assertEqual(repo._apply_sort(repo._items, 'bar'), [items[1], items[0]])
+            self.assertEqual(repo._find_range('bar', 3.0), [items[0]])
+            self.assertEqual(repo._apply_sort(repo._items, 'foo'), [items[1], items[0]])
+
+    def test_sort_puts_nulls_last_in_either_direction(self):
+        repo = InMemoryRepositoryStub()
+        # IDs in list order, for the tie-break between nulls.
+        items = [
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', foo=foo, bar=bar)
+            for i, (foo, bar) in enumerate([('b', None), (None, 2.0), ('A', 1.0), (None, None)])
+        ]
+        repo.insert_many(items)
+        for sorted_items in [repo._items, repo.find_all()]:
+            self.assertEqual(
+                repo._apply_sort(sorted_items, 'foo'), [items[2], items[0], items[1], items[3]])
+            self.assertEqual(
+                repo._apply_sort(sorted_items, 'foo', 'desc'),
+                [items[0], items[2], items[3], items[1]])
+            self.assertEqual(
+                repo._apply_sort(sorted_items, 'bar,foo', 'desc,asc'),
+                [items[1], items[2], items[0], items[3]])
+
+    def test_sort_breaks_ties_by_id_in_the_last_direction(self):
+        items = [
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', foo=foo, bar=bar)
+            for i, (foo, bar) in enumerate(
+                [('a', 1.0), ('b', 1.0), ('a', 2.0), ('b', 2.0), ('a', 1.0), ('b', 1.0)])
+        ]
+        self.repo.insert_many(items[::-1])
+        arrange = [
+            (('foo',), [0, 2, 4, 1, 3, 5]),
+            (('foo', 'desc'), [5, 3, 1, 4, 2, 0]),
+            (('foo,bar', 'asc,desc'), [2, 4, 0, 3, 5, 1]),
+        ]
+        # Whole tables go through the sorted indexes, other lists are sorted.
+        for sorted_items in [self.repo.find_all(), self.repo.find_all()[::-1]]:
+            for args, expected in arrange:
+                self.assertEqual(
+                    self.repo._apply_sort(sorted_items, *args),
+                    [items[i] for i in expected], msg=f'Failed with: {args}')
+        self.assertEqual(
+            self.repo._apply_sort(self.repo.find_all()[1:], 'foo,bar', 'asc,desc'),
+            [items[i] for i in [2, 4, 0, 3, 1]])
+
+    def test_sort_keys_are_computed_at_write_time(self):
+        entity = EntityStub(foo='Straße', bar=2.0)
+        other = EntityStub(foo='b', bar=1.0)
+        self.repo.insert_many([entity, other])
+        self.assertEqual(self.repo._sort_owners, self.repo._items)
+        # Only the text fields: others sort by the values the owners hold.
+        self.assertEqual(self.repo._sort_columns, {'foo': ['strasse', 'b']})
+
+        entity.update('STRASSE 2')
+        self.repo.update(entity)
+        self.assertEqual(self.repo._sort_columns['foo'], ['strasse 2', 'b'])
+
+        self.repo.delete(entity.id)
+        self.assertEqual(self.repo._sort_columns, {'foo': [None, 'b']})
+        self.assertEqual(self.repo._sort_rows, {other.id: 1})
+
+        self.repo.restore(entity.id)
+        self.assertEqual(self.repo._sort_columns['foo'], [None, 'b', 'strasse 2'])
+        self.assertEqual(self.repo._sort_owners[1:], self.repo._items)
+
+        # Empty rows outnumbering the others are dropped.
+        self.repo.delete(other.id)
+        self.assertEqual(self.repo._sort_columns['foo'], ['strasse 2'])
+        self.assertEqual((self.repo._sort_rows, self.repo._empty_rows), ({entity.id: 0}, []))
+        self.assertIs(self.repo._sort_owners[0], self.repo._items[0])
+
+    def test_sorted_indexes_are_kept_in_step_with_deletes(self):
+        items = [EntityStub(foo=f'foo_{i}', bar=float(i)) for i in random.sample(range(10), 10)]
+        self.repo.insert_many(items)
+        by_bar = sorted(items, key=lambda item: item.bar)
+        self.assertEqual(self.repo._find_range('bar', 2.0, 6.0), by_bar[2:6])
+        index = self.repo._sorted_indexes['bar']
+
+        self.repo.delete(by_bar[3].id)
+        self.repo.delete_many([by_bar[0].id, by_bar[5].id])
+        by_bar[4].deactivate()
+        self.repo.update(by_bar[4])
+        self.assertIs(self.repo._sorted_indexes['bar'], index)
+        self.assertEqual(self.repo._find_range('bar', 2.0, 6.0), [by_bar[2]])
+        self.assertEqual(
+            self.repo.search(SearchParams(sort_by='bar')).items,
+            [by_bar[1], by_bar[2], *by_bar[6:]])
+
+        self.repo.delete_many([by_bar[6].id, by_bar[7].id])
+        self.assertIs(self.repo._sorted_indexes['bar'], index)
+        self.assertEqual(self.repo._empty_rows, [])
+        self.assertEqual(
+            self.repo._find_range('bar'), [by_bar[1], by_bar[2], by_bar[8], by_bar[9]])
+
+    def test_apply_sort_uses_precomputed_keys(self):
+        items = [EntityStub(foo=foo) for foo in ['b', 'A', 'c']]
+        self.repo.insert_many(items)
+        with patch.object(InMemoryRepositoryStub, 'sort_key', side_effect=AssertionError):
+            self.assertEqual(
+                [item.foo for item in self.repo._apply_sort(self.repo.find_all(), 'foo')],
+                ['A', 'b', 'c'])
+        self.assertEqual(
+            [item.foo for item in self.repo._apply_sort(self.repo.find_all()[1:], 'foo')],
+            ['A', 'c'])
+
+    def test_apply_sort_rebuilds_keys_when_items_changed_directly(self):
+        self.repo.insert_many([EntityStub(foo=foo) for foo in ['b', 'a']])
+        self.repo._items = [EntityStub(foo=foo) for foo in ['d', 'c']]
+        self.assertEqual(
+            [item.foo for item in self.repo._apply_sort(self.repo.find_all(), 'foo')],
+            ['c', 'd'])
+        self.assertEqual(self.repo._sort_columns['foo'], ['d', 'c'])
+
+        entity = EntityStub(foo='e')
+        self.repo._items.insert(0, entity)
+        self.repo.delete(entity.id)
+        self.assertEqual(self.repo._sort_columns, {})
+        self.assertEqual(
+            [item.foo for item in self.repo._apply_sort(self.repo.find_all(), 'foo', 'desc')],
+            ['d', 'c'])
+
+    def test_restore_method(self):
+        entity = EntityStub()
+        self.repo.insert(entity)
+        self.repo.delete(entity.id.upper())
+        restored = self.repo.restore(entity.id.upper())
+        self.assertTrue(restored.is_active)
+        self.assertEqual(self.repo.find_by_id(entity.id), restored)
+        self.assertEqual(self.repo._tombstones, {})
+        with self.assertRaises(Exception) as assert_error:
+            self.repo.restore(entity.id)
+        self.assertEqual(
+            assert_error.exception.args[0],
+            f"Entity not found using ID: {entity.id}"
+        )
+
+    def test_compact_method(self):
+        now = datetime.now()
+        expired = EntityStub(is_active=False, updated_at=now - timedelta(days=10))
+        expired_never_updated = EntityStub(
+            is_active=False, created_at=now - timedelta(days=10))
+        recent = EntityStub(is_active=False, updated_at=now - timedelta(hours=1))
+        for entity in [expired, expired_never_updated, recent, EntityStub()]:
+            self.repo.insert(entity)
+        self.assertEqual(self.repo.compact(timedelta(days=1)), 2)
+        self.assertEqual(list(self.repo._tombstones), [recent.id])
+        self.assertEqual(len(self.repo.find_all()), 1)
+        self.assertEqual(self.repo.compact(timedelta(days=1)), 0)
+
+    def test_enforce_unique(self):
+        self.repo.insert(EntityStub(foo='Movie'))
+        self.repo.insert(EntityStub(foo='movie'))
+        self.assertEqual(self.repo._unique_indexes, {})
+
+        repo = UniqueInMemoryRepositoryStub(enforce_unique=True)
+        entity = EntityStub(foo='Movie')
+        repo.insert(entity)
+        with self.assertRaises(DuplicateValueException) as assert_error:
+            repo.insert(EntityStub(foo='MOVIE'))
+        self.assertEqual(
+            assert_error.exception.args[0], 'Entity already exists using foo: MOVIE')
+        self.assertEqual(
+            (assert_error.exception.field_name, assert_error.exception.value), ('foo', 'MOVIE'))
+        with self.assertRaises(DuplicateValueException):
+            repo.insert_many([EntityStub(foo='Film'), EntityStub(foo='film')])
+        self.assertEqual(len(repo.find_all()), 1)
+        repo.insert(EntityStub(foo='movie', is_active=False))
+
+        other = EntityStub(foo='Film')
+        repo.insert(other)
+        other.update('MOVIE')
+        with self.assertRaises(DuplicateValueException):
+            repo.update(other)
+        entity.update('MOVIE')
+        repo.update(entity)
+        repo.delete(entity.id)
+        repo.update(other)
+        with self.assertRaises(DuplicateValueException):
+            repo.restore(entity.id)
+        self.assertIn(entity.id, repo._tombstones)
+        repo.delete(other.id)
+        repo.restore(entity.id)
+        self.assertEqual([item.foo for item in repo.find_all()], ['MOVIE'])
+
+    def test_unique_index_is_rebuilt_when_items_changed_directly(self):
+        repo = UniqueInMemoryRepositoryStub(enforce_unique=True)
+        repo.insert(EntityStub(foo='a'))
+        repo._items.append(EntityStub(foo='b'))
+        with self.assertRaises(DuplicateValueException):
+            repo.insert(EntityStub(foo='B'))
+
     def test_not_found_exception_in_delete_entity(self):
         with self.assertRaises(Exception) as assert_error:
             self.repo.delete('fake id')
@@ -504,9 +1010,11 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
     def test_search_when_has_inactive_items(self):
         items = [EntityStub(foo=f"foo_{i}", bar=float(i)) for i in range(3)]
         items.append(EntityStub(is_active=False))
-        self.repo._items = items
+        for item in items:
+            self.repo.insert(item)
         result = self.repo.search(SearchParams())
         self.assertEqual(result.items, items[:3])
+        self.assertEqual(result.total, 3)
 
     def test_search_applying_filter_and_pagination(self):
         items = self.repo._items = [
@@ -569,13 +1077,17 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
         )
 
     def test_search_applying_sort_and_pagination(self):
+        # Ties are broken by ID, given here in insertion order.
         items = self.repo._items = [
-            EntityStub(foo='foo', bar=5.0),
-            EntityStub(foo='bar', bar=10.0),
-            EntityStub(foo='FoO', bar=2.0),
-            EntityStub(foo='FOO', bar=3.0),
-            EntityStub(foo='BAR', bar=7.0),
-            EntityStub(foo='Foo', bar=1.0),
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', **data)
+            for i, data in enumerate([
+                {'foo': 'foo', 'bar': 5.0},
+                {'foo': 'bar', 'bar': 10.0},
+                {'foo': 'FoO', 'bar': 2.0},
+                {'foo': 'FOO', 'bar': 3.0},
+                {'foo': 'BAR', 'bar': 7.0},
+                {'foo': 'Foo', 'bar': 1.0},
+            ])
         ]
         self.assertEqual(
             self.repo.search(SearchParams(page=2, per_page=2, sort_by='foo')),
@@ -616,6 +1128,265 @@ class InMemoryRepositoryUnitTests(unittest.TestCase):
             )
         )
 
+    def test_search_applying_multi_field_sort(self):
+        items = self.repo._items = [
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', **data)
+            for i, data in enumerate([
+                {'foo': 'b', 'bar': 1.0},
+                {'foo': 'a', 'bar': 1.0},
+                {'foo': 'B', 'bar': 2.0},
+                {'foo': 'a', 'bar': 2.0},
+                {'foo': 'a', 'bar': 1.0},
+            ])
+        ]
+        arrange = [
+            {'sort_by': 'foo,bar', 'sort_dir': 'asc,asc', 'expected': [1, 4, 3, 0, 2]},
+            {'sort_by': 'foo,bar', 'sort_dir': 'asc,desc', 'expected': [3, 4, 1, 2, 0]},
+            {'sort_by': 'foo,bar', 'sort_dir': 'desc,asc', 'expected': [0, 2, 1, 4, 3]},
+            {'sort_by': 'foo,bar', 'sort_dir': 'desc,desc', 'expected': [2, 0, 3, 4, 1]},
+            {'sort_by': 'bar,fake', 'sort_dir': 'desc', 'expected': [3, 2, 4, 1, 0]},
+        ]
+        for i in arrange:
+            msg = f'Failed with data: {i}'
+            result = self.repo.search(SearchParams(
+                per_page=5, sort_by=i['sort_by'], sort_dir=i['sort_dir']))
+            self.assertEqual(result.items, [items[index] for index in i['expected']], msg=msg)
+
+        self.repo._items = []
+        self.repo.insert_many(items)
+        for i in arrange:
+            msg = f'Failed with data: {i}'
+            result = self.repo.search(SearchParams(
+                per_page=5, sort_by=i['sort_by'], sort_dir=i['sort_dir']))
+            self.assertEqual(result.items, [items[index] for index in i['expected']], msg=msg)
+
+    def test_search_applying_filter_expression(self):
+        items = [
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', **data)
+            for i, data in enumerate([
+                {'foo': 'Alpha', 'bar': 1.0},
+                {'foo': 'beta', 'bar': 2.0},
+                {'foo': 'ALPHABET', 'bar': 3.0},
+                {'foo': 'gamma', 'bar': 4.0},
+            ])
+        ]
+        self.repo.insert_many(items)
+        arrange = [
+            {'filter_': FieldFilter('foo', 'eq', 'alpha'), 'expected': [0]},
+            {'filter_': FieldFilter('foo', 'contains', 'ALPHA'), 'expected': [0, 2]},
+            {'filter_': FieldFilter('bar', 'gte', 2.0), 'expected': [1, 2, 3]},
+            {'filter_': FieldFilter.between('bar', 2.0, 4.0), 'expected': [1, 2]},
+            {'filter_': FieldFilter('id', 'eq', items[3].id), 'expected': [3]},
+            {
+                'filter_': FieldFilter('foo', 'contains', 'alpha') & FieldFilter('bar', 'lt', 3.0),
+                'expected': [0]
+            },
+            {
+                'filter_': FieldFilter('foo', 'eq', 'beta') | FieldFilter('bar', 'eq', 4.0),
+                'expected': [1, 3]
+            },
+        ]
+        for i in arrange:
+            msg = f'Failed with data: {i}'
+            result = self.repo.search(SearchParams(filter_=i['filter_'], sort_by='bar'))
+            self.assertEqual(result.items, [items[index] for index in i['expected']], msg=msg)
+            self.assertEqual(result.total, len(i['expected']), msg=msg)
+
+        self.repo.update(
+            EntityStub(unique_entity_id=items[1].unique_entity_id, foo='delta', bar=9.0))
+        self.repo.delete(items[0].id)
+        result = self.repo.search(SearchParams(filter_=FieldFilter('bar', 'gte', 3.0)))
+        self.assertEqual([item.foo for item in result.items], ['delta', 'ALPHABET', 'gamma'])
+
+        with self.assertRaises(InvalidFilterException) as assert_error:
+            self.repo.search(SearchParams(filter_=FieldFilter('fake', 'eq', 1)))
+        self.assertEqual(assert_error.exception.args[0], 'Invalid filter field: fake')
+        with self.assertRaises(InvalidFilterException):
+            self.repo.search(SearchParams(filter_=FieldFilter('created_at', 'gt', '2020-01-01')))
+
+    def test_plan_filter_uses_the_most_selective_index(self):
+        items = [EntityStub(foo=f'foo_{i % 10}', bar=float(i)) for i in range(100)]
+        self.repo.insert_many(items)
+
+        self.assertIsNone(self.repo._plan_filter(FieldFilter('foo', 'contains', 'foo')))
+        self.assertIsNone(self.repo._plan_filter(
+            FieldFilter('bar', 'eq', 1.0) | FieldFilter('bar', 'eq', 2.0)))
+        self.assertEqual(len(self.repo._plan_filter(FieldFilter('foo', 'eq', 'FOO_1'))), 10)
+        self.assertEqual(self.repo._plan_filter(
+            FieldFilter('foo', 'eq', 'foo_1') & FieldFilter('bar', 'lt', 20.0)
+            & FieldFilter('id', 'eq', items[11].id)
+        ), [11])
+
+        self.repo._items = list(reversed(items))
+        result = self.repo.search(SearchParams(filter_=FieldFilter('bar', 'lt', 2.0)))
+        self.assertEqual(result.items, [items[1], items[0]])
+
+    def test_changes_since(self):
+        version = self.repo._changes_since(0).version
+        first = EntityStub(foo='first')
+        second = EntityStub(foo='second')
+        self.repo.insert(first)
+        self.repo.insert_many([second, EntityStub(foo='deleted', is_active=False)])
+
+        changes = self.repo._changes_since(version)
+        self.assertEqual(
+            [change.entity.foo for change in changes.items], ['first', 'second', 'deleted'])
+        self.assertFalse(changes.has_more)
+        changes.items[0].entity.update('changed by the reader')
+        self.assertEqual(self.repo.find_by_id(first.id).foo, 'first')
+        self.assertEqual(self.repo._changes_since(version).items[0].entity.foo, 'first')
+
+        watermark = changes.version
+        first.update('first changed')
+        self.repo.update(first)
+        self.repo.delete(second.id)
+        changes = self.repo._changes_since(watermark)
+        self.assertEqual(
+            [(change.entity.foo, change.entity.is_active) for change in changes.items],
+            [('first changed', True), ('second', False)])
+        self.assertEqual(self.repo._changes_since(changes.version).items, [])
+
+        self.repo.restore(second.id)
+        page = self.repo._changes_since(watermark, limit=1)
+        self.assertEqual([change.entity.foo for change in page.items], ['first changed'])
+        self.assertTrue(page.has_more)
+        page = self.repo._changes_since(page.version, limit=1)
+        self.assertEqual(
+            [(change.entity.foo, change.entity.is_active) for change in page.items],
+            [('second', True)])
+        self.assertFalse(page.has_more)
+
+    def test_compact_forgets_purged_changes(self):
+        self.repo.insert(EntityStub(foo='live'))
+        version = self.repo._changes_since(0).version
+        entity = EntityStub(foo='deleted', is_active=False, created_at=datetime(2020, 1, 1))
+        self.repo.insert(entity)
+        after_insert = self.repo._changes_since(version).version
+        self.repo.compact(timedelta(days=1))
+        changes = self.repo._changes_since(version)
+        self.assertEqual(changes.items, [])
+        self.assertTrue(changes.resync)
+        self.assertFalse(self.repo._changes_since(after_insert).resync)
+        self.assertFalse(self.repo._changes_since(0).resync)
+
+    def test_find_prefix(self):
+        items = [
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', foo=foo)
+            for i, foo in enumerate(['Straße', 'strand', 'Stop', 'STRASSE', 'bar'])
+        ]
+        self.repo.insert_many(items[::-1])
+
+        self.assertEqual(self.repo._find_prefix('foo', 'STR'), [items[1], items[0], items[3]])
+        self.assertEqual(self.repo._find_prefix('foo', 'strass'), [items[0], items[3]])
+        self.assertEqual(self.repo._find_prefix('foo', 'st', limit=2), [items[2], items[1]])
+        self.assertEqual(self.repo._find_prefix('foo', 'x'), [])
+
+        with patch.object(InMemoryRepositoryStub, 'sort_key', staticmethod(str)):
+            self.assertEqual(
+                self.repo._find_prefix('foo', 'st', limit=2), [items[3], items[2]])
+
+        with self.assertRaises(InvalidFilterException):
+            self.repo._find_prefix('fake', 'st')
+
+    def test_search_with_facets(self):
+        self.repo = FacetedInMemoryRepositoryStub()
+        items = [EntityStub(foo=foo, bar=bar) for foo, bar in [
+            ('apple', 1.0), ('avocado', 2.0), ('banana', 1.0), ('blueberry', 1.0)
+        ]]
+        self.repo.insert_many(items)
+
+        result = self.repo.search(SearchParams(per_page=1, facets='bar,initial,fake'))
+        self.assertEqual(result.facets, {'bar': {1.0: 3, 2.0: 1}, 'initial': {'a': 2, 'b': 2}})
+        self.assertIsNone(self.repo.search(SearchParams()).facets)
+        self.assertIsNone(self.repo.search(SearchParams(facets='fake')).facets)
+
+        result = self.repo.search(SearchParams(filter_='b', facets='bar'))
+        self.assertEqual(result.facets, {'bar': {1.0: 2}})
+        result = self.repo.search(SearchParams(
+            filter_=FieldFilter('bar', 'eq', 1.0), facets='initial'))
+        self.assertEqual(result.facets, {'initial': {'a': 1, 'b': 2}})
+
+        # Counters are maintained on writes rather than recounted
+        counts = self.repo._facet_counts['bar']
+        self.repo.update(EntityStub(unique_entity_id=items[1].unique_entity_id, foo='cherry'))
+        self.repo.delete(items[0].id)
+        self.repo.insert(EntityStub(foo='apricot', bar=3.0))
+        result = self.repo.search(SearchParams(facets='bar,initial'))
+        self.assertIs(self.repo._facet_counts['bar'], counts)
+        self.assertEqual(result.facets, {
+            'bar': {1.0: 3, 3.0: 1}, 'initial': {'a': 1, 'b': 2, 'c': 1}
+        })
+
+        self.repo._items = self.repo._items[:2]
+        result = self.repo.search(SearchParams(facets='bar'))
+        self.assertEqual(result.facets, {'bar': {1.0: 2}})
+
+    def test_find_similar(self):
+        self.repo = TrigramInMemoryRepositoryStub()
+        items = [
+            EntityStub(unique_entity_id=f'00000000-0000-4000-8000-00000000000{i}', foo=foo)
+            for i, foo in enumerate(['Movie', 'Documentary', 'Movies', 'Music'], 1)
+        ]
+        self.repo.insert_many(items)
+
+        self.assertEqual(self.repo._find_similar('foo', 'movei', 0.3), [items[0], items[2]])
+        self.assertEqual(self.repo._find_similar('foo', 'movei', 0.3, limit=1), [items[0]])
+        self.assertEqual(self.repo._find_similar('foo', 'movie', 1.0), [items[0]])
+
+        index = self.repo._trigram_indexes['foo']
+        self.repo.update(EntityStub(unique_entity_id=items[3].unique_entity_id, foo='Movie'))
+        self.repo.delete(items[0].id)
+        self.repo.insert(EntityStub(
+            unique_entity_id='00000000-0000-4000-8000-000000000000', foo='MOVIE'))
+        # Equal scores come back by ID, not by row or insertion order
+        self.assertEqual(
+            [item.foo for item in self.repo._find_similar('foo', 'movie', 1.0)],
+            ['MOVIE', 'Movie'])
+        self.assertIs(self.repo._trigram_indexes['foo'], index)
+
+        # Renumbering the rows keeps the postings.
+        self.repo.delete_many([items[1].id, items[2].id])
+        self.assertEqual(self.repo._empty_rows, [])
+        self.assertIs(self.repo._trigram_indexes['foo'], index)
+        self.assertEqual(
+            [item.foo for item in self.repo._find_similar('foo', 'movei', 0.3)],
+            ['MOVIE', 'Movie'])
+
+        with self.assertRaises(InvalidFilterException):
+            self.repo._find_similar('bar', 'movie', 0.3)
+        with self.assertRaises(ValueError):
+            self.repo._find_similar('foo', 'movie', 0)
+
+    def test_plan_filter_uses_trigram_index_for_contains(self):
+        self.repo = TrigramInMemoryRepositoryStub()
+        items = [EntityStub(foo=f'item {i} {"special" if i % 25 == 0 else ""}') for i in range(100)]
+        self.repo.insert_many(items)
+
+        self.assertEqual(self.repo._plan_filter(FieldFilter('foo', 'contains', 'SPEC')), [
+            0, 25, 50, 75])
+        self.assertIsNone(self.repo._plan_filter(FieldFilter('foo', 'contains', 'sp')))
+        result = self.repo.search(SearchParams(
+            filter_=FieldFilter('foo', 'contains', 'special') & FieldFilter('bar', 'gte', 1.0)))
+        self.assertEqual(result.items, [items[0], items[25], items[50], items[75]])
+
+    def test_find_range(self):
+        items = [EntityStub(foo=f'foo_{i}', bar=float(i)) for i in random.sample(range(10), 10)]
+        self.repo.insert_many(items)
+        by_bar = sorted(items, key=lambda item: item.bar)
+
+        self.assertEqual(self.repo._find_range('bar', 2.0, 5.0), by_bar[2:5])
+        self.assertEqual(self.repo._find_range('bar', end=2.0), by_bar[:2])
+        self.assertEqual(self.repo._find_range('foo', 'FOO_8'), by_bar[8:])
+
+        entity = EntityStub(foo='foo_x', bar=3.5)
+        self.repo._items[self.repo._items.index(by_bar[3])] = entity
+        self.assertEqual(self.repo._find_range('bar', 2.0, 5.0), [by_bar[2], entity, by_bar[4]])
+
+        with self.assertRaises(InvalidFilterException):
+            self.repo._find_range('fake', 1)
+        with self.assertRaises(InvalidFilterException):
+            self.repo._find_range('bar', 'a')
+
     def test_search_when_combine_all_parameters_case_1(self):
         variation = random.sample(range(25), 25)
         items = [EntityStub(foo=f"foo_{i}", bar=float(i)) for i in variation]
@@ -673,6 +1444,12 @@ class InMemoryRepositoryUnitAsyncTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(async_repo._items), 1)
         self.assertEqual(async_repo._items[0], entity)
 
+    async def test_insert_many_async_method(self):
+        async_repo = InMemoryRepositoryStub()
+        entities = [EntityStub(), EntityStub()]
+        await async_repo.insert_many_async(entities)
+        self.assertEqual(async_repo._items, entities)
+
     async def test_update_async_method(self):
         async_repo = InMemoryRepositoryStub()
         entity = EntityStub()
@@ -683,6 +1460,16 @@ class InMemoryRepositoryUnitAsyncTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(async_repo._items), 1)
         self.assertEqual(async_repo._items[0], entity)
 
+    async def test_update_and_delete_many_async_methods(self):
+        async_repo = InMemoryRepositoryStub()
+        entities = [EntityStub(), EntityStub()]
+        await async_repo.insert_many_async(entities)
+        entities[0].update('bar')
+        await async_repo.update_many_async([entities[0]])
+        self.assertEqual(async_repo._items[0].foo, 'bar')
+        await async_repo.delete_many_async([entities[1].id])
+        self.assertEqual(async_repo._items, [entities[0]])
+
     async def test_delete_async_method(self):
         async_repo = InMemoryRepositoryStub()
         entity = EntityStub()
@@ -690,8 +1477,8 @@ class InMemoryRepositoryUnitAsyncTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(async_repo._items), 1)
         self.assertTrue(async_repo._items[0].is_active)
         await async_repo.delete_async(entity.id)
-        self.assertEqual(len(async_repo._items), 1)
-        self.assertFalse(async_repo._items[0].is_active)
+        self.assertEqual(len(async_repo._items), 0)
+        self.assertFalse(async_repo._tombstones[entity.id].is_active)
 
     async def test_find_by_id_async_method(self):
         async_repo = InMemoryRepositoryStub()
@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+from .entities import GenericEntity
+from .exceptions import EntityAlreadyExistsException, EntityNotFoundException
+from .repositories import RepositoryInterface
+from .value_objects import UniqueEntityId, canonical_id
+
+T = TypeVar('T', bound=GenericEntity)
+
+
+@dataclass(slots=True)
+class UnitOfWork(Generic[T]):
+
+    # Identity map and pending changes for one operation on one repository:
+    # an entity is loaded (and copied) at most once, every get() of it returns
+    # the same object, and commit() writes all changes in one batch per kind:
+    # inserts, then updates, then deletes. Loaded entities are written only if
+    # they have changed fields.
+    #
+    # Each batch is all-or-nothing in the repositories of this package, but
+    # the commit is not: when a batch fails, the ones before it stay written
+    # and commit() raises with the failed and later changes still pending, to
+    # be committed again (e.g. after a version conflict is resolved) or rolled
+    # back.
+    #
+    #     with UnitOfWork(repo) as uow:
+    #         category = uow.get(id_)
+    #         category.update(name, description)
+    #
+    # Leaving the block commits, or rolls back when it raised.
+
+    repo: RepositoryInterface
+    _identity_map: Dict[str, T] = field(default_factory=lambda: {})
+    _new: Dict[str, T] = field(default_factory=lambda: {})
+    _removed: Dict[str, None] = field(default_factory=lambda: {})
+
+    def __enter__(self) -> 'UnitOfWork[T]':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    async def __aenter__(self) -> 'UnitOfWork[T]':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            await self.commit_async()
+        else:
+            self.rollback()
+
+    def get(self, id_: str | UniqueEntityId) -> T:
+        entity = self.__lookup(canonical_id(id_))
+        if entity is None:
+            entity = self.repo.find_by_id(id_)
+            self._identity_map[entity.id] = entity
+        return entity
+
+    async def get_async(self, id_: str | UniqueEntityId) -> T:
+        entity = self.__lookup(canonical_id(id_))
+        if entity is None:
+            entity = await self.repo.find_by_id_async(id_)
+            self._identity_map.setdefault(entity.id, entity)
+            entity = self._identity_map[entity.id]
+        return entity
+
+    def add(self, entity: T) -> None:
+        if entity.id in self._identity_map:
+            raise EntityAlreadyExistsException(
+                f'Entity already exists using ID: {entity.id}')
+        self._identity_map[entity.id] = entity
+        self._new[entity.id] = entity
+
+    def remove(self, id_: str | UniqueEntityId) -> None:
+        entity = self.get(id_)
+        del self._identity_map[entity.id]
+        if self._new.pop(entity.id, None) is None:
+            self._removed[entity.id] = None
+
+    def commit(self) -> None:
+        # A written entity has no changed fields left, so only the new and
+        # removed ones need dropping from the pending changes.
+        new, dirty, removed = self.__pending()
+        if new:
+            self.repo.insert_many(new)
+            self._new = {}
+        if dirty:
+            self.repo.update_many(dirty)
+        if removed:
+            self.repo.delete_many(removed)
+            self._removed = {}
+
+    async def commit_async(self) -> None:
+        new, dirty, removed = self.__pending()
+        if new:
+            await self.repo.insert_many_async(new)
+            self._new = {}
+        if dirty:
+            await self.repo.update_many_async(dirty)
+        if removed:
+            await self.repo.delete_many_async(removed)
+            self._removed = {}
+
+    def rollback(self) -> None:
+        # Loaded entities may hold uncommitted changes, so they are dropped too.
+        self._identity_map = {}
+        self._new = {}
+        self._removed = {}
+
+    def __lookup(self, id_: str) -> Optional[T]:
+        if id_ in self._removed:
+            raise EntityNotFoundException(f'Entity not found using ID: {id_}')
+        return self._identity_map.get(id_)
+
+    def __pending(self) -> Tuple[List[T], List[T], List[str]]:
+        dirty = [
+            entity for id_, entity in self._identity_map.items()
+            if id_ not in self._new and entity.changed_fields
+        ]
+        return list(self._new.values()), dirty, list(self._removed)
@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from typing import List
+import unittest
+from unittest.mock import patch
+
+from .entities import GenericEntity
+from .exceptions import (
+    EntityAlreadyExistsException, EntityNotFoundException, EntityVersionConflictException
+)
+from .repositories import InMemoryRepository
+from .unit_of_work import UnitOfWork
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class EntityStub(GenericEntity):
+    foo: str = "value"
+
+    def update(self, foo: str) -> None:
+        self._set_attr('foo', foo)
+
+
+class InMemoryRepositoryStub(InMemoryRepository[EntityStub, str]):
+
+    entity_class = EntityStub
+
+    sortable_fields = ['foo']
+
+    def _apply_filter(self, items: List[EntityStub], filter_: str | None) -> List[EntityStub]:
+        return items
+
+
+class UnitOfWorkUnitTests(unittest.TestCase):
+
+    repo: InMemoryRepositoryStub
+
+    def setUp(self) -> None:
+        self.repo = InMemoryRepositoryStub()
+        self.entities = [EntityStub(foo=f'foo_{i}') for i in range(3)]
+        self.repo.insert_many(self.entities)
+
+    def test_get_uses_the_identity_map(self):
+        uow = UnitOfWork(self.repo)
+        with patch.object(self.repo, 'find_by_id', wraps=self.repo.find_by_id) as mock_find_by_id:
+            entity = uow.get(self.entities[0].id)
+            self.assertIs(uow.get(self.entities[0].unique_entity_id), entity)
+            self.assertIs(uow.get(self.entities[0].id.upper()), entity)
+            mock_find_by_id.assert_called_once()
+        self.assertEqual(entity, self.entities[0])
+        self.assertIsNot(entity, self.repo._items[0])
+        with self.assertRaises(EntityNotFoundException):
+            uow.get('fake id')
+
+    def test_commit_writes_changes_in_one_batch_per_kind(self):
+        new = EntityStub(foo='new')
+        with patch.object(self.repo, 'update_many', wraps=self.repo.update_many) as mock_update, \
+                patch.object(self.repo, 'update') as mock_update_one:
+            with UnitOfWork(self.repo) as uow:
+                first = uow.get(self.entities[0].id)
+                first.update('first')
+                uow.get(self.entities[1].id)
+                third = uow.get(self.entities[2].id)
+                third.update('third')
+                uow.add(new)
+                uow.remove(self.entities[1].id)
+                with self.assertRaises(EntityNotFoundException):
+                    uow.get(self.entities[1].id)
+                with self.assertRaises(EntityAlreadyExistsException):
+                    uow.add(new)
+                self.assertEqual(self.repo.find_by_id(first.id).foo, 'foo_0')
+            mock_update.assert_called_once_with([first, third])
+            mock_update_one.assert_not_called()
+        self.assertEqual(
+            [item.foo for item in self.repo.find_all()], ['first', 'third', 'new'])
+        self.assertIn(self.entities[1].id, self.repo._tombstones)
+
+        with patch.object(self.repo, 'update_many') as mock_update:
+            uow.commit()
+            mock_update.assert_not_called()
+
+    def test_concurrent_units_of_work_conflict(self):
+        first, second = UnitOfWork(self.repo), UnitOfWork(self.repo)
+        first.get(self.entities[0].id).update('first')
+        second.get(self.entities[0].id).update('second')
+        first.commit()
+        with self.assertRaises(EntityVersionConflictException):
+            second.commit()
+        second.rollback()
+        second.get(self.entities[0].id).update('second')
+        second.commit()
+        self.assertEqual(self.repo.find_by_id(self.entities[0].id).foo, 'second')
+
+    def test_failed_commit_keeps_the_unwritten_changes(self):
+        new = EntityStub(foo='new')
+        stale = UnitOfWork(self.repo)
+        stale.get(self.entities[0].id).update('stale')
+        stale.add(new)
+        stale.remove(self.entities[1].id)
+        with UnitOfWork(self.repo) as uow:
+            uow.get(self.entities[0].id).update('first')
+
+        for _ in range(2):
+            with self.assertRaises(EntityVersionConflictException):
+                stale.commit()
+            self.assertEqual(
+                [item.foo for item in self.repo.find_all()], ['first', 'foo_1', 'foo_2', 'new'])
+        stale.rollback()
+        stale.remove(self.entities[1].id)
+        stale.commit()
+        self.assertEqual(
+            [item.foo for item in self.repo.find_all()], ['first', 'foo_2', 'new'])
+
+    def test_add_then_remove_writes_nothing(self):
+        new = EntityStub(foo='new')
+        with UnitOfWork(self.repo) as uow:
+            uow.add(new)
+            self.assertIs(uow.get(new.id), new)
+            uow.remove(new.id)
+        self.assertEqual(self.repo.find_all(), self.entities)
+
+    def test_rollback_when_the_block_raises(self):
+        with self.assertRaises(ValueError):
+            with UnitOfWork(self.repo) as uow:
+                uow.get(self.entities[0].id).update('changed')
+                uow.add(EntityStub())
+                raise ValueError()
+        self.assertEqual(self.repo.find_all(), self.entities)
+        self.assertEqual(uow._identity_map, {})
+
+
+class UnitOfWorkUnitAsyncTests(unittest.IsolatedAsyncioTestCase):
+
+    async def test_async_methods(self):
+        repo = InMemoryRepositoryStub()
+        entities = [EntityStub(foo=f'foo_{i}') for i in range(2)]
+        await repo.insert_many_async(entities)
+        async with UnitOfWork(repo) as uow:
+            entity = await uow.get_async(entities[0].id)
+            self.assertIs(await uow.get_async(entities[0].id), entity)
+            entity.update('updated')
+            uow.remove(entities[1].id)
+        self.assertEqual([item.foo for item in await repo.find_all_async()], ['updated'])
@@ -1,11 +1,20 @@
 from abc import ABC
 import abc
 from dataclasses import dataclass
-from typing import Any, Dict, Generic, List, TypeVar
-
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+from django.conf import settings
+from django.core.validators import (
+    MaxLengthValidator, MinLengthValidator, ProhibitNullCharactersValidator
+)
+from django.utils import timezone
+from rest_framework.fields import empty
 from rest_framework.serializers import Serializer
 from rest_framework.serializers import CharField
 from rest_framework.serializers import BooleanField
+from rest_framework.serializers import DateTimeField
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
 
 
 FieldsErrors = Dict[str, List[str]]
@@ -52,3 +61,145 @@ class DRFStrictBooleanField(BooleanField):
             return data if isinstance(data, bool) \
                 else self.fail('invalid', input=data)
         return super().to_internal_value(data)
+
+
+FieldCheck = Callable[[Any], bool]
+# Turns a value its check accepted into the one the serializer field returns.
+FieldConvert = Callable[[Any], Any]
+FieldPlan = List[Tuple[str, bool, FieldCheck, Optional[FieldConvert]]]
+
+
+class DRFCompiledFieldsValidator(DRFFieldsValidator[T], ABC):
+
+    # Validates data against the rules serializer without instantiating it:
+    # its fields are compiled once per rules class into plain checks. Data
+    # passing every check is the validated data as is; anything else goes
+    # through the serializer, so errors are DRF's own.
+
+    rules: Type[Serializer]
+
+    __plans: Dict[Type[Serializer], Optional[FieldPlan]] = {}
+
+    def validate(self, data: Any) -> bool:
+        return self.__validate(data, partial=False)
+
+    def validate_partial(self, data: Any) -> bool:
+        # Only the fields present in data are validated (DRF partial semantics).
+        return self.__validate(data, partial=True)
+
+    def __validate(self, data: Any, partial: bool) -> bool:
+        validated_data = self.__fast_validate(data, partial)
+        if validated_data is None:
+            return super().validate(
+                self.rules(data=data if data is not None else {}, partial=partial))
+        self.validated_data = validated_data
+        return True
+
+    def __fast_validate(self, data: Any, partial: bool) -> Optional[dict]:
+        plan = self.__get_plan()
+        if plan is None or type(data) is not dict:
+            return None
+        validated_data = {}
+        for field_name, required, check, convert in plan:
+            if field_name not in data:
+                if required and not partial:
+                    return None
+                continue
+            value = data[field_name]
+            if not check(value):
+                return None
+            validated_data[field_name] = value if convert is None else convert(value)
+        return validated_data
+
+    @classmethod
+    def __get_plan(cls) -> Optional[FieldPlan]:
+        if cls.rules not in cls.__plans:
+            cls.__plans[cls.rules] = _compile_rules(cls.rules)
+        return cls.__plans[cls.rules]
+
+
+def _compile_rules(rules: Type[Serializer]) -> Optional[FieldPlan]:
+    if rules.validate is not Serializer.validate:
+        return None
+    plan = []
+    for field_name, field in rules().fields.items():
+        if field.read_only:
+            continue
+        check = _compile_field(field)
+        if check is None or field.source != field_name or \
+                field.default is not empty or hasattr(rules, f'validate_{field_name}'):
+            return None
+        convert = _enforce_timezone if isinstance(field, DateTimeField) else None
+        plan.append((field_name, field.required, check, convert))
+    return plan
+
+
+def _compile_field(field: Any) -> Optional[FieldCheck]:
+    if isinstance(field, CharField):
+        return _compile_char_field(field)
+    if isinstance(field, BooleanField) and not field.validators:
+        return lambda value: value is True or value is False
+    if isinstance(field, DateTimeField) and not field.validators \
+            and not hasattr(field, 'timezone'):
+        return _compile_datetime_field(field)
+    return None
+
+
+def _compile_char_field(field: CharField) -> Optional[FieldCheck]:
+    known_validators = (
+        MaxLengthValidator, MinLengthValidator,
+        ProhibitNullCharactersValidator, ProhibitSurrogateCharactersValidator
+    )
+    if not all(isinstance(validator, known_validators) for validator in field.validators):
+        return None
+    allow_null, allow_blank = field.allow_null, field.allow_blank
+    min_length = field.min_length or 0
+    max_length = field.max_length if field.max_length is not None else float('inf')
+
+    def check(value: Any) -> bool:
+        if value is None:
+            return allow_null
+        if type(value) is not str or '\x00' in value:
+            return False
+        if value == '':
+            return allow_blank
+        if value.strip() != value:
+            return False
+        if not value.isascii():
+            try:
+                value.encode('utf-8')
+            except UnicodeEncodeError:
+                return False
+        return min_length <= len(value) <= max_length
+    return check
+
+
+def _compile_datetime_field(field: DateTimeField) -> FieldCheck:
+    # Settings are read on every call, since USE_TZ and the current time zone
+    # may change after the plan is compiled (e.g. override_settings).
+    allow_null = field.allow_null
+
+    def check(value: Any) -> bool:
+        if value is None:
+            return allow_null
+        if not isinstance(value, datetime):
+            return False
+        if not settings.USE_TZ:
+            # An aware value is made naive by the field: left to it.
+            return not timezone.is_aware(value)
+        if timezone.is_aware(value):
+            # Away from the limits, converting to the current zone cannot overflow.
+            return datetime.min.year < value.year < datetime.max.year
+        # A pytz zone may reject a nonexistent or ambiguous local time.
+        return not hasattr(timezone.get_current_timezone(), 'localize')
+    return check
+
+
+def _enforce_timezone(value: Optional[datetime]) -> Optional[datetime]:
+    # What DateTimeField.enforce_timezone returns for a value check() accepted.
+    if value is None or not settings.USE_TZ:
+        return value
+    current = timezone.get_current_timezone()
+    if timezone.is_aware(value):
+        return value.astimezone(current)
+    return timezone.make_aware(value, current)
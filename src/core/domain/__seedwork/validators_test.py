@@ -6,7 +6,7 @@ from rest_framework.serializers import Serializer
 from rest_framework import serializers
 from django.conf import settings
 
-from .validators import FieldsValidatorInterface, DRFFieldsValidator
+from .validators import FieldsValidatorInterface, DRFFieldsValidator, DRFCompiledFieldsValidator
 from .validators import DRFStrictCharField, DRFStrictBooleanField
 
 
@@ -255,3 +255,70 @@ class DRFStrictBooleanFieldUnitTests(unittest.TestCase):
         self.assertTrue(serializer.is_valid())
         self.assertEqual(serializer.validated_data, test_data)
         self.assertEqual(serializer.errors, {})
+
+
+class CompiledSerializerStub(serializers.Serializer):
+    foo = DRFStrictCharField(min_length=2, max_length=5)
+    bar = DRFStrictBooleanField(required=False)
+
+
+class CompiledValidatorStub(DRFCompiledFieldsValidator):
+    rules = CompiledSerializerStub
+
+
+class UnsupportedSerializerStub(serializers.Serializer):
+    foo = serializers.CharField()
+    bar = serializers.IntegerField()
+
+
+class UnsupportedCompiledValidatorStub(DRFCompiledFieldsValidator):
+    rules = UnsupportedSerializerStub
+
+
+class FieldValidationSerializerStub(serializers.Serializer):
+    foo = serializers.CharField()
+
+    def validate_foo(self, value):
+        return value.upper()
+
+
+class FieldValidationCompiledValidatorStub(DRFCompiledFieldsValidator):
+    rules = FieldValidationSerializerStub
+
+
+class DRFCompiledFieldsValidatorIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+
+    def test_validation_without_fields_errors(self):
+        validator = CompiledValidatorStub()
+        with patch.object(CompiledSerializerStub, 'is_valid') as mock_is_valid:
+            self.assertTrue(validator.validate({'foo': 'abc', 'bar': True, 'other': 1}))
+            mock_is_valid.assert_not_called()
+        self.assertIsNone(validator.fields_errors)
+        self.assertEqual(validator.validated_data, {'foo': 'abc', 'bar': True})
+
+    def test_validation_with_fields_errors_falls_back_to_serializer(self):
+        validator = CompiledValidatorStub()
+        self.assertFalse(validator.validate({'foo': 'a', 'bar': 1}))
+        self.assertEqual(validator.fields_errors, {
+            'foo': ['Ensure this field has at least 2 characters.'],
+            'bar': ['Must be a valid boolean.']
+        })
+
+    def test_unsupported_rules_always_use_serializer(self):
+        arrange = [
+            {'validator': UnsupportedCompiledValidatorStub(),
+             'data': {'foo': 'value', 'bar': '1'},
+             'expected': {'foo': 'value', 'bar': 1}},
+            {'validator': FieldValidationCompiledValidatorStub(),
+             'data': {'foo': 'value'},
+             'expected': {'foo': 'VALUE'}},
+        ]
+        for i in arrange:
+            msg = f'Failed with data: {i}'
+            self.assertTrue(i['validator'].validate(i['data']), msg=msg)
+            self.assertEqual(i['validator'].validated_data, i['expected'], msg=msg)
@@ -1,6 +1,12 @@
 from abc import ABC
 from dataclasses import dataclass, field, fields
+import functools
 import json
+import re
+import secrets
+import threading
+import time
+from typing import Any, Callable, ClassVar, Dict, Optional, Tuple
 import uuid
 
 from .exceptions import InvalidUuidException
@@ -10,9 +16,10 @@ from .exceptions import InvalidUuidException
 class GenericValueObject(ABC):
 
     def __str__(self) -> str:
+        return self.__render()
 
-        class_fields = fields(self)
-        fields_names = [field.name for field in class_fields]
+    def __render(self) -> str:
+        fields_names = _value_fields_names(self.__class__)
 
         if len(fields_names) == 1:
             return str(getattr(self, fields_names[0]))
@@ -22,18 +29,146 @@ class GenericValueObject(ABC):
             })
 
 
+@dataclass(frozen=True, slots=True)
+class CachedStrValueObject(GenericValueObject):
+
+    # For value objects whose string is expensive to render (several fields
+    # dumped as JSON); single-field ones render cheaply and skip the slot.
+    __str_cache: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False, hash=False)
+
+    def __str__(self) -> str:
+        if self.__str_cache is None:
+            object.__setattr__(
+                self, '_CachedStrValueObject__str_cache', GenericValueObject.__str__(self))
+        return self.__str_cache
+
+
+@functools.cache
+def _value_fields_names(cls: type) -> Tuple[str, ...]:
+    return tuple(field_.name for field_ in fields(cls) if field_.compare)
+
+
 @dataclass(frozen=True, slots=True)
 class UniqueEntityId(GenericValueObject):
 
-    id_: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id_: str = field(default_factory=lambda: str(UniqueEntityId.default_generator()))
+
+    # Parsed from id_ on first use of int_/bytes_ (compact repositories).
+    __int: Optional[int] = field(
+        default=None, init=False, repr=False, compare=False, hash=False)
+
+    # Opt in to time-ordered IDs with: UniqueEntityId.default_generator = uuid7
+    default_generator: ClassVar[Callable[[], uuid.UUID]] = uuid.uuid4
+
+    __interned: ClassVar[Dict[str, 'UniqueEntityId']] = {}
 
     def __post_init__(self):
-        parsed_id = str(self.id_) if isinstance(self.id_, uuid.UUID) else self.id_
-        object.__setattr__(self, 'id_', parsed_id)
-        self.__validate()
+        object.__setattr__(self, 'id_', self.__validate())
+
+    def __str__(self) -> str:
+        return self.id_
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.id_ == other.id_
+
+    def __hash__(self) -> int:
+        return hash(self.id_)
+
+    @property
+    def int_(self) -> int:
+        if self.__int is None:
+            object.__setattr__(self, '_UniqueEntityId__int', int(self.id_.replace('-', ''), 16))
+        return self.__int
+
+    @property
+    def bytes_(self) -> bytes:
+        return self.int_.to_bytes(16, 'big')
 
-    def __validate(self):
+    @classmethod
+    def time_ordered(cls) -> 'UniqueEntityId':
+        return cls(uuid7())
+
+    @classmethod
+    def from_bytes(cls, value: bytes) -> 'UniqueEntityId':
+        unique_entity_id = cls.rehydrate(uuid.UUID(bytes=value))
+        object.__setattr__(unique_entity_id, '_UniqueEntityId__int', int.from_bytes(value, 'big'))
+        return unique_entity_id
+
+    @classmethod
+    def intern(cls, id_: 'str | uuid.UUID | UniqueEntityId') -> 'UniqueEntityId':
+        # Opt-in: equal IDs share one instance (and one canonical string), so
+        # long-lived catalogues keep a single copy and compare by identity first.
+        unique_entity_id = id_ if isinstance(id_, cls) else cls(id_)
+        return cls.__interned.setdefault(unique_entity_id.id_, unique_entity_id)
+
+    @classmethod
+    def clear_interned(cls) -> None:
+        cls.__interned.clear()
+
+    @classmethod
+    def rehydrate(cls, id_: str) -> 'UniqueEntityId':
+        unique_entity_id = object.__new__(cls)
+        object.__setattr__(unique_entity_id, 'id_', _canonical_uuid(id_))
+        object.__setattr__(unique_entity_id, '_UniqueEntityId__int', None)
+        return unique_entity_id
+
+    def __validate(self) -> str:
         try:
-            uuid.UUID(self.id_)
-        except ValueError as ex:
+            return _canonical_uuid(self.id_)
+        except (ValueError, TypeError, AttributeError) as ex:
             raise InvalidUuidException() from ex
+
+
+_CANONICAL_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def _canonical_uuid(value: 'str | uuid.UUID') -> str:
+    # Already-canonical strings (what repositories store and clients echo
+    # back) are kept as given instead of parsed; no cache to thrash.
+    if value.__class__ is str and _CANONICAL_UUID.fullmatch(value):
+        return value
+    return str(value if isinstance(value, uuid.UUID) else uuid.UUID(value))
+
+
+def canonical_id(id_: 'str | uuid.UUID | UniqueEntityId') -> str:
+    # The form entity IDs are stored in, for lookups. A value that is not a
+    # UUID cannot match any entity and is returned as given.
+    if isinstance(id_, UniqueEntityId):
+        return id_.id_
+    try:
+        return _canonical_uuid(id_)
+    except (ValueError, TypeError, AttributeError):
+        return str(id_)
+
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    # UUIDv7 (RFC 9562): 48-bit Unix timestamp in ms, then a 12-bit counter in
+    # rand_a (method 1), so IDs from one process sort in creation order even
+    # within the same millisecond.
+    global _uuid7_last_ms, _uuid7_counter
+    with _uuid7_lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        if timestamp_ms > _uuid7_last_ms:
+            _uuid7_last_ms = timestamp_ms
+            _uuid7_counter = secrets.randbits(11)
+        else:
+            _uuid7_counter += 1
+            if _uuid7_counter > 0xFFF:
+                _uuid7_last_ms += 1
+                _uuid7_counter = 0
+        timestamp_ms, counter = _uuid7_last_ms, _uuid7_counter
+    return uuid.UUID(int=(
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    ))
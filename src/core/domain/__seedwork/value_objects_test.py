@@ -1,11 +1,13 @@
 from abc import ABC
 from dataclasses import dataclass, FrozenInstanceError, is_dataclass
+import time
 from unittest.mock import patch
 import uuid
 import unittest
 
 from .exceptions import InvalidUuidException
-from .value_objects import GenericValueObject, UniqueEntityId
+from .value_objects import (
+    CachedStrValueObject, GenericValueObject, UniqueEntityId, canonical_id, uuid7)
 
 
 @dataclass(frozen=True, slots=True)
@@ -14,7 +16,7 @@ class VOOnePropertyStub(GenericValueObject):
 
 
 @dataclass(frozen=True, slots=True)
-class VOTwoPropertiesStub(GenericValueObject):
+class VOTwoPropertiesStub(CachedStrValueObject):
     prop: str = 'value'
     prop_: str = 'other value'
 
@@ -64,6 +66,48 @@ class GenericValueObjectUnitTests(unittest.TestCase):
             '{"prop": "value", "prop_": "other value"}'
         )
 
+    def test_string_rendering_is_cached(self):
+        # Arrange:
+        value_object = VOTwoPropertiesStub()
+        with patch.object(
+            VOTwoPropertiesStub,
+            '_GenericValueObject__render',
+            autospec=True,
+            side_effect=GenericValueObject._GenericValueObject__render
+        ) as mock_render:
+            # Act:
+            rendered = [str(value_object) for _ in range(3)]
+            # Assert:
+            mock_render.assert_called_once()
+        self.assertEqual(rendered, ['{"prop": "value", "prop_": "other value"}'] * 3)
+
+    def test_only_cached_value_objects_keep_a_string_slot(self):
+        # Arrange/Act:
+        value_object_1 = VOOnePropertyStub()
+        value_object_2 = VOTwoPropertiesStub()
+        str(value_object_1)
+        str(value_object_2)
+        # Assert:
+        self.assertEqual(GenericValueObject.__slots__, ())
+        self.assertEqual(VOOnePropertyStub.__slots__, ('prop',))
+        self.assertEqual(UniqueEntityId.__slots__, ('id_', '_UniqueEntityId__int'))
+        self.assertEqual(
+            value_object_2._CachedStrValueObject__str_cache,
+            '{"prop": "value", "prop_": "other value"}')
+
+    def test_string_cache_does_not_affect_equality_and_repr(self):
+        # Arrange:
+        value_object_1 = VOTwoPropertiesStub()
+        value_object_2 = VOTwoPropertiesStub()
+        # Act:
+        str(value_object_1)
+        # Assert:
+        self.assertEqual(value_object_1, value_object_2)
+        self.assertEqual(hash(value_object_1), hash(value_object_2))
+        self.assertEqual(
+            repr(value_object_1),
+            "VOTwoPropertiesStub(prop='value', prop_='other value')")
+
 
 class UniqueEntityIdUnitTests(unittest.TestCase):
 
@@ -127,3 +171,151 @@ class UniqueEntityIdUnitTests(unittest.TestCase):
         error_message = assert_error.exception.args[0]
         # Assert:
         self.assertEqual(error_message, 'ID must be a valid UUID')
+
+    def test_rehydrate_method_skips_validation(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        with patch.object(
+            UniqueEntityId,
+            '_UniqueEntityId__validate',
+            autospec=True
+        ) as mock_validate:
+            # Act:
+            unique_entity_id = UniqueEntityId.rehydrate(uuid_test)
+            # Assert:
+            mock_validate.assert_not_called()
+        self.assertEqual(unique_entity_id, UniqueEntityId(uuid_test))
+        self.assertEqual(UniqueEntityId.rehydrate(str(uuid_test).upper()).id_, str(uuid_test))
+
+    def test_canonical_id(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        arrange = [
+            (str(uuid_test).upper(), str(uuid_test)),
+            (uuid_test, str(uuid_test)),
+            (UniqueEntityId(uuid_test), str(uuid_test)),
+            ('fake id', 'fake id'),
+        ]
+        for value, expected in arrange:
+            # Act/Assert:
+            self.assertEqual(canonical_id(value), expected, msg=f'Failed with data: {value}')
+
+    def test_constructor_normalizes_to_canonical_string(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        arrange = [
+            str(uuid_test).upper(),
+            uuid_test.hex,
+            f'{{{uuid_test}}}',
+            f'urn:uuid:{uuid_test}',
+        ]
+        for value in arrange:
+            msg = f'Failed with data: {value}'
+            # Act:
+            unique_entity_id = UniqueEntityId(value)
+            # Assert:
+            self.assertEqual(unique_entity_id.id_, str(uuid_test), msg=msg)
+            self.assertEqual(str(unique_entity_id), str(uuid_test), msg=msg)
+
+    def test_compact_representations(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        # Act:
+        unique_entity_id = UniqueEntityId(uuid_test)
+        # Assert:
+        self.assertEqual(unique_entity_id.int_, uuid_test.int)
+        self.assertEqual(unique_entity_id.bytes_, uuid_test.bytes)
+        self.assertEqual(UniqueEntityId.from_bytes(uuid_test.bytes), unique_entity_id)
+
+    def test_int_form_is_parsed_once(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        unique_entity_id = UniqueEntityId(uuid_test)
+        self.assertIsNone(unique_entity_id._UniqueEntityId__int)
+        # Act:
+        unique_entity_id.int_
+        # Assert:
+        self.assertEqual(unique_entity_id._UniqueEntityId__int, uuid_test.int)
+        self.assertIsNone(UniqueEntityId.rehydrate(uuid_test)._UniqueEntityId__int)
+        self.assertEqual(
+            UniqueEntityId.from_bytes(uuid_test.bytes)._UniqueEntityId__int, uuid_test.int)
+        self.assertEqual(unique_entity_id, UniqueEntityId.from_bytes(uuid_test.bytes))
+
+    def test_canonical_strings_are_kept_as_given(self):
+        # Arrange:
+        id_ = str(uuid.uuid4())
+        # Act:
+        unique_entity_id = UniqueEntityId(id_)
+        # Assert:
+        self.assertIs(unique_entity_id.id_, id_)
+        self.assertIs(UniqueEntityId.rehydrate(id_).id_, id_)
+        self.assertIs(canonical_id(id_), id_)
+
+    def test_equality_and_hash(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        # Act:
+        unique_entity_id_1 = UniqueEntityId(uuid_test)
+        unique_entity_id_2 = UniqueEntityId(str(uuid_test))
+        # Assert:
+        self.assertEqual(unique_entity_id_1, unique_entity_id_2)
+        self.assertEqual(hash(unique_entity_id_1), hash(unique_entity_id_2))
+        self.assertNotEqual(unique_entity_id_1, UniqueEntityId())
+        self.assertNotEqual(unique_entity_id_1, str(uuid_test))
+
+    def test_intern_method(self):
+        # Arrange:
+        uuid_test = uuid.uuid4()
+        # Act:
+        interned_1 = UniqueEntityId.intern(str(uuid_test))
+        interned_2 = UniqueEntityId.intern(UniqueEntityId(uuid_test))
+        # Assert:
+        self.assertIs(interned_1, interned_2)
+        UniqueEntityId.clear_interned()
+        self.assertIsNot(UniqueEntityId.intern(uuid_test), interned_1)
+        UniqueEntityId.clear_interned()
+        with self.assertRaises(InvalidUuidException):
+            UniqueEntityId.intern('testing_invalid_id')
+
+
+class UUID7UnitTests(unittest.TestCase):
+
+    def test_layout(self):
+        # Arrange:
+        before_ms = time.time_ns() // 1_000_000
+        # Act:
+        generated = uuid7()
+        # Assert:
+        self.assertEqual(generated.version, 7)
+        self.assertEqual(generated.variant, uuid.RFC_4122)
+        self.assertGreaterEqual(generated.int >> 80, before_ms)
+        self.assertLessEqual(generated.int >> 80, time.time_ns() // 1_000_000 + 1)
+
+    def test_if_is_monotonic(self):
+        # Arrange/Act:
+        generated = [str(uuid7()) for _ in range(10000)]
+        # Assert:
+        self.assertEqual(sorted(generated), generated)
+        self.assertEqual(len(set(generated)), len(generated))
+
+    def test_if_unique_entity_id_accepts_uuid7(self):
+        # Arrange/Act:
+        generated = uuid7()
+        unique_entity_id = UniqueEntityId(generated)
+        time_ordered = UniqueEntityId.time_ordered()
+        # Assert:
+        self.assertEqual(unique_entity_id.id_, str(generated))
+        self.assertEqual(uuid.UUID(time_ordered.id_).version, 7)
+        self.assertLess(unique_entity_id.id_, time_ordered.id_)
+
+    def test_default_generator_opt_in(self):
+        # Arrange:
+        self.assertIs(UniqueEntityId.default_generator, uuid.uuid4)
+        self.assertEqual(uuid.UUID(UniqueEntityId().id_).version, 4)
+        # Act:
+        with patch.object(UniqueEntityId, 'default_generator', uuid7):
+            generated = [UniqueEntityId().id_ for _ in range(100)]
+        # Assert:
+        self.assertTrue(all(uuid.UUID(id_).version == 7 for id_ in generated))
+        self.assertEqual(sorted(generated), generated)
+        self.assertEqual(uuid.UUID(UniqueEntityId().id_).version, 4)
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
-from typing import Optional
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
 
 from core.domain.__seedwork.exceptions import EntityValidationException
-from core.domain.__seedwork.entities import GenericEntity
+from core.domain.__seedwork.entities import EntityBatch, GenericEntity
+from core.domain.__seedwork.notification import Notification
 
-from .validators import CategoryValidator
+from .validators import CategoryCompiledValidator
 
 
 @dataclass(kw_only=True, frozen=True, slots=True)
@@ -20,11 +22,39 @@ class Category(GenericEntity):
     def update(self, name: str, description: str = None):
         if description is None:
             self._set_attr('name', name)
+            self.__validate(('name', 'updated_at'))
         else:
             self._set_attrs_dict({'name': name, 'description': description})
-        self.__validate()
-
-    def __validate(self):
-        validator = CategoryValidator()
-        if not validator.validate(self.to_dict()):
+            self.__validate(('name', 'description', 'updated_at'))
+
+    @classmethod
+    def create_batch(cls, rows: List[Any]) -> EntityBatch['Category']:
+        batch = EntityBatch()
+        validator = CategoryCompiledValidator()
+        for index, row in enumerate(rows):
+            data = row
+            if isinstance(row, dict):
+                data = {
+                    field_name: row[field_name]
+                    for field_name in ('name', 'description', 'is_active') if field_name in row
+                }
+                data['created_at'] = datetime.now()
+            if validator.validate(data):
+                batch.entities.append(cls.rehydrate(data))
+            else:
+                batch.errors[index] = Notification()
+                for context, messages in validator.fields_errors.items():
+                    for message in messages:
+                        batch.errors[index].add_message(context, message)
+                validator.fields_errors = None
+        return batch
+
+    def __validate(self, fields_names: Optional[Tuple[str, ...]] = None):
+        validator = CategoryCompiledValidator()
+        if fields_names is None:
+            is_valid = validator.validate(self.to_dict())
+        else:
+            is_valid = validator.validate_partial(
+                {field_name: getattr(self, field_name) for field_name in fields_names})
+        if not is_valid:
             raise EntityValidationException(validator.fields_errors)
@@ -1,13 +1,23 @@
 from dataclasses import FrozenInstanceError, is_dataclass
 from datetime import datetime
 import unittest
-from unittest.mock import patch
+from unittest.mock import ANY, patch
+
+from django.conf import settings
+
+from core.domain.__seedwork.exceptions import EntityValidationException
+from core.domain.__seedwork.notification import Notification
 
 from .entities import Category
 
 
 class CategoryUnitTests(unittest.TestCase):
 
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+
     def test_if_is_a_data_class(self):
         # Arrange:
         is_category_dataclass = False
@@ -81,3 +91,96 @@ class CategoryUnitTests(unittest.TestCase):
             self.assertNotEqual(category.updated_at, datetime_test)
             self.assertIsInstance(category.updated_at, datetime)
             self.assertEqual(mock_validate_method.call_count, 2)
+
+    def test_rehydrate_method_skips_validation(self):
+        with patch.object(Category, '_Category__validate') as mock_validate_method:
+            # Arrange:
+            category = Category(name='movie_name', description='desc')
+            mock_validate_method.reset_mock()
+            # Act:
+            rehydrated = Category.rehydrate(category.to_dict())
+            # Assert:
+            mock_validate_method.assert_not_called()
+            self.assertEqual(rehydrated, category)
+            self.assertIsNot(rehydrated, category)
+
+    def test_rehydrate_method_requires_name(self):
+        with self.assertRaises(TypeError) as assert_error:
+            Category.rehydrate({'description': 'desc'})
+        self.assertEqual(
+            assert_error.exception.args[0],
+            "Category.rehydrate() missing required field: 'name'")
+
+    def test_create_batch_method(self):
+        # Arrange:
+        rows = [
+            {'name': 'movie'},
+            {'name': 'mo', 'description': 5},
+            {'name': 'serie', 'description': 'desc', 'is_active': False},
+            'foobar',
+            {'name': 'doc', 'id': 'fake id', 'created_at': 'fake date'},
+        ]
+        # Act:
+        with patch.object(Category, '_Category__validate') as mock_validate_method:
+            batch = Category.create_batch(rows)
+            mock_validate_method.assert_not_called()
+        # Assert:
+        self.assertEqual(
+            [(c.name, c.description, c.is_active) for c in batch.entities],
+            [('movie', None, True), ('serie', 'desc', False), ('doc', None, True)]
+        )
+        for category in batch.entities:
+            self.assertIsInstance(category.created_at, datetime)
+            self.assertIsNone(category.updated_at)
+        self.assertNotEqual(batch.entities[2].id, 'fake id')
+        self.assertEqual(list(batch.errors), [1, 3])
+        self.assertIsInstance(batch.errors[1], Notification)
+        self.assertEqual(batch.errors[1].messages, {
+            'name': ['Ensure this field has at least 3 characters.'],
+            'description': ['Not a valid string.']
+        })
+        self.assertEqual(batch.errors[3].messages, {
+            'non_field_errors': ['Invalid data. Expected a dictionary, but got str.']
+        })
+
+    def test_update_method_tracks_changed_fields(self):
+        with patch.object(Category, '_Category__validate'):
+            # Arrange:
+            category = Category(name='initial name')
+            category.clear_changes()
+            # Act:
+            category.update(name='name')
+            # Assert:
+            self.assertEqual(category.changed_fields, {'name', 'updated_at'})
+            category.update(name='name', description='description')
+            self.assertEqual(
+                category.changed_fields, {'name', 'description', 'updated_at'})
+
+    def test_update_method_validates_only_touched_fields(self):
+        # Arrange:
+        category = Category.rehydrate({'name': 'movie_name', 'description': 5})
+        with patch(
+            'core.domain.category.entities.CategoryCompiledValidator.validate_partial',
+            autospec=True,
+            return_value=True
+        ) as mock_validate_partial:
+            # Act:
+            category.update(name='other_name')
+            # Assert:
+            mock_validate_partial.assert_called_once_with(
+                ANY,
+                {'name': 'other_name', 'updated_at': category.updated_at})
+        # Untouched invalid description does not block a rename:
+        category.update(name='renamed')
+        self.assertEqual(category.name, 'renamed')
+
+    def test_update_method_raises_on_invalid_touched_fields(self):
+        # Arrange:
+        category = Category(name='movie_name')
+        # Act/Assert:
+        with self.assertRaises(EntityValidationException) as assert_error:
+            category.update(name='mo', description=5)
+        self.assertEqual(assert_error.exception.fields_errors, {
+            'name': ['Ensure this field has at least 3 characters.'],
+            'description': ['Not a valid string.']
+        })
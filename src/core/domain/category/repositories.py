@@ -1,5 +1,8 @@
-from abc import ABC
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional
 
+from core.domain.__seedwork.changes import ChangeSet
 from core.domain.__seedwork.repositories import (
     RepositoryInterface,
     SearchParams as DefaultSearchParams,
@@ -27,3 +30,74 @@ class CategoryRepository(
 ):
     SearchParams = _SearchParams
     SearchResult = _SearchResult
+
+    # Time-window lookups: start <= timestamp < end, either bound optional,
+    # ordered by that timestamp then by ID.
+
+    @abstractmethod
+    def find_created_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        ...
+
+    @abstractmethod
+    async def find_created_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        ...
+
+    @abstractmethod
+    def find_updated_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        ...
+
+    @abstractmethod
+    async def find_updated_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        ...
+
+    # Incremental sync: every category (deleted ones included) whose latest
+    # change has a version above the given watermark, oldest change first.
+    # Deleted categories purged by compact() are no longer reported; a
+    # watermark from before such a purge gets resync set on the result.
+
+    @abstractmethod
+    def find_changed_since(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        ...
+
+    @abstractmethod
+    async def find_changed_since_async(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        ...
+
+    # Type-ahead: up to limit categories whose name starts with prefix,
+    # case-insensitively, ordered by name then by ID.
+
+    @abstractmethod
+    def find_by_name_prefix(self, prefix: str, limit: int = 10) -> List[Category]:
+        ...
+
+    @abstractmethod
+    async def find_by_name_prefix_async(self, prefix: str, limit: int = 10) -> List[Category]:
+        ...
+
+    # Typo-tolerant search: categories whose name has a trigram similarity of
+    # at least threshold with name (pg_trgm's measure and default threshold),
+    # most similar first, then by ID.
+
+    @abstractmethod
+    def find_by_similar_name(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        ...
+
+    @abstractmethod
+    async def find_by_similar_name_async(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        ...
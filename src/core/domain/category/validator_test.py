@@ -1,9 +1,19 @@
 import unittest
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
 
 from django.conf import settings
+from django.test import override_settings
 
-from .validators import CategoryValidator
+from core.domain.__seedwork.validators import DRFFieldsValidator
+
+from .entities import Category
+from .validators import CategoryCompiledValidator, CategoryRules, CategoryValidator
+
+
+def _zones(data):
+    return None if data is None else {
+        name: getattr(value, 'tzinfo', None) for name, value in data.items()}
 
 
 class CategoryValidatorUnitTest(unittest.TestCase):
@@ -152,3 +162,130 @@ class CategoryValidatorUnitTest(unittest.TestCase):
             self.assertIsNotNone(self.validator.fields_errors, msg=msg)
             self.assertIsNotNone(
                 self.validator.fields_errors['updated_at'], msg=msg)
+
+
+class CategoryCompiledValidatorUnitTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        return super().setUp()
+
+    def test_parity_with_drf_validator(self):
+        now = datetime.now()
+        test_data = [
+            None, [], 'foobar', False, 9, {},
+            {'name': 'foobar'}, {'name': 'f' * 3}, {'name': 'f' * 255},
+            {'name': None}, {'name': ''}, {'name': '   '}, {'name': 'f' * 2},
+            {'name': 'f' * 256}, {'name': 5}, {'name': False}, {'name': {}},
+            {'name': []}, {'name': ' foobar '}, {'name': 'foo\x00bar'},
+            {'name': 'f\ud800oo'}, {'name': 'fóóbár'},
+            {'name': 'foobar', 'description': None},
+            {'name': 'foobar', 'description': ''},
+            {'name': 'foobar', 'description': '  '},
+            {'name': 'foobar', 'description': 'f' * 255},
+            {'name': 'foobar', 'description': 'f' * 256},
+            {'name': 'foobar', 'description': 5},
+            {'name': 'foobar', 'is_active': True},
+            {'name': 'foobar', 'is_active': False},
+            {'name': 'foobar', 'is_active': None},
+            {'name': 'foobar', 'is_active': 1},
+            {'name': 'foobar', 'is_active': 'true'},
+            {'name': 'foobar', 'created_at': now},
+            {'name': 'foobar', 'created_at': None},
+            {'name': 'foobar', 'created_at': now.isoformat()},
+            {'name': 'foobar', 'created_at': now.replace(tzinfo=timezone.utc)},
+            {'name': 'foobar', 'created_at': date.today()},
+            {'name': 'foobar', 'created_at': 9},
+            {'name': 'foobar', 'updated_at': None},
+            {'name': 'foobar', 'updated_at': now},
+            {'name': 'foobar', 'updated_at': 'foobar'},
+            {'name': 'foobar', 'id': 'fake', 'is_active': True,
+             'created_at': now, 'updated_at': None, 'description': 'desc'},
+            {'name': 'f', 'description': 5, 'is_active': 0, 'created_at': None},
+        ]
+        for data in test_data:
+            msg = f'Fail with data: {data}'
+            drf_validator = CategoryValidator()
+            compiled_validator = CategoryCompiledValidator()
+            self.assertEqual(
+                compiled_validator.validate(data), drf_validator.validate(data), msg=msg)
+            self.assertEqual(
+                compiled_validator.fields_errors, drf_validator.fields_errors, msg=msg)
+            self.assertEqual(
+                compiled_validator.validated_data, drf_validator.validated_data, msg=msg)
+
+    def test_valid_data_does_not_instantiate_serializer(self):
+        validator = CategoryCompiledValidator()
+        validator.validate({'name': 'foobar'})
+        with patch.object(CategoryRules, '__init__') as mock_init:
+            self.assertTrue(validator.validate({
+                'name': 'foobar',
+                'description': 'desc',
+                'is_active': True,
+                'created_at': datetime.now(),
+                'updated_at': None
+            }))
+            mock_init.assert_not_called()
+
+    def test_parity_with_drf_validator_when_use_tz(self):
+        now = datetime.now()
+        test_data = [
+            {'name': 'foobar', 'created_at': now},
+            {'name': 'foobar', 'created_at': now.replace(tzinfo=timezone.utc)},
+            {'name': 'foobar', 'created_at': now.replace(tzinfo=timezone(timedelta(hours=5)))},
+            {'name': 'foobar', 'created_at': datetime.min.replace(tzinfo=timezone.utc)},
+            {'name': 'foobar', 'created_at': now.isoformat()},
+            {'name': 'foobar', 'created_at': date.today()},
+            {'name': 'foobar', 'updated_at': None},
+            {'name': 'foobar', 'updated_at': now},
+        ]
+        for time_zone in ['UTC', 'America/Sao_Paulo']:
+            with override_settings(USE_TZ=True, TIME_ZONE=time_zone):
+                for data in test_data:
+                    msg = f'Fail with data: {data} in {time_zone}'
+                    drf_validator = CategoryValidator()
+                    compiled_validator = CategoryCompiledValidator()
+                    self.assertEqual(
+                        compiled_validator.validate(data), drf_validator.validate(data), msg=msg)
+                    self.assertEqual(
+                        compiled_validator.fields_errors, drf_validator.fields_errors, msg=msg)
+                    self.assertEqual(
+                        compiled_validator.validated_data, drf_validator.validated_data,
+                        msg=msg)
+                    # Equal aware datetimes may still be in different zones.
+                    self.assertEqual(
+                        _zones(compiled_validator.validated_data),
+                        _zones(drf_validator.validated_data), msg=msg)
+
+    @override_settings(USE_TZ=True)
+    def test_entities_do_not_instantiate_serializer_when_use_tz(self):
+        CategoryCompiledValidator().validate({'name': 'foobar'})
+        with patch.object(CategoryRules, '__init__') as mock_init:
+            category = Category(name='foobar')
+            category.update('barfoo', 'desc')
+            batch = Category.create_batch([{'name': 'foobar'}, {'name': 'barfoo'}])
+            mock_init.assert_not_called()
+        self.assertEqual((len(batch.entities), batch.errors), (2, {}))
+
+    def test_partial_validation_parity_with_drf_serializer(self):
+        test_data = [
+            {}, {'name': 'foobar'}, {'name': 'fo'}, {'name': None},
+            {'description': None}, {'description': 5},
+            {'name': 'foobar', 'updated_at': datetime.now()},
+            {'name': 'foobar', 'updated_at': 'foobar'},
+            {'is_active': False}, {'is_active': 'false'},
+        ]
+        for data in test_data:
+            msg = f'Fail with data: {data}'
+            drf_validator = DRFFieldsValidator()
+            compiled_validator = CategoryCompiledValidator()
+            self.assertEqual(
+                compiled_validator.validate_partial(data),
+                drf_validator.validate(CategoryRules(data=data, partial=True)),
+                msg=msg)
+            self.assertEqual(
+                compiled_validator.fields_errors, drf_validator.fields_errors, msg=msg)
+            self.assertEqual(
+                compiled_validator.validated_data, drf_validator.validated_data, msg=msg)
@@ -2,7 +2,7 @@ from typing import Dict
 from rest_framework import serializers
 
 from core.domain.__seedwork.validators import (
-    DRFFieldsValidator, DRFStrictBooleanField, DRFStrictCharField
+    DRFCompiledFieldsValidator, DRFFieldsValidator, DRFStrictBooleanField, DRFStrictCharField
 )
 
 
@@ -19,3 +19,7 @@ class CategoryValidator(DRFFieldsValidator):
     def validate(self, data: Dict) -> bool:
         rules = CategoryRules(data=data if data is not None else {})
         return super().validate(rules)
+
+
+class CategoryCompiledValidator(DRFCompiledFieldsValidator):
+    rules = CategoryRules
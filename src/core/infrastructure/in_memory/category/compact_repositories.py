@@ -0,0 +1,616 @@
+from array import array
+import asyncio
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, Optional, Set
+import uuid
+
+from core.domain.__seedwork.changes import Change, ChangeLog, ChangeSet
+from core.domain.__seedwork.exceptions import (
+    DuplicateValueException, EntityAlreadyExistsException, EntityNotFoundException,
+    EntityValidationException, EntityVersionConflictException
+)
+from core.domain.__seedwork.filters import FilterExpression, casefold_sort_key, fields_types
+from core.domain.__seedwork.indexes import SortedIndex, TrigramIndex, UniqueIndex
+from core.domain.__seedwork.repositories import StringPool, nulls_last, parse_sort
+from core.domain.__seedwork.value_objects import UniqueEntityId, canonical_id
+from core.domain.category.repositories import CategoryRepository
+from core.domain.category.entities import Category
+
+from .repositories import CategoryInMemoryRepository
+
+EPOCH = datetime(1970, 1, 1)
+NULL_TIMESTAMP = -2 ** 63
+ID_SIZE = 16
+
+
+# The timestamp columns hold naive datetimes, like the ones the entities
+# create; an aware one has no offset to go back to, so it is rejected rather
+# than shifted.
+def _to_timestamp(value: Optional[datetime]) -> int:
+    if value is None:
+        return NULL_TIMESTAMP
+    if value.tzinfo is not None:
+        raise ValueError('Timezone-aware datetimes are not supported')
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _check_naive_datetimes(entities: List[Category]) -> None:
+    for entity in entities:
+        for field_name in ('created_at', 'updated_at'):
+            value = getattr(entity, field_name)
+            if value is not None and value.tzinfo is not None:
+                raise EntityValidationException(
+                    {field_name: ['Timezone-aware datetimes are not supported.']})
+
+
+def _from_timestamp(value: int) -> Optional[datetime]:
+    if value == NULL_TIMESTAMP:
+        return None
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _parse_key(id_: str | UniqueEntityId) -> Optional[int]:
+    # The key (UUID as an int) of an ID in any form canonical_id accepts;
+    # None for a value that is not one.
+    if isinstance(id_, UniqueEntityId):
+        return id_.int_
+    try:
+        return uuid.UUID(canonical_id(id_)).int
+    except ValueError:
+        return None
+
+
+def _month(value: int) -> str:
+    moment = _from_timestamp(value)
+    return f'{moment.year:04d}-{moment.month:02d}'
+
+
+def _index_key(value: int) -> Optional[int]:
+    # Null timestamps are left out of the time indexes.
+    return None if value == NULL_TIMESTAMP else value
+
+
+_ROW_FIELDS_TYPES = {
+    name: types_ for name, types_ in fields_types(Category).items()
+    if name in ('id', 'name', 'description', 'is_active', 'created_at', 'updated_at', 'version')
+}
+
+
+class _RowView:
+
+    __slots__ = ('_repo', '_row')
+
+    def __init__(self, repo: 'CategoryCompactInMemoryRepository', row: int) -> None:
+        self._repo = repo
+        self._row = row
+
+    def __getattr__(self, name: str) -> Any:
+        return self._repo._value(self._row, name)
+
+
+@dataclass(slots=True)
+class CategoryCompactInMemoryRepository(CategoryRepository):
+
+    # Column-oriented storage: one row per category, IDs as 16 raw bytes,
+    # timestamps as microseconds since the epoch (naive datetimes) and the
+    # active flag as one byte. Category objects are only materialized for the
+    # rows a read actually returns. IDs are found by bisecting the rows in ID
+    # order: 8 bytes a row, where a dict from ID to row takes over 100.
+
+    TEST_ASYNC_DELAY = 0.001
+
+    sortable_fields = CategoryInMemoryRepository.sortable_fields
+    facet_fields = CategoryInMemoryRepository.facet_fields
+    sort_key: ClassVar[Callable[[Any], Any]] = staticmethod(casefold_sort_key)
+
+    _ids: bytearray = field(default_factory=bytearray)
+    _id_order: array = field(default_factory=lambda: array('q'))
+    _names: List[str] = field(default_factory=lambda: [])
+    _descriptions: List[Optional[str]] = field(default_factory=lambda: [])
+    _active: bytearray = field(default_factory=bytearray)
+    _created_at: array = field(default_factory=lambda: array('q'))
+    _updated_at: array = field(default_factory=lambda: array('q'))
+    _versions: array = field(default_factory=lambda: array('q'))
+    # Sorted row numbers per timestamp column, built on first range query.
+    _time_indexes: Dict[str, SortedIndex] = field(
+        default_factory=lambda: {}, repr=False, compare=False)
+    # Active rows by case-folded name and by name trigrams, built on first
+    # prefix or similarity lookup.
+    _name_index: Optional[SortedIndex] = field(default=None, repr=False, compare=False)
+    _name_trigrams: Optional[TrigramIndex] = field(default=None, repr=False, compare=False)
+    # Active rows by case-folded name, built on the first checked write.
+    _unique_names: Optional[UniqueIndex] = field(default=None, repr=False, compare=False)
+    # Keyed by the UUID as an int, which survives compaction unlike rows.
+    _changes: ChangeLog[int] = field(default_factory=ChangeLog, repr=False, compare=False)
+    string_pool: Optional[StringPool] = None
+    enforce_unique: bool = False
+
+    def insert(self, entity: Category) -> None:
+        self.insert_many([entity])
+
+    async def insert_async(self, entity: Category) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.insert(entity)
+
+    def insert_many(self, entities: List[Category]) -> None:
+        keys = set()
+        for entity in entities:
+            key = entity.unique_entity_id.int_
+            if self.__row(key) is not None or key in keys:
+                raise EntityAlreadyExistsException(
+                    f'Entity already exists using ID: {entity.id}')
+            keys.add(key)
+        _check_naive_datetimes(entities)
+        self.__check_unique_names(entities)
+        first_row = len(self._names)
+        for entity in entities:
+            self.__append(entity)
+            self.__record_change(len(self._names) - 1)
+        self.__order_ids(first_row)
+
+    async def insert_many_async(self, entities: List[Category]) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.insert_many(entities)
+
+    def load(self, rows: Iterable[dict]) -> None:
+        self.insert_many([Category.rehydrate(row) for row in rows])
+
+    def update(self, entity: Category) -> None:
+        self.update_many([entity])
+
+    async def update_async(self, entity: Category) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.update(entity)
+
+    def update_many(self, entities: List[Category]) -> None:
+        # Nothing is written unless every row is found at the expected version.
+        latest = list({entity.id: entity for entity in entities}.values())
+        rows = [self.__find_row(entity.id) for entity in latest]
+        for row, entity in zip(rows, latest):
+            if entity.version != self._versions[row]:
+                raise EntityVersionConflictException(
+                    entity.id, entity.version, self._versions[row])
+        _check_naive_datetimes(latest)
+        self.__check_unique_names(latest, rows)
+        for row, entity in zip(rows, latest):
+            object.__setattr__(entity, 'version', self._versions[row] + 1)
+            self.__write(row, entity)
+            self.__record_change(row)
+            entity.clear_changes()
+
+    async def update_many_async(self, entities: List[Category]) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.update_many(entities)
+
+    def delete(self, id_: str | UniqueEntityId) -> None:
+        self.delete_many([id_])
+
+    async def delete_async(self, id_: str | UniqueEntityId) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.delete(id_)
+
+    def delete_many(self, ids: List[str | UniqueEntityId]) -> None:
+        rows = list(dict.fromkeys(self.__find_row(id_) for id_ in ids))
+        now = _to_timestamp(datetime.now())
+        for row in rows:
+            self.__unindex_name(row)
+            self._active[row] = 0
+            self._versions[row] += 1
+            self.__set_timestamp('updated_at', row, now)
+            self.__record_change(row)
+
+    async def delete_many_async(self, ids: List[str | UniqueEntityId]) -> None:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        self.delete_many(ids)
+
+    def compact(self, retention: timedelta) -> int:
+        limit = _to_timestamp(datetime.now() - retention)
+        kept = [
+            row for row in range(len(self._names))
+            if self._active[row] or max(self._updated_at[row], self._created_at[row]) >= limit
+        ]
+        purged = len(self._names) - len(kept)
+        if purged:
+            kept_rows = set(kept)
+            purged_rows = [row for row in range(len(self._names)) if row not in kept_rows]
+            self._changes.forget(map(self.__key, purged_rows))
+            entities = [self.__materialize(row) for row in kept]
+            self.__release(*(self._names[row] for row in purged_rows))
+            self.__release(*(self._descriptions[row] for row in purged_rows))
+            self.__reset()
+            for entity in entities:
+                self.__append(entity)
+                # Appending took the row's pooled strings a second time.
+                self.__release(entity.name, entity.description)
+            self.__order_ids(0)
+        return purged
+
+    def find_by_id(self, id_: str | UniqueEntityId) -> Category:
+        return self.__materialize(self.__find_row(id_))
+
+    async def find_by_id_async(self, id_: str | UniqueEntityId) -> Category:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_by_id(id_)
+
+    def find_known_ids(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        # Deleted rows keep their ID until compact() purges them.
+        return {canonical_id(id_) for id_ in ids if self.__row(_parse_key(id_)) is not None}
+
+    async def find_known_ids_async(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_known_ids(ids)
+
+    def find_versions(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        versions = {}
+        for id_ in ids:
+            row = self.__row(_parse_key(id_))
+            if row is not None and self._active[row]:
+                versions[canonical_id(id_)] = self._versions[row]
+        return versions
+
+    async def find_versions_async(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_versions(ids)
+
+    def find_all(self) -> List[Category]:
+        return [self.__materialize(row) for row in self.__active_rows()]
+
+    async def find_all_async(self) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_all()
+
+    def find_created_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return [self.__materialize(row) for row in self.__time_range('created_at', start, end)]
+
+    async def find_created_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_created_between(start, end)
+
+    def find_updated_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return [self.__materialize(row) for row in self.__time_range('updated_at', start, end)]
+
+    async def find_updated_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_updated_between(start, end)
+
+    def find_changed_since(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        changes = self._changes.since(version, limit)
+        return ChangeSet(
+            [
+                Change(change.version, self.__materialize(self.__row(change.entity)))
+                for change in changes.items
+            ],
+            changes.version,
+            changes.has_more,
+            changes.resync
+        )
+
+    async def find_changed_since_async(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_changed_since(version, limit)
+
+    def find_by_name_prefix(self, prefix: str, limit: int = 10) -> List[Category]:
+        return [self.__materialize(row) for row in self.__name_prefix(prefix, limit)]
+
+    async def find_by_name_prefix_async(self, prefix: str, limit: int = 10) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_by_name_prefix(prefix, limit)
+
+    def find_by_similar_name(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        return [self.__materialize(row) for row in self.__similar_names(name, threshold, limit)]
+
+    async def find_by_similar_name_async(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_by_similar_name(name, threshold, limit)
+
+    def search(self, input_: CategoryRepository.SearchParams) -> CategoryRepository.SearchResult:
+        rows = self.__active_rows()
+        if isinstance(input_.filter_, FilterExpression):
+            rows = self.__filter_rows(rows, input_.filter_)
+        elif input_.filter_:
+            filter_ = input_.filter_.lower()
+            rows = [row for row in rows if filter_ in self._names[row].lower()]
+        rows_sorted = self.__sort(rows, input_.sort_by, input_.sort_dir)
+        start = (input_.page - 1) * input_.per_page
+        return self.SearchResult(
+            items=[
+                self.__materialize(row)
+                for row in rows_sorted[start:start + input_.per_page]
+            ],
+            total=len(rows),
+            current_page=input_.page,
+            per_page=input_.per_page,
+            sort_by=input_.sort_by,
+            sort_dir=input_.sort_dir,
+            filter_=input_.filter_,
+            facets=self.__facets(rows, input_.facets_names)
+        )
+
+    async def search_async(
+        self, input_: CategoryRepository.SearchParams
+    ) -> CategoryRepository.SearchResult:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.search(input_)
+
+    def _value(self, row: int, field_name: str) -> Any:
+        if field_name == 'id':
+            offset = row * ID_SIZE
+            return UniqueEntityId.from_bytes(bytes(self._ids[offset:offset + ID_SIZE])).id_
+        if field_name == 'name':
+            return self._names[row]
+        if field_name == 'description':
+            return self._descriptions[row]
+        if field_name == 'is_active':
+            return bool(self._active[row])
+        if field_name == 'created_at':
+            return _from_timestamp(self._created_at[row])
+        if field_name == 'version':
+            return self._versions[row]
+        return _from_timestamp(self._updated_at[row])
+
+    def __facets(
+        self, rows: List[int], facets_names: List[str]
+    ) -> Optional[Dict[str, Dict[Any, int]]]:
+        names = [name for name in facets_names if name in self.facet_fields]
+        if not names:
+            return None
+        return {name: dict(Counter(map(self.__facet_value(name), rows))) for name in names}
+
+    def __facet_value(self, name: str) -> Callable[[int], Any]:
+        # Straight from the columns where possible, rather than through a view
+        # per row.
+        if name == 'created_month':
+            created_at = self._created_at
+            return lambda row: _month(created_at[row])
+        if name == 'is_active':
+            active = self._active
+            return lambda row: bool(active[row])
+        facet = self.facet_fields[name]
+        return lambda row: facet(_RowView(self, row))
+
+    def __filter_rows(self, rows: List[int], expression: FilterExpression) -> List[int]:
+        # No indexes here: every row is checked through a view over its columns.
+        expression.validate(_ROW_FIELDS_TYPES)
+        return [row for row in rows if expression.matches(_RowView(self, row))]
+
+    def __name_prefix(self, prefix: str, limit: int) -> List[int]:
+        if self._name_index is None:
+            active = self._active
+            self._name_index = SortedIndex.build([
+                casefold_sort_key(name) if active[row] else None
+                for row, name in enumerate(self._names)
+            ], self.__keys())
+        start, stop = self._name_index.prefix_span(casefold_sort_key(prefix))
+        return self._name_index.scan(start, min(stop, start + limit))
+
+    def __similar_names(self, name: str, threshold: float, limit: int) -> List[int]:
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold must be in (0, 1]')
+        if self._name_trigrams is None:
+            active = self._active
+            self._name_trigrams = TrigramIndex.build([
+                name if active[row] else None for row, name in enumerate(self._names)
+            ])
+        matches = self._name_trigrams.similar(name, threshold, self.__key)
+        return [row for _, row in matches[:limit]]
+
+    def __index_name(self, row: int) -> None:
+        if self._active[row]:
+            if self._name_index is not None:
+                self._name_index.add(
+                    row, casefold_sort_key(self._names[row]), self.__key(row))
+            if self._name_trigrams is not None:
+                self._name_trigrams.add(row, self._names[row])
+            if self._unique_names is not None:
+                self._unique_names.put(row, casefold_sort_key(self._names[row]))
+
+    def __unindex_name(self, row: int) -> None:
+        if self._active[row]:
+            if self._name_index is not None:
+                self._name_index.remove(
+                    row, casefold_sort_key(self._names[row]), self.__key(row))
+            if self._name_trigrams is not None:
+                self._name_trigrams.remove(row, self._names[row])
+            if self._unique_names is not None:
+                self._unique_names.discard(row)
+
+    def __check_unique_names(
+        self, entities: List[Category], rows: Optional[List[int]] = None
+    ) -> None:
+        # rows are the ones being rewritten by an update; inserts own no row yet.
+        if not self.enforce_unique:
+            return
+        if self._unique_names is None:
+            self._unique_names = UniqueIndex()
+            for active_row in self.__active_rows():
+                self._unique_names.put(active_row, casefold_sort_key(self._names[active_row]))
+        batch = set()
+        for entity, row in zip(entities, rows or [None] * len(entities)):
+            if entity.is_active:
+                key = casefold_sort_key(entity.name)
+                if self._unique_names.conflicts(row, key) or key in batch:
+                    raise DuplicateValueException('name', entity.name)
+                batch.add(key)
+
+    def __time_range(
+        self, field_name: str, start: Optional[datetime], end: Optional[datetime]
+    ) -> List[int]:
+        if field_name not in self._time_indexes:
+            column = self.__timestamps(field_name)
+            self._time_indexes[field_name] = SortedIndex.build(
+                list(map(_index_key, column)), self.__keys())
+        index = self._time_indexes[field_name]
+        span = index.span(
+            None if start is None else _to_timestamp(start), True,
+            None if end is None else _to_timestamp(end), False)
+        active = self._active
+        return [row for row in index.scan(*span) if active[row]]
+
+    def __timestamps(self, field_name: str) -> array:
+        return self._created_at if field_name == 'created_at' else self._updated_at
+
+    def __set_timestamp(self, field_name: str, row: int, value: int) -> None:
+        column = self.__timestamps(field_name)
+        index = self._time_indexes.get(field_name)
+        if index is not None and column[row] != value:
+            index.remove(row, _index_key(column[row]), self.__key(row))
+            index.add(row, _index_key(value), self.__key(row))
+        column[row] = value
+
+    def __sort(self, rows: List[int], sort_by: str | None, sort_dir: str | None) -> List[int]:
+        order = [
+            (field_name, direction == 'desc')
+            for field_name, direction in parse_sort(sort_by, sort_dir)
+            if field_name in self.sortable_fields
+        ] or [('created_at', sort_dir == 'desc')]
+        # Raw UUID bytes order like the canonical ID strings.
+        order.append((None, order[-1][1]))
+        for field_name, is_reverse in reversed(order):
+            rows = sorted(rows, key=self.__sort_key(field_name, is_reverse), reverse=is_reverse)
+        return rows
+
+    def __sort_key(self, sort_by: str | None, is_reverse: bool) -> Callable[[int], Any]:
+        # Text keys are not stored per row to keep the layout compact, so they
+        # are folded here with the same collation as InMemoryRepository.
+        # Nullable columns sort nulls last, like the other engines.
+        sort_key = self.sort_key
+        if sort_by == 'name':
+            return lambda row: sort_key(self._names[row])
+        if sort_by == 'description':
+            descriptions = self._descriptions
+            return lambda row: nulls_last(sort_key(descriptions[row]), is_reverse)
+        if sort_by == 'is_active':
+            return self._active.__getitem__
+        if sort_by == 'updated_at':
+            updated_at = self._updated_at
+            return lambda row: nulls_last(_index_key(updated_at[row]), is_reverse)
+        if sort_by == 'created_at':
+            return self._created_at.__getitem__
+        return self.__id_bytes()
+
+    def __active_rows(self) -> List[int]:
+        active = self._active
+        return [row for row in range(len(active)) if active[row]]
+
+    def __find_row(self, id_: str | UniqueEntityId) -> int:
+        row = self.__row(_parse_key(id_))
+        if row is None or not self._active[row]:
+            raise EntityNotFoundException(f'Entity not found using ID: {id_}')
+        return row
+
+    def __row(self, key: Optional[int]) -> Optional[int]:
+        # The row (live or deleted) holding the key; None when there is none.
+        if key is None:
+            return None
+        order, id_bytes = self._id_order, self.__id_bytes()
+        position = bisect.bisect_left(order, key.to_bytes(ID_SIZE, 'big'), key=id_bytes)
+        if position < len(order) and self.__key(order[position]) == key:
+            return order[position]
+        return None
+
+    def __order_ids(self, first_row: int) -> None:
+        # Files the rows appended from first_row into _id_order: bisected in
+        # one by one for a small batch, otherwise all rows are sorted again.
+        rows, id_bytes = range(first_row, len(self._names)), self.__id_bytes()
+        if len(rows) * 32 < len(self._id_order):
+            for row in rows:
+                bisect.insort(self._id_order, row, key=id_bytes)
+        else:
+            self._id_order = array('q', sorted(range(len(self._names)), key=id_bytes))
+
+    def __id_bytes(self) -> Callable[[int], bytearray]:
+        # A row's raw ID, which orders like its key.
+        ids = self._ids
+        return lambda row: ids[row * ID_SIZE:(row + 1) * ID_SIZE]
+
+    def __append(self, entity: Category) -> None:
+        self._ids += entity.unique_entity_id.bytes_
+        self._names.append(self.__intern(entity.name))
+        self._descriptions.append(self.__intern(entity.description))
+        self._active.append(1 if entity.is_active else 0)
+        self._created_at.append(_to_timestamp(entity.created_at))
+        self._updated_at.append(_to_timestamp(entity.updated_at))
+        self._versions.append(entity.version)
+        row = len(self._names) - 1
+        for field_name, index in self._time_indexes.items():
+            index.add(row, _index_key(self.__timestamps(field_name)[row]), self.__key(row))
+        self.__index_name(row)
+        entity.clear_changes()
+
+    def __key(self, row: int) -> int:
+        offset = row * ID_SIZE
+        return int.from_bytes(self._ids[offset:offset + ID_SIZE], 'big')
+
+    def __keys(self) -> List[int]:
+        # Every row's key, the ID tie-break of the sorted indexes.
+        return list(map(self.__key, range(len(self._active))))
+
+    def __record_change(self, row: int) -> None:
+        key = self.__key(row)
+        self._changes.record(key, key)
+
+    def __write(self, row: int, entity: Category) -> None:
+        self.__unindex_name(row)
+        name, description = self._names[row], self._descriptions[row]
+        self._names[row] = self.__intern(entity.name)
+        self._descriptions[row] = self.__intern(entity.description)
+        self.__release(name, description)
+        self._active[row] = 1 if entity.is_active else 0
+        self._versions[row] = entity.version
+        self.__index_name(row)
+        self.__set_timestamp('created_at', row, _to_timestamp(entity.created_at))
+        self.__set_timestamp('updated_at', row, _to_timestamp(entity.updated_at))
+
+    def __intern(self, value: Optional[str]) -> Optional[str]:
+        return value if self.string_pool is None else self.string_pool.intern(value)
+
+    def __release(self, *values: Optional[str]) -> None:
+        if self.string_pool is not None:
+            for value in values:
+                self.string_pool.release(value)
+
+    def __materialize(self, row: int) -> Category:
+        offset = row * ID_SIZE
+        id_ = UniqueEntityId.from_bytes(bytes(self._ids[offset:offset + ID_SIZE]))
+        return Category.rehydrate({
+            'unique_entity_id': id_,
+            'name': self._names[row],
+            'description': self._descriptions[row],
+            'is_active': bool(self._active[row]),
+            'created_at': _from_timestamp(self._created_at[row]),
+            'updated_at': _from_timestamp(self._updated_at[row]),
+            'version': self._versions[row],
+        })
+
+    def __reset(self) -> None:
+        self._ids = bytearray()
+        self._id_order = array('q')
+        self._names = []
+        self._descriptions = []
+        self._active = bytearray()
+        self._created_at = array('q')
+        self._updated_at = array('q')
+        self._versions = array('q')
+        self._time_indexes = {}
+        self._name_index = None
+        self._name_trigrams = None
+        self._unique_names = None
@@ -0,0 +1,465 @@
+import datetime
+import unittest
+import uuid
+
+from django.conf import settings
+
+from core.domain.__seedwork.exceptions import (
+    DuplicateValueException, EntityAlreadyExistsException, EntityNotFoundException,
+    EntityValidationException, EntityVersionConflictException, InvalidFilterException
+)
+from core.domain.__seedwork.filters import FieldFilter
+from core.domain.__seedwork.repositories import StringPool
+from core.domain.category.repositories import CategoryRepository
+from core.domain.category.entities import Category
+
+from .compact_repositories import CategoryCompactInMemoryRepository
+from .repositories import CategoryInMemoryRepository
+
+
+class CategoryCompactInMemoryRepositoryUnitTests(unittest.TestCase):
+
+    repo: CategoryCompactInMemoryRepository
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = CategoryCompactInMemoryRepository()
+
+    def test_if_factory_return_a_category_repository_instance(self):
+        self.assertIsInstance(self.repo, CategoryRepository)
+        self.assertEqual(self.repo.sortable_fields, CategoryInMemoryRepository.sortable_fields)
+
+    def test_insert_stores_columns_and_materializes_on_read(self):
+        entity = Category(name='Movie', description='some description')
+        self.repo.insert(entity)
+
+        self.assertEqual(len(self.repo._ids), 16)
+        self.assertEqual(self.repo._names, ['Movie'])
+        self.assertEqual(list(self.repo._active), [1])
+
+        found = self.repo.find_by_id(entity.id)
+        self.assertEqual(found, entity)
+        self.assertIsNot(found, entity)
+        self.assertEqual(found.created_at, entity.created_at)
+        self.assertEqual(self.repo.find_by_id(entity.unique_entity_id), entity)
+        self.assertEqual(self.repo.find_all(), [entity])
+
+        with self.assertRaises(EntityAlreadyExistsException):
+            self.repo.insert(entity)
+
+    def test_find_by_id_throws_exception_when_entity_not_found(self):
+        for id_ in ['fake id', 'af46842e-027d-4c91-b259-3a3642144ba4']:
+            with self.assertRaises(EntityNotFoundException) as assert_error:
+                self.repo.find_by_id(id_)
+            self.assertEqual(assert_error.exception.args[0], f"Entity not found using ID: {id_}")
+
+    def test_insert_many_rejects_the_whole_batch_on_duplicates(self):
+        entity = Category(name='Movie')
+        self.repo.insert(entity)
+
+        with self.assertRaises(EntityAlreadyExistsException):
+            self.repo.insert_many([Category(name='Other'), entity])
+        self.assertEqual(self.repo.find_all(), [entity])
+
+    def test_find_known_ids_and_versions(self):
+        live, deleted = Category(name='Movie'), Category(name='Other')
+        self.repo.insert_many([live, deleted])
+        self.repo.delete(deleted.id)
+        ids = [live.id.upper(), deleted.unique_entity_id, Category(name='New').id, 'fake id']
+        self.assertEqual(self.repo.find_known_ids(ids), {live.id, deleted.id})
+        self.assertEqual(self.repo.find_versions(ids), {live.id: live.version})
+
+    def test_ids_are_read_like_canonical_id(self):
+        entity = Category(unique_entity_id='00000000-0000-0000-0000-000000000abc', name='Movie')
+        others = [Category(name=f'cat_{i}') for i in range(40)]
+        self.repo.insert_many([*others, entity])
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert(entity)
+        ids = [
+            '{00000000-0000-0000-0000-000000000abc}',
+            'urn:uuid:00000000-0000-0000-0000-000000000abc',
+            '00000000000000000000000000000ABC',
+            uuid.UUID(int=0xabc),
+            'abc', '0xabc', ' 00000000-0000-0000-0000-000000000abc', 'fake id',
+        ]
+        for id_ in ids:
+            self.assertEqual(
+                self.repo.find_known_ids([id_]), object_repo.find_known_ids([id_]),
+                msg=f'Failed with: {id_!r}')
+        self.assertEqual(self.repo.find_by_id(ids[0]), entity)
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.find_by_id('abc')
+        # The ID order is kept across single inserts, batches and compaction.
+        for category in others[:5]:
+            self.repo.delete(category.id)
+        self.repo.compact(datetime.timedelta(0))
+        self.repo.insert(Category(name='cat_new'))
+        for category in [entity, *others[5:]]:
+            self.assertEqual(self.repo.find_by_id(category.id), category)
+
+    def test_load(self):
+        created_at = datetime.datetime(2022, 1, 1, 12, 30, 15, 123456)
+        self.repo.load([{
+            'id': 'af46842e-027d-4c91-b259-3a3642144ba4',
+            'name': 'Movie',
+            'description': None,
+            'is_active': True,
+            'created_at': created_at,
+            'updated_at': None,
+        }])
+
+        entity = self.repo.find_by_id('af46842e-027d-4c91-b259-3a3642144ba4')
+        self.assertEqual(entity.name, 'Movie')
+        self.assertIsNone(entity.description)
+        self.assertEqual(entity.created_at, created_at)
+        self.assertIsNone(entity.updated_at)
+
+    def test_update(self):
+        entity = Category(name='Movie')
+        self.repo.insert(entity)
+
+        entity.update('Movie changed', 'some description')
+        self.repo.update(entity)
+
+        found = self.repo.find_by_id(entity.id)
+        self.assertEqual(found.name, 'Movie changed')
+        self.assertEqual(found.description, 'some description')
+        self.assertEqual(found.updated_at, entity.updated_at)
+        self.assertEqual(entity.changed_fields, frozenset())
+
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.update(Category(name='Other'))
+
+    def test_update_compares_and_bumps_version(self):
+        category = Category(name='Movie')
+        self.repo.insert(category)
+        stale = self.repo.find_by_id(category.id)
+        category.update('Film')
+        self.repo.update(category)
+        self.assertEqual(category.version, 1)
+        stale.update('Series')
+        with self.assertRaises(EntityVersionConflictException):
+            self.repo.update(stale)
+        self.assertEqual(self.repo.find_by_id(category.id), category)
+        self.repo.delete(category.id)
+        self.assertEqual(self.repo.find_changed_since().items[0].entity.version, 2)
+
+    def test_batches_are_all_or_nothing(self):
+        categories = [Category(name=f'cat_{i}') for i in range(3)]
+        self.repo.insert_many(categories)
+        stale = self.repo.find_by_id(categories[2].id)
+        categories[2].update('cat_2_updated')
+        self.repo.update(categories[2])
+        for category in categories[:2]:
+            category.update(f'{category.name}_updated')
+        stale.update('cat_2_stale')
+        with self.assertRaises(EntityVersionConflictException):
+            self.repo.update_many([*categories[:2], stale])
+        self.assertEqual(
+            [category.name for category in self.repo.find_all()],
+            ['cat_0', 'cat_1', 'cat_2_updated'])
+
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.delete_many([categories[0].id, 'fake id'])
+        self.assertEqual(len(self.repo.find_all()), 3)
+        self.repo.update_many(categories[:2])
+        self.repo.delete_many([categories[0].id, categories[0].id, categories[1].id])
+        self.assertEqual(self.repo.find_all(), [categories[2]])
+        self.assertEqual(
+            [change.entity.version for change in self.repo.find_changed_since().items],
+            [1, 2, 2])
+
+    def test_timezone_aware_datetimes_are_rejected(self):
+        aware = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        category = Category(name='Movie')
+        with self.assertRaises(EntityValidationException) as assert_error:
+            self.repo.insert_many([category, Category(name='Film', created_at=aware)])
+        self.assertEqual(assert_error.exception.fields_errors, {
+            'created_at': ['Timezone-aware datetimes are not supported.']})
+        self.assertEqual((self.repo.find_all(), len(self.repo._names)), ([], 0))
+
+        self.repo.insert(category)
+        with self.assertRaises(EntityValidationException):
+            self.repo.update(Category.rehydrate({
+                **category.to_dict(), 'name': 'Film', 'updated_at': aware}))
+        self.assertEqual(self.repo.find_all(), [category])
+        with self.assertRaises(ValueError):
+            self.repo.find_created_between(aware)
+
+    def test_delete_and_compact(self):
+        entity = Category(name='Movie')
+        other = Category(name='Other')
+        self.repo.insert_many([entity, other])
+
+        version = self.repo.find_changed_since().version
+        self.repo.delete(entity.id)
+        deleted = self.repo.find_changed_since().version
+
+        self.assertEqual(self.repo.find_all(), [other])
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.find_by_id(entity.id)
+        with self.assertRaises(EntityAlreadyExistsException):
+            self.repo.insert(entity)
+
+        self.assertEqual(self.repo.compact(datetime.timedelta(days=1)), 0)
+        self.assertEqual(self.repo.compact(datetime.timedelta(0)), 1)
+        self.assertEqual(self.repo._names, ['Other'])
+        self.assertEqual(self.repo.find_by_id(other.id), other)
+        # Watermarks that had not seen the purged deletion must resync.
+        self.assertTrue(self.repo.find_changed_since(version).resync)
+        self.assertFalse(self.repo.find_changed_since(deleted).resync)
+
+    def test_find_created_and_updated_between(self):
+        base = datetime.datetime(2022, 1, 1)
+        categories = [
+            Category(
+                name=f'cat_{i}',
+                created_at=base + datetime.timedelta(hours=i),
+                updated_at=base + datetime.timedelta(hours=10 - i) if i % 2 else None
+            )
+            for i in [3, 0, 9, 4, 1, 7, 2, 8, 5, 6]
+        ]
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert_many(categories)
+        self.repo.insert_many(categories)
+        windows = [
+            (None, None),
+            (base + datetime.timedelta(hours=2), base + datetime.timedelta(hours=5)),
+            (base + datetime.timedelta(hours=8), None),
+            (None, base + datetime.timedelta(hours=5)),
+        ]
+        for start, end in windows:
+            self.assertEqual(
+                self.repo.find_created_between(start, end),
+                object_repo.find_created_between(start, end))
+            self.assertEqual(
+                self.repo.find_updated_between(start, end),
+                object_repo.find_updated_between(start, end))
+
+        category = self.repo.find_created_between(end=base + datetime.timedelta(hours=1))[0]
+        category.update('cat_0 changed')
+        self.repo.update(category)
+        self.repo.delete(categories[0].id)
+        self.repo.insert(Category(
+            unique_entity_id='00000000-0000-4000-8000-000000000000',
+            name='cat_new', created_at=base))
+        # Equal timestamps come back by ID, not in insertion order
+        self.assertEqual(
+            [item.name for item in self.repo.find_created_between(
+                end=base + datetime.timedelta(hours=4))],
+            ['cat_new', 'cat_0 changed', 'cat_1', 'cat_2'])
+        self.assertEqual(
+            self.repo.find_updated_between(base + datetime.timedelta(days=1)), [category])
+
+    def test_find_changed_since(self):
+        version = self.repo.find_changed_since().version
+        movie = Category(name='Movie')
+        series = Category(name='Series')
+        self.repo.insert_many([movie, series])
+        movie.update('Movie changed')
+        self.repo.update(movie)
+        self.repo.delete(series.id)
+
+        changes = self.repo.find_changed_since(version)
+        self.assertEqual(
+            [(change.entity.name, change.entity.is_active) for change in changes.items],
+            [('Movie changed', True), ('Series', False)])
+        self.assertEqual(self.repo.find_changed_since(changes.version).items, [])
+
+        page = self.repo.find_changed_since(version, limit=1)
+        self.assertEqual([change.entity for change in page.items], [movie])
+        self.assertTrue(page.has_more)
+
+        self.repo.compact(datetime.timedelta(0))
+        self.assertEqual(
+            self.repo.find_changed_since(version).items, [changes.items[0]])
+
+    def test_find_by_name_prefix(self):
+        categories = [
+            Category(name=name) for name in ['Movies', 'music', 'Documentary', 'MOVIE night']
+        ]
+        self.repo.insert_many(categories)
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert_many(categories)
+        for prefix, limit in [('mo', 10), ('M', 2), ('d', 10), ('x', 10), ('', 3)]:
+            self.assertEqual(
+                self.repo.find_by_name_prefix(prefix, limit),
+                object_repo.find_by_name_prefix(prefix, limit))
+
+        categories[0].update('Series')
+        self.repo.update(categories[0])
+        self.repo.delete(categories[3].id)
+        self.repo.insert(Category(name='Mockumentary'))
+        self.assertEqual(
+            [category.name for category in self.repo.find_by_name_prefix('mo')],
+            ['Mockumentary'])
+
+        self.repo.compact(datetime.timedelta(0))
+        self.assertEqual(
+            [category.name for category in self.repo.find_by_name_prefix('m')],
+            ['Mockumentary', 'music'])
+
+    def test_find_by_similar_name(self):
+        categories = [
+            Category(name=name) for name in ['Movie', 'Documentary', 'Movies', 'Music', 'MOVIE']
+        ]
+        self.repo.insert_many(categories)
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert_many(categories)
+        for name, threshold, limit in [('movei', 0.3, 10), ('movie', 1.0, 10), ('mus', 0.05, 2)]:
+            self.assertEqual(
+                self.repo.find_by_similar_name(name, threshold, limit),
+                object_repo.find_by_similar_name(name, threshold, limit))
+
+        categories[0].update('Series')
+        self.repo.update(categories[0])
+        self.repo.delete(categories[4].id)
+        self.repo.insert(Category(name='movie'))
+        self.assertEqual(
+            [category.name for category in self.repo.find_by_similar_name('movie', 1.0)],
+            ['movie'])
+        with self.assertRaises(ValueError):
+            self.repo.find_by_similar_name('movie', 1.5)
+
+    def test_enforce_unique_names(self):
+        self.repo.insert_many([Category(name='Movie'), Category(name='movie')])
+
+        repo = CategoryCompactInMemoryRepository(enforce_unique=True)
+        movie, film = Category(name='Movie'), Category(name='Film')
+        repo.insert_many([movie, film])
+        with self.assertRaises(DuplicateValueException):
+            repo.insert(Category(name='MOVIE'))
+        with self.assertRaises(DuplicateValueException):
+            repo.insert_many([Category(name='Series'), Category(name='series')])
+        repo.insert(Category(name='movie', is_active=False))
+        film.update('movie')
+        with self.assertRaises(DuplicateValueException):
+            repo.update(film)
+        movie.update('MOVIE')
+        repo.update(movie)
+        repo.delete(movie.id)
+        repo.update(film)
+        self.assertEqual(repo.compact(datetime.timedelta(0)), 2)
+        with self.assertRaises(DuplicateValueException):
+            repo.insert(Category(name='Movie'))
+
+    def test_string_pool_dedups_names_and_descriptions(self):
+        self.repo = CategoryCompactInMemoryRepository(string_pool=StringPool())
+        self.repo.insert_many([
+            Category(name=''.join(['Mov', 'ie']), description=''.join(['shared ', 'text']))
+            for _ in range(3)
+        ])
+
+        self.assertIs(self.repo._names[0], self.repo._names[2])
+        self.assertIs(self.repo._descriptions[0], self.repo._descriptions[2])
+        self.assertEqual(self.repo.string_pool.stats()['hits'], 4)
+        self.assertEqual(self.repo.string_pool.stats()['size'], 2)
+
+        categories = self.repo.find_all()
+        categories[0].update('Film', 'other text')
+        self.repo.update(categories[0])
+        self.repo.delete(categories[1].id)
+        self.assertEqual(self.repo.string_pool.stats()['size'], 4)
+        self.repo.compact(datetime.timedelta(0))
+        self.assertEqual(self.repo.string_pool.stats()['size'], 4)
+        self.repo.delete(categories[0].id)
+        self.repo.compact(datetime.timedelta(0))
+        self.assertEqual(self.repo.string_pool.stats(), {
+            'size': 2, 'hits': 4, 'bytes_saved': 0})
+        self.assertIs(self.repo._names[0], self.repo.string_pool.intern('Movie'))
+
+    def test_is_active_facet_skips_deleted_rows(self):
+        categories = [Category(name=f'cat_{i}') for i in range(3)]
+        self.repo.insert_many([*categories, Category(name='inactive', is_active=False)])
+        self.repo.delete(categories[0].id)
+        result = self.repo.search(CategoryRepository.SearchParams(facets='is_active'))
+        self.assertEqual(result.facets, {'is_active': {True: 2}})
+
+    def test_sort_puts_nulls_last_like_the_object_layout(self):
+        base = datetime.datetime(2022, 1, 1)
+        categories = [
+            Category(name='bbb', description=None, created_at=base),
+            Category(name='aaa', description='y', created_at=base, updated_at=base),
+            Category(name='ccc', description='X', created_at=base),
+        ]
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert_many(categories)
+        self.repo.insert_many(categories)
+        for sort_by, sort_dir, expected in [
+            ('description', 'asc', ['ccc', 'aaa', 'bbb']),
+            ('description', 'desc', ['aaa', 'ccc', 'bbb']),
+            ('updated_at,name', 'asc', ['aaa', 'bbb', 'ccc']),
+            ('updated_at,name', 'desc,asc', ['aaa', 'bbb', 'ccc']),
+        ]:
+            params = CategoryRepository.SearchParams(sort_by=sort_by, sort_dir=sort_dir)
+            self.assertEqual(
+                [item.name for item in self.repo.search(params).items], expected, msg=params)
+            self.assertEqual(
+                self.repo.search(params).to_dict(), object_repo.search(params).to_dict())
+
+    def test_search_matches_object_layout(self):
+        categories = [
+            Category(
+                name=name,
+                description=description,
+                created_at=datetime.datetime(2022, 1, 1) + datetime.timedelta(seconds=i)
+            )
+            for i, (name, description) in enumerate(
+                [('bbb', 'x'), ('Aaa', None), ('aaa', 'Y'), ('ccc', 'z'), ('AAB', 'w')]
+            )
+        ]
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert_many(categories)
+        self.repo.insert_many(categories)
+
+        for params in [
+            CategoryRepository.SearchParams(),
+            CategoryRepository.SearchParams(per_page=2, page=2),
+            CategoryRepository.SearchParams(sort_by='name', sort_dir='desc'),
+            CategoryRepository.SearchParams(sort_by='name', filter_='aa'),
+            CategoryRepository.SearchParams(sort_by='fake', filter_='A', per_page=1),
+            CategoryRepository.SearchParams(sort_by='is_active,name', sort_dir='asc,desc'),
+            CategoryRepository.SearchParams(sort_by='fake,name', sort_dir='desc'),
+            CategoryRepository.SearchParams(sort_by=['name', 'created_at'], sort_dir='desc,asc'),
+            CategoryRepository.SearchParams(filter_=FieldFilter('description', 'eq', 'y')),
+            CategoryRepository.SearchParams(
+                filter_=FieldFilter('name', 'contains', 'aa')
+                & FieldFilter.between('created_at', datetime.datetime(2022, 1, 1, 0, 0, 1))),
+            CategoryRepository.SearchParams(
+                filter_=FieldFilter('name', 'gte', 'b') | FieldFilter('description', 'eq', None),
+                sort_by='name'),
+            CategoryRepository.SearchParams(filter_=FieldFilter('id', 'eq', categories[3].id)),
+            CategoryRepository.SearchParams(facets='is_active,created_month,fake'),
+            CategoryRepository.SearchParams(filter_='aa', facets='created_month'),
+        ]:
+            self.assertEqual(
+                self.repo.search(params).to_dict(), object_repo.search(params).to_dict())
+
+        with self.assertRaises(InvalidFilterException):
+            self.repo.search(CategoryRepository.SearchParams(filter_=FieldFilter('fake', 'eq', 1)))
+        with self.assertRaises(InvalidFilterException):
+            self.repo.search(CategoryRepository.SearchParams(
+                filter_=FieldFilter('created_at', 'gt', '2020-01-01')))
+
+
+class CategoryCompactInMemoryRepositoryAsyncUnitTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = CategoryCompactInMemoryRepository()
+
+    async def test_async_methods(self):
+        entity = Category(name='Movie')
+        await self.repo.insert_async(entity)
+        self.assertEqual(await self.repo.find_by_id_async(entity.id), entity)
+
+        entity.update('Movie changed', None)
+        await self.repo.update_async(entity)
+        result = await self.repo.search_async(CategoryRepository.SearchParams())
+        self.assertEqual(result.items[0].name, 'Movie changed')
+
+        await self.repo.delete_async(entity.id)
+        self.assertEqual(await self.repo.find_all_async(), [])
@@ -1,12 +1,33 @@
-from typing import List
+import asyncio
+from datetime import datetime
+from typing import List, Optional
 
-from core.domain.__seedwork.repositories import InMemoryRepository
+from core.domain.__seedwork.changes import ChangeSet
+from core.domain.__seedwork.repositories import InMemoryRepository, parse_sort
 from core.domain.category.repositories import CategoryRepository
 from core.domain.category.entities import Category
 
 
+def _created_month(category: Category) -> str:
+    return f'{category.created_at.year:04d}-{category.created_at.month:02d}'
+
+
+def _is_active(category: Category) -> bool:
+    return category.is_active
+
+
 class CategoryInMemoryRepository(CategoryRepository, InMemoryRepository):
 
+    entity_class = Category
+    interned_fields = ('name', 'description')
+    trigram_fields = ('name',)
+    unique_fields = ('name',)
+    # Deleted categories are not searched, so they never count under is_active.
+    facet_fields = {
+        'is_active': _is_active,
+        'created_month': _created_month,
+    }
+
     sortable_fields: List[str] = [
         'name',
         'description',
@@ -15,6 +36,57 @@ class CategoryInMemoryRepository(CategoryRepository, InMemoryRepository):
         'is_active'
     ]
 
+    def find_created_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return self._find_range('created_at', start, end)
+
+    async def find_created_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_created_between(start, end)
+
+    def find_updated_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return self._find_range('updated_at', start, end)
+
+    async def find_updated_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_updated_between(start, end)
+
+    def find_changed_since(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        return self._changes_since(version, limit)
+
+    async def find_changed_since_async(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_changed_since(version, limit)
+
+    def find_by_name_prefix(self, prefix: str, limit: int = 10) -> List[Category]:
+        return self._find_prefix('name', prefix, limit)
+
+    async def find_by_name_prefix_async(self, prefix: str, limit: int = 10) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_by_name_prefix(prefix, limit)
+
+    def find_by_similar_name(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        return self._find_similar('name', name, threshold, limit)
+
+    async def find_by_similar_name_async(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        await asyncio.sleep(self.TEST_ASYNC_DELAY)
+        return self.find_by_similar_name(name, threshold, limit)
+
     def _apply_filter(self, items: List[Category], filter_: str | None) -> List[Category]:
         if filter_:
             filtered = filter(lambda item: filter_.lower() in item.name.lower(), items)
@@ -25,6 +97,14 @@ class CategoryInMemoryRepository(CategoryRepository, InMemoryRepository):
         self, items: List[Category],
         sort_by: str | None = None, sort_dir: str | None = None
     ) -> List[Category]:
-        sort_by = 'created_at' if sort_by is None or\
-            sort_by not in self.sortable_fields else sort_by
-        return super()._apply_sort(items, sort_by, sort_dir)
+        order = [
+            (field_name, direction) for field_name, direction in parse_sort(sort_by, sort_dir)
+            if field_name in self.sortable_fields
+        ]
+        if not order:
+            return super()._apply_sort(items, 'created_at', sort_dir)
+        return super()._apply_sort(
+            items,
+            [field_name for field_name, _ in order],
+            [direction for _, direction in order]
+        )
@@ -1,9 +1,12 @@
 import copy
+import datetime
 import random
 import unittest
 
 from django.conf import settings
 
+from core.domain.__seedwork.exceptions import InvalidFilterException
+from core.domain.__seedwork.repositories import StringPool
 from core.domain.category.repositories import CategoryRepository
 from core.domain.category.entities import Category
 
@@ -60,3 +63,69 @@ class CategoryInMemoryRepositoryUnitTests(unittest.TestCase):
         self.assertEqual(categories_sorted, categories_source)
         categories_sorted = self.repo._apply_sort(categories_copy, 'fake_prop')
         self.assertEqual(categories_sorted, categories_source)
+        categories_sorted = self.repo._apply_sort(categories_copy, 'name,fake_prop', 'desc')
+        self.assertEqual(categories_sorted, sorted(
+            categories_source, key=lambda category: category.name, reverse=True))
+
+    def test_load_method(self):
+        categories = [Category(name=f"cat_{i}") for i in range(5)]
+        self.repo.load(category.to_dict() for category in categories)
+        self.assertEqual(self.repo.find_all(), categories)
+        self.assertTrue(all(isinstance(item, Category) for item in self.repo._items))
+
+    def test_string_pool_dedups_names_and_descriptions(self):
+        self.repo = CategoryInMemoryRepository(string_pool=StringPool())
+        categories = [
+            Category(name=f"cat_{i}", description=''.join(['shared ', 'text']))
+            for i in range(3)
+        ]
+        self.repo.insert_many(categories)
+        self.assertIs(self.repo._items[0].description, self.repo._items[2].description)
+        self.assertEqual(self.repo.string_pool.stats()['size'], 4)
+        self.assertEqual(self.repo.string_pool.stats()['hits'], 2)
+
+    def test_find_created_and_updated_between(self):
+        base = datetime.datetime(2022, 1, 1)
+        categories = [
+            Category(
+                name=f'cat_{i}',
+                created_at=base + datetime.timedelta(hours=i),
+                updated_at=base + datetime.timedelta(hours=10 - i) if i % 2 else None
+            )
+            for i in random.sample(range(10), 10)
+        ]
+        self.repo.insert_many(categories)
+        by_name = {category.name: category for category in categories}
+
+        self.assertEqual(
+            self.repo.find_created_between(
+                base + datetime.timedelta(hours=2), base + datetime.timedelta(hours=5)),
+            [by_name['cat_2'], by_name['cat_3'], by_name['cat_4']])
+        self.assertEqual(
+            self.repo.find_created_between(base + datetime.timedelta(hours=8)),
+            [by_name['cat_8'], by_name['cat_9']])
+        self.assertEqual(len(self.repo.find_created_between()), 10)
+        self.assertEqual(
+            self.repo.find_updated_between(end=base + datetime.timedelta(hours=5)),
+            [by_name['cat_9'], by_name['cat_7']])
+
+        category = by_name['cat_2']
+        category.update('cat_2 changed')
+        self.repo.update(category)
+        self.repo.delete(by_name['cat_3'].id)
+        self.assertEqual(
+            [item.name for item in self.repo.find_created_between(
+                base + datetime.timedelta(hours=2), base + datetime.timedelta(hours=5))],
+            ['cat_2 changed', 'cat_4'])
+        self.assertEqual(
+            self.repo.find_updated_between(base + datetime.timedelta(days=1)), [category])
+
+        with self.assertRaises(InvalidFilterException):
+            self.repo._find_range('fake', base)
+
+    def test_find_by_similar_name(self):
+        categories = [Category(name=name) for name in ['Documentary', 'Movie', 'Movies', 'Music']]
+        self.repo.insert_many(categories)
+        self.assertEqual(self.repo.find_by_similar_name('movei'), [categories[1], categories[2]])
+        self.assertEqual(self.repo.find_by_similar_name('docmentary', limit=1), [categories[0]])
+        self.assertEqual(self.repo.find_by_similar_name('movei', threshold=0.9), [])
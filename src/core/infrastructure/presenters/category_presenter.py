@@ -1,6 +1,7 @@
-from dataclasses import asdict
+from dataclasses import fields, is_dataclass
+import functools
 import json
-from typing import Generic, TypeVar
+from typing import Any, Generic, Tuple, TypeVar
 
 from core.usecase.category.use_cases import (
     CreateCategoryUseCase,
@@ -22,4 +23,17 @@ class CategoryPresenter(Generic[T]):
 
     @staticmethod
     def output_to_json(output: T) -> str:
-        return json.dumps(asdict(output), indent=4, default=str)
+        return json.dumps(output, indent=4, default=_to_json_default)
+
+
+@functools.cache
+def _fields_names(cls: type) -> Tuple[str, ...]:
+    return tuple(field.name for field in fields(cls))
+
+
+def _to_json_default(value: Any) -> Any:
+    # json.dumps walks nested containers itself, so dataclasses only need a
+    # shallow dict instead of the deep copy made by dataclasses.asdict.
+    if is_dataclass(value) and not isinstance(value, type):
+        return {name: getattr(value, name) for name in _fields_names(value.__class__)}
+    return str(value)
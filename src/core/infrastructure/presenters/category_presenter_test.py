@@ -3,6 +3,7 @@ import json
 import unittest
 import uuid
 
+from core.usecase.category.dto import CategoryOutput
 from core.usecase.category.use_cases import (
     CreateCategoryUseCase,
     GetCategoryUseCase,
@@ -89,7 +90,8 @@ class CategoryPresenterUnitTest(unittest.TestCase):
             'total': 2,
             'current_page': 1,
             'per_page': 2,
-            'last_page': 1
+            'last_page': 1,
+            'facets': None
         }
         json_output = CategoryPresenter.output_to_json(
             ListCategoryUseCase.Output(**data_test)
@@ -99,3 +101,28 @@ class CategoryPresenterUnitTest(unittest.TestCase):
             json_output
         )
         print(json_output)
+
+    def test_list_category_use_case_output_with_dataclass_items_to_json(self):
+        item_data = {
+            'id': str(uuid.uuid4()),
+            'name': 'foo',
+            'description': None,
+            'is_active': True,
+            'created_at': datetime.datetime.now(),
+            'updated_at': None,
+        }
+        data_test = {
+            'items': [item_data],
+            'total': 1,
+            'current_page': 1,
+            'per_page': 10,
+            'last_page': 1,
+            'facets': {'is_active': {'True': 1}}
+        }
+        json_output = CategoryPresenter.output_to_json(
+            ListCategoryUseCase.Output(**{**data_test, 'items': [CategoryOutput(**item_data)]})
+        )
+        self.assertEqual(
+            json.dumps(data_test, indent=4, default=str),
+            json_output
+        )
@@ -0,0 +1,461 @@
+import asyncio
+from collections import Counter
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+import heapq
+from itertools import chain, islice
+from operator import attrgetter
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+)
+import zlib
+
+from core.domain.__seedwork.changes import ChangeSet
+from core.domain.__seedwork.exceptions import (
+    DuplicateValueException, EntityAlreadyExistsException, EntityNotFoundException,
+    EntityVersionConflictException
+)
+from core.domain.__seedwork.filters import casefold_sort_key, fields_types
+from core.domain.__seedwork.indexes import UniqueIndex, trigram_similarity
+from core.domain.__seedwork.repositories import nulls_last, parse_sort
+from core.domain.__seedwork.value_objects import UniqueEntityId, canonical_id
+from core.domain.category.repositories import CategoryRepository
+from core.domain.category.entities import Category
+
+
+@dataclass(slots=True)
+class ShardedCategoryRepository(CategoryRepository):
+
+    shards: List[CategoryRepository]
+    enforce_unique: bool = False
+    # Active category IDs by case-folded name over all shards, since a shard
+    # only sees its own categories. Built from the shards on the first checked
+    # write and kept in step with writes made through this repository.
+    _unique_names: Optional[UniqueIndex] = field(default=None, repr=False, compare=False)
+    # One per shard, for async writes; see _locked.
+    _locks: Optional[List[asyncio.Lock]] = field(default=None, repr=False, compare=False)
+
+    DEFAULT_SORT_BY = 'created_at'
+
+    def __post_init__(self):
+        if not self.shards:
+            raise ValueError('ShardedCategoryRepository requires at least one shard')
+
+    @property
+    def sortable_fields(self) -> List[str]:
+        return self.shards[0].sortable_fields
+
+    @property
+    def sort_key(self) -> Callable[[Any], Any]:
+        return self.shards[0].sort_key
+
+    def insert(self, entity: Category) -> None:
+        with self._claim_names([entity]):
+            self._shard_for(entity.unique_entity_id).insert(entity)
+
+    async def insert_async(self, entity: Category) -> None:
+        shard = self._shard_for(entity.unique_entity_id)
+        async with self._locked([shard]):
+            with self._claim_names([entity]):
+                await shard.insert_async(entity)
+
+    def insert_many(self, entities: List[Category]) -> None:
+        # A shard only checks its own group, so the IDs are checked against
+        # every shard, deleted entities included, before any group is written:
+        # a duplicate leaves all shards as they were.
+        groups = self._group_by_shard(entities)
+        _check_new_ids(entities, set().union(*(
+            shard.find_known_ids([entity.id for entity in group]) for shard, group in groups)))
+        with self._claim_names(entities):
+            for shard, group in groups:
+                shard.insert_many(group)
+
+    async def insert_many_async(self, entities: List[Category]) -> None:
+        groups = self._group_by_shard(entities)
+        async with self._locked([shard for shard, _ in groups]):
+            known_ids = await asyncio.gather(*(
+                shard.find_known_ids_async([entity.id for entity in group])
+                for shard, group in groups))
+            _check_new_ids(entities, set().union(*known_ids))
+            with self._claim_names(entities):
+                await asyncio.gather(*(shard.insert_many_async(group) for shard, group in groups))
+
+    def update(self, entity: Category) -> None:
+        with self._claim_names([entity]):
+            self._shard_for(entity.unique_entity_id).update(entity)
+
+    async def update_async(self, entity: Category) -> None:
+        shard = self._shard_for(entity.unique_entity_id)
+        async with self._locked([shard]):
+            with self._claim_names([entity]):
+                await shard.update_async(entity)
+
+    def update_many(self, entities: List[Category]) -> None:
+        # A shard only checks its own group, so every group is checked before
+        # any is written: a missing or stale entity leaves all shards as they
+        # were.
+        groups = self._group_by_shard(entities)
+        for shard, group in groups:
+            _check_versions(group, shard.find_versions([entity.id for entity in group]))
+        with self._claim_names(entities):
+            for shard, group in groups:
+                shard.update_many(group)
+
+    async def update_many_async(self, entities: List[Category]) -> None:
+        groups = self._group_by_shard(entities)
+        async with self._locked([shard for shard, _ in groups]):
+            versions = await asyncio.gather(*(
+                shard.find_versions_async([entity.id for entity in group])
+                for shard, group in groups))
+            for (_, group), found in zip(groups, versions):
+                _check_versions(group, found)
+            with self._claim_names(entities):
+                await asyncio.gather(*(shard.update_many_async(group) for shard, group in groups))
+
+    def delete(self, id_: str | UniqueEntityId) -> None:
+        self._shard_for(id_).delete(id_)
+        self._release_name(id_)
+
+    async def delete_async(self, id_: str | UniqueEntityId) -> None:
+        shard = self._shard_for(id_)
+        async with self._locked([shard]):
+            await shard.delete_async(id_)
+        self._release_name(id_)
+
+    def delete_many(self, ids: List[str | UniqueEntityId]) -> None:
+        # Like update_many, nothing is deleted unless every ID is found.
+        groups = self._group_ids_by_shard(ids)
+        for shard, group in groups:
+            _check_found(group, shard.find_versions(group))
+        for shard, group in groups:
+            shard.delete_many(group)
+            for id_ in group:
+                self._release_name(id_)
+
+    async def delete_many_async(self, ids: List[str | UniqueEntityId]) -> None:
+        groups = self._group_ids_by_shard(ids)
+        async with self._locked([shard for shard, _ in groups]):
+            versions = await asyncio.gather(
+                *(shard.find_versions_async(group) for shard, group in groups))
+            for (_, group), found in zip(groups, versions):
+                _check_found(group, found)
+            await asyncio.gather(*(shard.delete_many_async(group) for shard, group in groups))
+        for id_ in ids:
+            self._release_name(id_)
+
+    def find_by_id(self, id_: str | UniqueEntityId) -> Category:
+        return self._shard_for(id_).find_by_id(id_)
+
+    def find_known_ids(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        return set().union(*(shard.find_known_ids(group)
+                             for shard, group in self._group_ids_by_shard(ids)))
+
+    async def find_known_ids_async(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        results = await asyncio.gather(*(
+            shard.find_known_ids_async(group) for shard, group in self._group_ids_by_shard(ids)))
+        return set().union(*results)
+
+    def find_versions(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        versions = {}
+        for shard, group in self._group_ids_by_shard(ids):
+            versions.update(shard.find_versions(group))
+        return versions
+
+    async def find_versions_async(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        results = await asyncio.gather(*(
+            shard.find_versions_async(group) for shard, group in self._group_ids_by_shard(ids)))
+        versions = {}
+        for result in results:
+            versions.update(result)
+        return versions
+
+    async def find_by_id_async(self, id_: str | UniqueEntityId) -> Category:
+        return await self._shard_for(id_).find_by_id_async(id_)
+
+    def find_all(self) -> List[Category]:
+        return list(chain.from_iterable(shard.find_all() for shard in self.shards))
+
+    async def find_all_async(self) -> List[Category]:
+        results = await asyncio.gather(*(shard.find_all_async() for shard in self.shards))
+        return list(chain.from_iterable(results))
+
+    def find_created_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return self._merge_by(
+            'created_at', [shard.find_created_between(start, end) for shard in self.shards])
+
+    async def find_created_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        results = await asyncio.gather(
+            *(shard.find_created_between_async(start, end) for shard in self.shards))
+        return self._merge_by('created_at', results)
+
+    def find_updated_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return self._merge_by(
+            'updated_at', [shard.find_updated_between(start, end) for shard in self.shards])
+
+    async def find_updated_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        results = await asyncio.gather(
+            *(shard.find_updated_between_async(start, end) for shard in self.shards))
+        return self._merge_by('updated_at', results)
+
+    def find_changed_since(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        return self._merge_changes(
+            version, limit, [shard.find_changed_since(version, limit) for shard in self.shards])
+
+    async def find_changed_since_async(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        results = await asyncio.gather(
+            *(shard.find_changed_since_async(version, limit) for shard in self.shards))
+        return self._merge_changes(version, limit, results)
+
+    def find_by_name_prefix(self, prefix: str, limit: int = 10) -> List[Category]:
+        return self._merge_by_name(
+            limit, [shard.find_by_name_prefix(prefix, limit) for shard in self.shards])
+
+    async def find_by_name_prefix_async(self, prefix: str, limit: int = 10) -> List[Category]:
+        results = await asyncio.gather(
+            *(shard.find_by_name_prefix_async(prefix, limit) for shard in self.shards))
+        return self._merge_by_name(limit, results)
+
+    def find_by_similar_name(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        return self._merge_by_similarity(name, limit, [
+            shard.find_by_similar_name(name, threshold, limit) for shard in self.shards])
+
+    async def find_by_similar_name_async(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        results = await asyncio.gather(*(
+            shard.find_by_similar_name_async(name, threshold, limit) for shard in self.shards))
+        return self._merge_by_similarity(name, limit, results)
+
+    def search(self, input_: CategoryRepository.SearchParams) -> CategoryRepository.SearchResult:
+        shard_input = self._shard_search_params(input_)
+        results = [shard.search(shard_input) for shard in self.shards]
+        return self._gather(input_, results)
+
+    async def search_async(
+        self, input_: CategoryRepository.SearchParams
+    ) -> CategoryRepository.SearchResult:
+        shard_input = self._shard_search_params(input_)
+        results = await asyncio.gather(
+            *(shard.search_async(shard_input) for shard in self.shards))
+        return self._gather(input_, results)
+
+    def _shard_for(self, id_: str | UniqueEntityId) -> CategoryRepository:
+        return self.shards[self._shard_index(id_)]
+
+    def _shard_index(self, id_: str | UniqueEntityId) -> int:
+        return zlib.crc32(canonical_id(id_).encode()) % len(self.shards)
+
+    def _group_by_shard(
+        self, entities: List[Category]
+    ) -> List[Tuple[CategoryRepository, List[Category]]]:
+        groups: Dict[int, List[Category]] = {}
+        for entity in entities:
+            groups.setdefault(self._shard_index(entity.unique_entity_id), []).append(entity)
+        return [(self.shards[shard_index], group) for shard_index, group in groups.items()]
+
+    def _group_ids_by_shard(
+        self, ids: List[str | UniqueEntityId]
+    ) -> List[Tuple[CategoryRepository, List[str | UniqueEntityId]]]:
+        groups: Dict[int, List[str | UniqueEntityId]] = {}
+        for id_ in ids:
+            groups.setdefault(self._shard_index(id_), []).append(id_)
+        return [(self.shards[shard_index], group) for shard_index, group in groups.items()]
+
+    @asynccontextmanager
+    async def _locked(self, shards: List[CategoryRepository]) -> AsyncIterator[None]:
+        # Async writes hold the locks of the shards they touch, taken in shard
+        # order, from their checks to their last write, so no other async
+        # write through this repository lands in between. The locks are
+        # created on first use, inside the running event loop.
+        if self._locks is None:
+            self._locks = [asyncio.Lock() for _ in self.shards]
+        touched = set(map(id, shards))
+        async with AsyncExitStack() as stack:
+            for shard, lock in zip(self.shards, self._locks):
+                if id(shard) in touched:
+                    await stack.enter_async_context(lock)
+            yield
+
+    @contextmanager
+    def _claim_names(self, entities: List[Category]) -> Iterator[None]:
+        # Names are claimed before the shards are written, so concurrent async
+        # writes cannot take the same one. A failed write may have reached some
+        # shards only, so the index is dropped and rebuilt on the next check.
+        if not self.enforce_unique:
+            yield
+            return
+        if self._unique_names is None:
+            self._unique_names = UniqueIndex()
+            for category in self.find_all():
+                self._unique_names.put(category.id, casefold_sort_key(category.name))
+        index, batch = self._unique_names, set()
+        for entity in entities:
+            key = casefold_sort_key(entity.name) if entity.is_active else None
+            if index.conflicts(entity.id, key) or key is not None and key in batch:
+                raise DuplicateValueException('name', entity.name)
+            batch.add(key)
+        for entity in entities:
+            if entity.is_active:
+                index.put(entity.id, casefold_sort_key(entity.name))
+            else:
+                index.discard(entity.id)
+        try:
+            yield
+        except BaseException:
+            self._unique_names = None
+            raise
+
+    def _release_name(self, id_: str | UniqueEntityId) -> None:
+        if self._unique_names is not None:
+            self._unique_names.discard(canonical_id(id_))
+
+    def _shard_search_params(
+        self, input_: CategoryRepository.SearchParams
+    ) -> CategoryRepository.SearchParams:
+        # Every shard must return all candidates for the requested page, so each
+        # one is asked for its first page * per_page items, already sorted.
+        return self.SearchParams(
+            page=1,
+            per_page=input_.page * input_.per_page,
+            sort_by=input_.sort_by,
+            sort_dir=input_.sort_dir,
+            filter_=input_.filter_,
+            facets=input_.facets
+        )
+
+    def _gather(
+        self,
+        input_: CategoryRepository.SearchParams,
+        results: List[CategoryRepository.SearchResult]
+    ) -> CategoryRepository.SearchResult:
+        key, is_reverse = self._sort_key(input_.sort_by, input_.sort_dir)
+        merged = heapq.merge(*(result.items for result in results), key=key, reverse=is_reverse)
+        start = (input_.page - 1) * input_.per_page
+        return self.SearchResult(
+            items=list(islice(merged, start, start + input_.per_page)),
+            total=sum(result.total for result in results),
+            current_page=input_.page,
+            per_page=input_.per_page,
+            sort_by=input_.sort_by,
+            sort_dir=input_.sort_dir,
+            filter_=input_.filter_,
+            facets=self._merge_facets(results)
+        )
+
+    def _merge_by(self, field_name: str, results: List[List[Category]]) -> List[Category]:
+        # Each shard returns its entities ordered by the field then by ID already.
+        return list(heapq.merge(*results, key=attrgetter(field_name, 'id')))
+
+    def _merge_by_name(self, limit: int, results: List[List[Category]]) -> List[Category]:
+        merged = heapq.merge(*results, key=lambda item: (casefold_sort_key(item.name), item.id))
+        return list(islice(merged, limit))
+
+    def _merge_by_similarity(
+        self, name: str, limit: int, results: List[List[Category]]
+    ) -> List[Category]:
+        return sorted(
+            chain.from_iterable(results),
+            key=lambda item: (-trigram_similarity(name, item.name), item.id)
+        )[:limit]
+
+    def _merge_facets(
+        self, results: List[CategoryRepository.SearchResult]
+    ) -> Optional[Dict[str, Dict[Any, int]]]:
+        if all(result.facets is None for result in results):
+            return None
+        facets: Dict[str, Counter] = {}
+        for result in results:
+            for name, counts in (result.facets or {}).items():
+                facets.setdefault(name, Counter()).update(counts)
+        return {name: dict(counts) for name, counts in facets.items()}
+
+    def _merge_changes(
+        self, version: int, limit: Optional[int], results: List[ChangeSet[Category]]
+    ) -> ChangeSet[Category]:
+        # Shards draw versions from one sequence, so their changes interleave
+        # by version; each shard returned its oldest `limit` ones.
+        merged = list(heapq.merge(
+            *(result.items for result in results), key=attrgetter('version')))
+        has_more = any(result.has_more for result in results)
+        if limit is not None and len(merged) > limit:
+            merged, has_more = merged[:limit], True
+        return ChangeSet(
+            merged, merged[-1].version if merged else version, has_more,
+            any(result.resync for result in results))
+
+    def _sort_key(
+        self, sort_by: str | None, sort_dir: str | None
+    ) -> Tuple[Callable[[Category], Any], bool]:
+        # Same order as the shards: the requested fields, then the ID in the
+        # direction of the last field. heapq.merge takes a single direction,
+        # so fields sorted the other way are wrapped in _Descending.
+        order = [
+            (field_name, direction == 'desc')
+            for field_name, direction in parse_sort(sort_by, sort_dir)
+            if field_name in self.sortable_fields
+        ] or [(self.DEFAULT_SORT_BY, parse_sort(self.DEFAULT_SORT_BY, sort_dir)[0][1] == 'desc')]
+        order.append(('id', order[-1][1]))
+        is_reverse = order[0][1]
+        # The shards' collation applies to text fields; the ID and other
+        # fields compare as-is.
+        types_ = fields_types(Category)
+        keys = [
+            (attrgetter(field_name), field_reverse, field_reverse == is_reverse,
+             field_name != 'id' and str in types_.get(field_name, ()))
+            for field_name, field_reverse in order
+        ]
+        sort_key = self.sort_key
+
+        def key(item: Category) -> Any:
+            values = []
+            for get, field_reverse, same_direction, is_text in keys:
+                value = nulls_last(sort_key(get(item)) if is_text else get(item), field_reverse)
+                values.append(value if same_direction else _Descending(value))
+            return tuple(values)
+        return key, is_reverse
+
+
+@dataclass(slots=True, frozen=True)
+class _Descending:
+
+    value: Any
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.value < self.value
+
+
+def _check_new_ids(entities: List[Category], known_ids: Set[str]) -> None:
+    ids = set()
+    for entity in entities:
+        if entity.id in known_ids or entity.id in ids:
+            raise EntityAlreadyExistsException(f'Entity already exists using ID: {entity.id}')
+        ids.add(entity.id)
+
+
+def _check_found(ids: List[str | UniqueEntityId], versions: Dict[str, int]) -> None:
+    for id_ in ids:
+        if canonical_id(id_) not in versions:
+            raise EntityNotFoundException(f'Entity not found using ID: {id_}')
+
+
+def _check_versions(entities: List[Category], versions: Dict[str, int]) -> None:
+    _check_found([entity.id for entity in entities], versions)
+    for entity in entities:
+        if entity.version != versions[entity.id]:
+            raise EntityVersionConflictException(
+                entity.id, entity.version, versions[entity.id])
@@ -0,0 +1,384 @@
+import asyncio
+import datetime
+import random
+import unittest
+from unittest.mock import patch
+
+from django.conf import settings
+
+from core.domain.__seedwork.exceptions import (
+    DuplicateValueException, EntityAlreadyExistsException, EntityNotFoundException,
+    EntityVersionConflictException
+)
+from core.domain.category.repositories import CategoryRepository
+from core.domain.category.entities import Category
+from core.infrastructure.in_memory.category.repositories import CategoryInMemoryRepository
+
+from .repositories import ShardedCategoryRepository
+
+
+class ShardedCategoryRepositoryUnitTests(unittest.TestCase):
+
+    repo: ShardedCategoryRepository
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = ShardedCategoryRepository(
+            [CategoryInMemoryRepository() for _ in range(4)])
+
+    def test_if_is_a_category_repository_instance(self):
+        self.assertIsInstance(self.repo, CategoryRepository)
+
+    def test_requires_at_least_one_shard(self):
+        with self.assertRaises(ValueError):
+            ShardedCategoryRepository([])
+
+    def test_sortable_fields(self):
+        self.assertEqual(
+            self.repo.sortable_fields, CategoryInMemoryRepository.sortable_fields)
+
+    def test_routes_entities_by_id(self):
+        categories = [Category(name=f'cat_{i}') for i in range(40)]
+        for category in categories:
+            self.repo.insert(category)
+        self.assertEqual(sum(len(s._items) for s in self.repo.shards), 40)
+        self.assertTrue(all(len(s._items) > 0 for s in self.repo.shards))
+        for category in categories:
+            shard = self.repo._shard_for(category.id)
+            self.assertIs(shard, self.repo._shard_for(category.unique_entity_id))
+            self.assertEqual(shard.find_by_id(category.id), category)
+            self.assertEqual(self.repo.find_by_id(category.id), category)
+            self.assertEqual(self.repo.find_by_id(category.id.upper()), category)
+
+    def test_insert_many(self):
+        categories = [Category(name=f'cat_{i}') for i in range(20)]
+        self.repo.insert_many(categories)
+        self.assertEqual(sum(len(s._items) for s in self.repo.shards), 20)
+        for category in categories:
+            self.assertEqual(
+                self.repo._shard_for(category.id).find_by_id(category.id), category)
+
+    def test_update_and_delete(self):
+        category = Category(name='foobar')
+        self.repo.insert(category)
+        category.update('foobar_updated')
+        self.repo.update(category)
+        self.assertEqual(self.repo.find_by_id(category.id).name, 'foobar_updated')
+        self.repo.delete(category.id)
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.find_by_id(category.id)
+        self.assertEqual(self.repo.find_all(), [])
+
+    def test_enforce_unique_names_across_shards(self):
+        repo = ShardedCategoryRepository(
+            [CategoryInMemoryRepository() for _ in range(4)], enforce_unique=True)
+        categories = [Category(name=f'cat_{i}') for i in range(20)]
+        repo.insert_many(categories)
+        for i in range(20):
+            with self.assertRaises(DuplicateValueException):
+                repo.insert(Category(name=f'CAT_{i}'))
+        category = categories[0]
+        category.update('Cat_1')
+        with self.assertRaises(DuplicateValueException):
+            repo.update(category)
+        repo.delete(categories[1].id)
+        repo.update(category)
+        repo.insert(Category(name='cat_0'))
+        # A failed write drops the index, which is rebuilt from the shards.
+        with self.assertRaises(Exception):
+            repo.insert(categories[2])
+        self.assertIsNone(repo._unique_names)
+        with self.assertRaises(DuplicateValueException):
+            repo.insert(Category(name='cat_3'))
+
+    def test_update_and_delete_many_group_by_shard(self):
+        categories = [Category(name=f'cat_{i}') for i in range(12)]
+        self.repo.insert_many(categories)
+        for category in categories[:6]:
+            category.update(f'{category.name}_updated')
+        self.repo.update_many(categories[:6])
+        self.repo.delete_many([category.id for category in categories[6:]])
+        self.assertEqual(
+            sorted(category.name for category in self.repo.find_all()),
+            sorted(f'cat_{i}_updated' for i in range(6)))
+
+    def test_insert_many_writes_no_shard_unless_all_ids_are_new(self):
+        existing = Category(name='existing')
+        self.repo.insert(existing)
+        categories = [Category(name=f'cat_{i}') for i in range(12)]
+        with self.assertRaises(EntityAlreadyExistsException):
+            self.repo.insert_many([*categories, existing])
+        with self.assertRaises(EntityAlreadyExistsException):
+            self.repo.insert_many([*categories, categories[0]])
+        self.assertEqual(self.repo.find_all(), [existing])
+        self.repo.insert_many(categories)
+        self.assertEqual(len(self.repo.find_all()), 13)
+
+    def test_insert_many_rejects_ids_of_deleted_entities_in_any_shard(self):
+        deleted = Category(name='deleted')
+        self.repo.insert(deleted)
+        self.repo.delete(deleted.id)
+        categories = [Category(name=f'cat_{i}') for i in range(12)]
+        with self.assertRaises(EntityAlreadyExistsException):
+            self.repo.insert_many([*categories, deleted])
+        self.assertEqual(self.repo.find_all(), [])
+        self.assertEqual(
+            self.repo.find_known_ids([category.id for category in categories] + [deleted.id]),
+            {deleted.id})
+
+    def test_batch_checks_do_not_look_up_ids_one_by_one(self):
+        categories = [Category(name=f'cat_{i}') for i in range(12)]
+        with patch.object(CategoryInMemoryRepository, 'find_by_id', side_effect=AssertionError):
+            self.repo.insert_many(categories)
+            for category in categories:
+                category.update(f'{category.name}_updated')
+            self.repo.update_many(categories)
+            self.repo.delete_many([category.id for category in categories])
+        self.assertEqual(self.repo.find_all(), [])
+
+    def test_update_and_delete_many_write_no_shard_unless_all_succeed(self):
+        categories = [Category(name=f'cat_{i}') for i in range(12)]
+        self.repo.insert_many(categories)
+        stale = self.repo.find_by_id(categories[-1].id)
+        self.repo.update(categories[-1])
+        for category in categories[:-1]:
+            category.update(f'{category.name}_updated')
+        with self.assertRaises(EntityVersionConflictException):
+            self.repo.update_many([*categories[:-1], stale])
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.update_many([*categories[:-1], Category(name='missing')])
+        with self.assertRaises(EntityNotFoundException):
+            self.repo.delete_many([*(category.id for category in categories), 'fake id'])
+        self.assertEqual(
+            sorted(category.name for category in self.repo.find_all()),
+            sorted(f'cat_{i}' for i in range(12)))
+
+    def test_search_merges_sorted_pages(self):
+        categories = [Category(name=f'cat_{i:02d}') for i in range(30)]
+        for category in random.sample(categories, len(categories)):
+            self.repo.insert(category)
+        arrange = [
+            {'sort_by': None, 'sort_dir': None, 'expected': categories},
+            {'sort_by': 'name', 'sort_dir': 'asc', 'expected': categories},
+            {'sort_by': 'name', 'sort_dir': 'desc', 'expected': categories[::-1]},
+        ]
+        for i in arrange:
+            for page in range(1, 5):
+                msg = f'Failed with data: {i} page: {page}'
+                result = self.repo.search(CategoryRepository.SearchParams(
+                    page=page, per_page=7, sort_by=i['sort_by'], sort_dir=i['sort_dir']))
+                self.assertEqual(
+                    result.items, i['expected'][(page - 1) * 7:page * 7], msg=msg)
+                self.assertEqual(result.total, 30, msg=msg)
+                self.assertEqual(result.last_page, 5, msg=msg)
+
+    def test_search_sums_shard_facets(self):
+        self.repo.insert_many([
+            Category(name=f'cat_{i:02d}', created_at=datetime.datetime(2022, 1 + i % 3, 1))
+            for i in range(30)])
+        result = self.repo.search(CategoryRepository.SearchParams(
+            per_page=5, facets='created_month'))
+        self.assertEqual(
+            result.facets, {'created_month': {'2022-01': 10, '2022-02': 10, '2022-03': 10}})
+        self.repo.delete(self.repo.find_all()[0].id)
+        result = self.repo.search(CategoryRepository.SearchParams(
+            per_page=5, facets='is_active'))
+        self.assertEqual(result.facets, {'is_active': {True: 29}})
+        self.assertIsNone(self.repo.search(CategoryRepository.SearchParams()).facets)
+
+    def test_search_merges_multi_field_sort(self):
+        categories = [
+            Category(name=f'cat_{i % 3}', description=f'desc_{i:02d}') for i in range(12)
+        ]
+        single = CategoryInMemoryRepository()
+        single.insert_many(categories)
+        self.repo.insert_many(categories)
+        for sort_dir in ['asc,asc', 'asc,desc', 'desc,asc', 'desc,desc']:
+            for page in range(1, 4):
+                msg = f'Failed with sort_dir: {sort_dir} page: {page}'
+                params = CategoryRepository.SearchParams(
+                    page=page, per_page=5, sort_by='name,description', sort_dir=sort_dir)
+                self.assertEqual(
+                    self.repo.search(params).items, single.search(params).items, msg=msg)
+
+    def test_search_merges_with_the_shards_sort_key(self):
+        def reversed_text(value):
+            return value[::-1].casefold() if isinstance(value, str) else value
+
+        categories = [Category(name=f'{i % 7}_cat_{i:02d}') for i in range(20)]
+        with patch.object(CategoryInMemoryRepository, 'sort_key', staticmethod(reversed_text)):
+            single = CategoryInMemoryRepository()
+            single.insert_many(categories)
+            self.repo.insert_many(categories)
+            self.assertIs(self.repo.sort_key, reversed_text)
+            for sort_by in ['name', 'name,created_at', None]:
+                params = CategoryRepository.SearchParams(
+                    page=2, per_page=5, sort_by=sort_by, sort_dir='desc')
+                self.assertEqual(
+                    self.repo.search(params).items, single.search(params).items,
+                    msg=f'Failed with sort_by: {sort_by}')
+
+    def test_search_merges_nulls_last(self):
+        categories = [
+            Category(name=f'cat_{i:02d}', description=None if i % 3 else f'd{i:02d}')
+            for i in range(20)
+        ]
+        self.repo.insert_many(categories)
+        object_repo = CategoryInMemoryRepository()
+        object_repo.insert_many(categories)
+        for sort_dir in ['asc', 'desc']:
+            params = CategoryRepository.SearchParams(
+                per_page=20, sort_by='description,name', sort_dir=f'{sort_dir},asc')
+            items = self.repo.search(params).items
+            self.assertEqual(items, object_repo.search(params).items)
+            self.assertEqual([item.description for item in items[7:]], [None] * 13)
+
+    def test_search_with_filter(self):
+        categories = [Category(name=f'cat_{i}') for i in range(15)]
+        for category in categories:
+            self.repo.insert(category)
+        result = self.repo.search(CategoryRepository.SearchParams(
+            page=2, per_page=3, sort_by='name', sort_dir='desc', filter_='cat_1'))
+        self.assertEqual(
+            result.items, [categories[11], categories[10], categories[1]])
+        self.assertEqual(result.total, 6)
+
+    def test_find_created_and_updated_between(self):
+        base = datetime.datetime(2022, 1, 1)
+        categories = [
+            Category(
+                name=f'cat_{i:02d}',
+                created_at=base + datetime.timedelta(minutes=i),
+                updated_at=base + datetime.timedelta(minutes=40 - i)
+            )
+            for i in random.sample(range(40), 40)
+        ]
+        self.repo.insert_many(categories)
+        ordered = sorted(categories, key=lambda category: category.created_at)
+        self.assertEqual(
+            self.repo.find_created_between(
+                base + datetime.timedelta(minutes=5), base + datetime.timedelta(minutes=25)),
+            ordered[5:25])
+        self.assertEqual(
+            self.repo.find_updated_between(end=base + datetime.timedelta(minutes=10)),
+            list(reversed(ordered[31:])))
+
+    def test_find_changed_since_merges_shards_by_version(self):
+        version = self.repo.find_changed_since().version
+        categories = [Category(name=f'cat_{i:02d}') for i in range(20)]
+        for category in categories:
+            self.repo.insert(category)
+        categories[3].update('cat_03 changed')
+        self.repo.update(categories[3])
+
+        changes = self.repo.find_changed_since(version)
+        expected = categories[:3] + categories[4:] + [categories[3]]
+        self.assertEqual([change.entity for change in changes.items], expected)
+        self.assertFalse(changes.has_more)
+
+        synced = []
+        while True:
+            page = self.repo.find_changed_since(version, limit=6)
+            synced += [change.entity for change in page.items]
+            version = page.version
+            if not page.has_more:
+                break
+        self.assertEqual(synced, expected)
+
+    def test_find_by_name_prefix(self):
+        categories = [Category(name=f'cat_{i:02d}') for i in random.sample(range(30), 30)]
+        self.repo.insert_many(categories)
+        ordered = sorted(categories, key=lambda category: category.name)
+        self.assertEqual(self.repo.find_by_name_prefix('CAT_1', 5), ordered[10:15])
+        self.assertEqual(self.repo.find_by_name_prefix('cat_2'), ordered[20:30])
+
+    def test_find_by_similar_name(self):
+        categories = [
+            Category(name=name)
+            for name in ['Movie', 'Movies', 'Movie night', 'Music', 'Documentary', 'Mover']
+        ]
+        self.repo.insert_many(categories)
+        self.assertEqual(
+            self.repo.find_by_similar_name('movie', limit=3),
+            [categories[0], categories[1], categories[2]])
+        self.assertEqual(
+            self.repo.find_by_similar_name('movie', threshold=0.5),
+            [categories[0], categories[1], categories[2]])
+
+    def test_lookups_break_ties_by_id(self):
+        created_at = datetime.datetime(2022, 1, 1)
+        categories = [
+            Category(name='Movie' if i % 2 else 'MOVIE', created_at=created_at)
+            for i in range(12)
+        ]
+        self.repo.insert_many(categories)
+        ordered = sorted(categories, key=lambda category: category.id)
+        self.assertEqual(self.repo.find_created_between(), ordered)
+        self.assertEqual(self.repo.find_by_name_prefix('mov', 5), ordered[:5])
+        self.assertEqual(self.repo.find_by_similar_name('movie', 1.0, 5), ordered[:5])
+
+
+class ShardedCategoryRepositoryUnitAsyncTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+
+    async def test_async_methods(self):
+        repo = ShardedCategoryRepository(
+            [CategoryInMemoryRepository() for _ in range(3)])
+        categories = [Category(name=f'cat_{i:02d}') for i in range(10)]
+        for category in categories[:5]:
+            await repo.insert_async(category)
+        await repo.insert_many_async(categories[5:])
+        found = await repo.find_by_id_async(categories[0].id)
+        self.assertEqual(found, categories[0])
+        self.assertEqual(len(await repo.find_all_async()), 10)
+        result = await repo.search_async(CategoryRepository.SearchParams(
+            page=2, per_page=4, sort_by='name'))
+        self.assertEqual(result.items, categories[4:8])
+        categories[0].update('cat_updated')
+        await repo.update_async(categories[0])
+        found = await repo.find_by_id_async(categories[0].id)
+        self.assertEqual(found.name, 'cat_updated')
+        await repo.delete_async(categories[0].id)
+        self.assertEqual(len(await repo.find_all_async()), 9)
+        self.assertEqual(len(await repo.find_created_between_async()), 9)
+        self.assertEqual(await repo.find_updated_between_async(), [])
+        self.assertEqual(
+            await repo.find_by_name_prefix_async('cat_0', 3), categories[1:4])
+        self.assertEqual(
+            await repo.find_by_similar_name_async('cat_05', 1.0), [categories[5]])
+        changes = await repo.find_changed_since_async(limit=4)
+        self.assertEqual(len(changes.items), 4)
+        self.assertTrue(changes.has_more)
+
+        new = [Category(name=f'new_{i}') for i in range(6)]
+        with self.assertRaises(EntityAlreadyExistsException):
+            await repo.insert_many_async([*new, categories[9]])
+        self.assertEqual(len(await repo.find_all_async()), 9)
+
+    async def test_concurrent_batches_with_a_shared_id_write_one_batch_whole(self):
+        repo = ShardedCategoryRepository(
+            [CategoryInMemoryRepository() for _ in range(3)])
+        shared = Category(name='shared')
+        batches = [[*(Category(name=f'cat_{i}') for i in range(6)), shared] for _ in range(2)]
+        results = await asyncio.gather(
+            *(repo.insert_many_async(batch) for batch in batches), return_exceptions=True)
+        self.assertEqual(
+            [type(result) for result in results], [type(None), EntityAlreadyExistsException])
+        self.assertEqual(len(await repo.find_all_async()), 7)
+
+    async def test_concurrent_writes_cannot_claim_one_name(self):
+        repo = ShardedCategoryRepository(
+            [CategoryInMemoryRepository() for _ in range(3)], enforce_unique=True)
+        results = await asyncio.gather(
+            *(repo.insert_async(Category(name=name)) for name in ['Movie', 'movie', 'MOVIE']),
+            return_exceptions=True)
+        self.assertEqual(
+            [type(result) for result in results],
+            [type(None), DuplicateValueException, DuplicateValueException])
+        self.assertEqual(len(await repo.find_all_async()), 1)
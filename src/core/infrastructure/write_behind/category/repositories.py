@@ -0,0 +1,471 @@
+import asyncio
+import atexit
+import contextlib
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import weakref
+
+from core.domain.__seedwork.changes import ChangeSet
+from core.domain.__seedwork.exceptions import (
+    DuplicateValueException, EntityAlreadyExistsException, EntityNotFoundException,
+    EntityVersionConflictException
+)
+from core.domain.__seedwork.value_objects import UniqueEntityId, canonical_id
+from core.domain.category.repositories import CategoryRepository
+from core.domain.category.entities import Category
+from core.infrastructure.in_memory.category.repositories import CategoryInMemoryRepository
+
+
+@dataclass(slots=True, frozen=True)
+class _Write:
+
+    kind: str
+    id_: str
+    # The entity as it was before the cache applied the write, so the backend
+    # sees the version (and changed fields) the cache checked against; an ID
+    # for deletes.
+    payload: Category | str
+    queued_at: float
+
+
+@dataclass(slots=True)
+class WriteBehindCategoryRepository(CategoryRepository):
+
+    # Writes go to the in-memory cache at once, so reads (all served by the
+    # cache) see them, and are queued for the backend. The queue is flushed in
+    # order, as insert_many / update_many / delete_many batches, when it holds
+    # max_batch_size writes or its oldest write is max_delay seconds old
+    # (checked on every write and, unless background_flush is off, by a timer
+    # thread), on flush(), and on close(), which also runs at interpreter exit
+    # unless flush_on_exit is off. A repository dropped without close() is not
+    # kept alive for the exit hook: its unflushed writes are lost. A backend
+    # error on an automatic flush leaves the writes queued and is counted in
+    # stats(); flush() raises it. The batch that failed may have been applied
+    # in part, so its writes are retried one at a time, a write the backend
+    # already holds counting as done. The cache starts as a copy of the whole
+    # backend (one find_all() on construction), so construction costs a full
+    # read and the backend must fit in memory.
+
+    backend: CategoryRepository
+    cache: CategoryRepository = field(default_factory=CategoryInMemoryRepository)
+    max_batch_size: int = 500
+    max_delay: float = 1.0
+    flush_on_exit: bool = True
+    background_flush: bool = True
+    clock: Callable[[], float] = time.monotonic
+    _queue: List[_Write] = field(default_factory=lambda: [], repr=False, compare=False)
+    # Guards _queue: writes append on their own thread while a flush on the
+    # timer thread takes from the head.
+    _queue_mutex: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False)
+    # Writes at the head of the queue that may or may not have reached the
+    # backend.
+    _in_doubt: int = field(default=0, init=False, repr=False, compare=False)
+    # Serializes async flushes on the event loop; created by the first one,
+    # inside the running loop.
+    _flush_lock: Optional[asyncio.Lock] = field(
+        default=None, init=False, repr=False, compare=False)
+    # Serializes flushes from the writing thread and the timer thread.
+    _flush_mutex: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False)
+    _timer: Optional[threading.Timer] = field(default=None, init=False, repr=False, compare=False)
+    flushes: int = field(default=0, init=False)
+    flushed_writes: int = field(default=0, init=False)
+    flush_failures: int = field(default=0, init=False)
+    flush_seconds: float = field(default=0.0, init=False)
+    max_flush_seconds: float = field(default=0.0, init=False)
+    last_error: Optional[Exception] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1')
+        self.cache.insert_many(self.backend.find_all())
+        if self.flush_on_exit:
+            key = id(self)
+            _open_repositories[key] = weakref.ref(
+                self, lambda _: _open_repositories.pop(key, None))
+
+    @property
+    def sortable_fields(self) -> List[str]:
+        return self.cache.sortable_fields
+
+    @property
+    def sort_key(self) -> Callable[[Any], Any]:
+        return self.cache.sort_key
+
+    def insert(self, entity: Category) -> None:
+        self.insert_many([entity])
+
+    async def insert_async(self, entity: Category) -> None:
+        await self.insert_many_async([entity])
+
+    def insert_many(self, entities: List[Category]) -> None:
+        originals = list(map(copy.copy, entities))
+        self.cache.insert_many(entities)
+        self.__enqueue('insert', originals)
+        self.__flush_if_due()
+
+    async def insert_many_async(self, entities: List[Category]) -> None:
+        originals = list(map(copy.copy, entities))
+        await self.cache.insert_many_async(entities)
+        self.__enqueue('insert', originals)
+        await self.__flush_if_due_async()
+
+    def update(self, entity: Category) -> None:
+        self.update_many([entity])
+
+    async def update_async(self, entity: Category) -> None:
+        await self.update_many_async([entity])
+
+    def update_many(self, entities: List[Category]) -> None:
+        originals = _latest_copies(entities)
+        self.cache.update_many(entities)
+        self.__enqueue('update', originals)
+        self.__flush_if_due()
+
+    async def update_many_async(self, entities: List[Category]) -> None:
+        originals = _latest_copies(entities)
+        await self.cache.update_many_async(entities)
+        self.__enqueue('update', originals)
+        await self.__flush_if_due_async()
+
+    def delete(self, id_: str | UniqueEntityId) -> None:
+        self.delete_many([id_])
+
+    async def delete_async(self, id_: str | UniqueEntityId) -> None:
+        await self.delete_many_async([id_])
+
+    def delete_many(self, ids: List[str | UniqueEntityId]) -> None:
+        self.cache.delete_many(ids)
+        self.__enqueue('delete', list(dict.fromkeys(map(canonical_id, ids))))
+        self.__flush_if_due()
+
+    async def delete_many_async(self, ids: List[str | UniqueEntityId]) -> None:
+        await self.cache.delete_many_async(ids)
+        self.__enqueue('delete', list(dict.fromkeys(map(canonical_id, ids))))
+        await self.__flush_if_due_async()
+
+    def flush(self) -> int:
+        with self._flush_mutex:
+            started, written = time.perf_counter(), 0
+            try:
+                while self.__head() is not None:
+                    if self._in_doubt:
+                        _replay(self.backend, self.__head())
+                        written += self.__acknowledge(1)
+                        continue
+                    kind, batch = self.__next_batch()
+                    self._in_doubt = len(batch)
+                    _write(self.backend, kind, batch)
+                    written += self.__acknowledge(len(batch))
+            except Exception:
+                self.flush_failures += 1
+                raise
+            finally:
+                self.__record_flush(started, written)
+            return written
+
+    async def flush_async(self) -> int:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock, _acquired(self._flush_mutex):
+            started, written = time.perf_counter(), 0
+            try:
+                while self.__head() is not None:
+                    if self._in_doubt:
+                        await _replay_async(self.backend, self.__head())
+                        written += self.__acknowledge(1)
+                        continue
+                    kind, batch = self.__next_batch()
+                    self._in_doubt = len(batch)
+                    await _write_async(self.backend, kind, batch)
+                    written += self.__acknowledge(len(batch))
+            except Exception:
+                self.flush_failures += 1
+                raise
+            finally:
+                self.__record_flush(started, written)
+            return written
+
+    def close(self) -> None:
+        # Stops the timer and the exit hook, then flushes what is left.
+        _open_repositories.pop(id(self), None)
+        self.background_flush = False
+        timer = self._timer
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._queue_mutex:
+            depth, head = len(self._queue), self._queue[0] if self._queue else None
+        return {
+            'queue_depth': depth,
+            'oldest_write_age': self.clock() - head.queued_at if head is not None else 0.0,
+            'flushes': self.flushes,
+            'flushed_writes': self.flushed_writes,
+            'flush_failures': self.flush_failures,
+            'mean_flush_seconds': self.flush_seconds / self.flushes if self.flushes else 0.0,
+            'max_flush_seconds': self.max_flush_seconds,
+        }
+
+    def find_by_id(self, id_: str | UniqueEntityId) -> Category:
+        return self.cache.find_by_id(id_)
+
+    async def find_by_id_async(self, id_: str | UniqueEntityId) -> Category:
+        return await self.cache.find_by_id_async(id_)
+
+    def find_known_ids(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        return self.cache.find_known_ids(ids)
+
+    async def find_known_ids_async(self, ids: List[str | UniqueEntityId]) -> Set[str]:
+        return await self.cache.find_known_ids_async(ids)
+
+    def find_versions(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        return self.cache.find_versions(ids)
+
+    async def find_versions_async(self, ids: List[str | UniqueEntityId]) -> Dict[str, int]:
+        return await self.cache.find_versions_async(ids)
+
+    def find_all(self) -> List[Category]:
+        return self.cache.find_all()
+
+    async def find_all_async(self) -> List[Category]:
+        return await self.cache.find_all_async()
+
+    def find_created_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return self.cache.find_created_between(start, end)
+
+    async def find_created_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return await self.cache.find_created_between_async(start, end)
+
+    def find_updated_between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return self.cache.find_updated_between(start, end)
+
+    async def find_updated_between_async(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Category]:
+        return await self.cache.find_updated_between_async(start, end)
+
+    def find_changed_since(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        return self.cache.find_changed_since(version, limit)
+
+    async def find_changed_since_async(
+        self, version: int = 0, limit: Optional[int] = None
+    ) -> ChangeSet[Category]:
+        return await self.cache.find_changed_since_async(version, limit)
+
+    def find_by_name_prefix(self, prefix: str, limit: int = 10) -> List[Category]:
+        return self.cache.find_by_name_prefix(prefix, limit)
+
+    async def find_by_name_prefix_async(self, prefix: str, limit: int = 10) -> List[Category]:
+        return await self.cache.find_by_name_prefix_async(prefix, limit)
+
+    def find_by_similar_name(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        return self.cache.find_by_similar_name(name, threshold, limit)
+
+    async def find_by_similar_name_async(
+        self, name: str, threshold: float = 0.3, limit: int = 10
+    ) -> List[Category]:
+        return await self.cache.find_by_similar_name_async(name, threshold, limit)
+
+    def search(self, input_: CategoryRepository.SearchParams) -> CategoryRepository.SearchResult:
+        return self.cache.search(input_)
+
+    async def search_async(
+        self, input_: CategoryRepository.SearchParams
+    ) -> CategoryRepository.SearchResult:
+        return await self.cache.search_async(input_)
+
+    def __enqueue(self, kind: str, payloads: List[Category | str]) -> None:
+        now = self.clock()
+        writes = [
+            _Write(kind, payload if kind == 'delete' else payload.id, payload, now)
+            for payload in payloads
+        ]
+        with self._queue_mutex:
+            self._queue.extend(writes)
+        if self.background_flush and self._timer is None:
+            self.__start_timer(self.max_delay)
+
+    def __start_timer(self, delay: float) -> None:
+        self._timer = threading.Timer(delay, self.__on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def __on_timer(self) -> None:
+        # Flushes writes that became due with no later write to notice it.
+        # Rearmed for the next due write while the queue is not empty, or
+        # max_delay later when the flush failed.
+        self._timer = None
+        self.__flush_if_due()
+        head = self.__head()
+        if head is not None and self.background_flush and self._timer is None:
+            delay = head.queued_at + self.max_delay - self.clock()
+            self.__start_timer(delay if delay > 0 else self.max_delay)
+
+    def __head(self) -> Optional[_Write]:
+        with self._queue_mutex:
+            return self._queue[0] if self._queue else None
+
+    def __is_due(self) -> bool:
+        with self._queue_mutex:
+            depth, head = len(self._queue), self._queue[0] if self._queue else None
+        return head is not None and (
+            depth >= self.max_batch_size or self.clock() - head.queued_at >= self.max_delay)
+
+    def __flush_if_due(self) -> None:
+        if self.__is_due():
+            try:
+                self.flush()
+            except Exception as error:
+                self.last_error = error
+
+    async def __flush_if_due_async(self) -> None:
+        if self.__is_due():
+            try:
+                await self.flush_async()
+            except Exception as error:
+                self.last_error = error
+
+    def __next_batch(self) -> Tuple[str, List[Category | str]]:
+        # Consecutive writes of one kind from the head of the queue, stopping
+        # before an entity already in the batch so the backend applies its
+        # writes in order.
+        with self._queue_mutex:
+            kind, ids, batch = self._queue[0].kind, set(), []
+            for write in self._queue:
+                if write.kind != kind or write.id_ in ids or len(batch) == self.max_batch_size:
+                    break
+                ids.add(write.id_)
+                batch.append(_payload(write))
+        return kind, batch
+
+    def __acknowledge(self, count: int) -> int:
+        with self._queue_mutex:
+            del self._queue[:count]
+        self._in_doubt = max(0, self._in_doubt - count)
+        return count
+
+    def __record_flush(self, started: float, written: int) -> None:
+        if written:
+            elapsed = time.perf_counter() - started
+            self.flushes += 1
+            self.flushed_writes += written
+            self.flush_seconds += elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+
+# Repositories (by id) close() runs for at interpreter exit; weak, so the
+# hook does not keep a dropped repository alive.
+_open_repositories: Dict[int, 'weakref.ref[WriteBehindCategoryRepository]'] = {}
+
+
+@atexit.register
+def _close_open_repositories() -> None:
+    for ref in list(_open_repositories.values()):
+        repo = ref()
+        if repo is not None:
+            repo.close()
+
+
+@contextlib.asynccontextmanager
+async def _acquired(mutex: threading.Lock):
+    # Waits for a flush running on the timer thread in a worker thread, so
+    # the event loop is not blocked. A cancelled wait still gets the lock
+    # eventually; it is released as soon as it does.
+    if not mutex.acquire(blocking=False):
+        acquiring = asyncio.ensure_future(asyncio.to_thread(mutex.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(lambda _: mutex.release())
+            raise
+    try:
+        yield
+    finally:
+        mutex.release()
+
+
+def _latest_copies(entities: List[Category]) -> List[Category]:
+    return list({entity.id: copy.copy(entity) for entity in entities}.values())
+
+
+def _payload(write: _Write) -> Category | str:
+    # The backend bumps the version of (and clears the changes on) what it is
+    # given, so every attempt gets its own copy.
+    return write.payload if write.kind == 'delete' else copy.copy(write.payload)
+
+
+def _already_applied(write: _Write, error: Exception, stored: Optional[Category]) -> bool:
+    # stored: what the backend holds under the ID of an insert, if it is live.
+    if write.kind == 'insert':
+        if not isinstance(error, EntityAlreadyExistsException) or \
+                isinstance(error, DuplicateValueException):
+            return False
+        # An entity inserted deleted cannot be read back to compare; any other
+        # counts as applied only if it is the one stored, so an insert reusing
+        # the ID of another (or a deleted) entity still fails.
+        return stored == write.payload if write.payload.is_active else stored is None
+    if write.kind == 'update':
+        return isinstance(error, EntityVersionConflictException) and \
+            error.current_version == write.payload.version + 1
+    return isinstance(error, EntityNotFoundException)
+
+
+def _replay(backend: CategoryRepository, write: _Write) -> None:
+    try:
+        _write(backend, write.kind, [_payload(write)])
+    except Exception as error:
+        stored = None
+        if write.kind == 'insert':
+            with contextlib.suppress(EntityNotFoundException):
+                stored = backend.find_by_id(write.id_)
+        if not _already_applied(write, error, stored):
+            raise
+
+
+async def _replay_async(backend: CategoryRepository, write: _Write) -> None:
+    try:
+        await _write_async(backend, write.kind, [_payload(write)])
+    except Exception as error:
+        stored = None
+        if write.kind == 'insert':
+            with contextlib.suppress(EntityNotFoundException):
+                stored = await backend.find_by_id_async(write.id_)
+        if not _already_applied(write, error, stored):
+            raise
+
+
+def _write(backend: CategoryRepository, kind: str, batch: List[Category | str]) -> None:
+    if kind == 'insert':
+        backend.insert_many(batch)
+    elif kind == 'update':
+        backend.update_many(batch)
+    else:
+        backend.delete_many(batch)
+
+
+async def _write_async(
+    backend: CategoryRepository, kind: str, batch: List[Category | str]
+) -> None:
+    if kind == 'insert':
+        await backend.insert_many_async(batch)
+    elif kind == 'update':
+        await backend.update_many_async(batch)
+    else:
+        await backend.delete_many_async(batch)
@@ -0,0 +1,305 @@
+import asyncio
+import gc
+import threading
+import unittest
+from unittest.mock import ANY, patch
+
+from django.conf import settings
+
+from core.domain.__seedwork.exceptions import (
+    EntityAlreadyExistsException, EntityNotFoundException, EntityVersionConflictException
+)
+from core.domain.category.repositories import CategoryRepository
+from core.domain.category.entities import Category
+from core.infrastructure.in_memory.category.compact_repositories import (
+    CategoryCompactInMemoryRepository
+)
+from core.infrastructure.in_memory.category.repositories import CategoryInMemoryRepository
+
+from . import repositories
+from .repositories import WriteBehindCategoryRepository
+
+
+class WriteBehindCategoryRepositoryUnitTests(unittest.TestCase):
+
+    backend: CategoryInMemoryRepository
+    repo: WriteBehindCategoryRepository
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.now = 0.0
+        self.backend = CategoryInMemoryRepository()
+        self.repo = WriteBehindCategoryRepository(
+            self.backend, max_batch_size=3, max_delay=1.0, flush_on_exit=False,
+            background_flush=False, clock=lambda: self.now)
+
+    def test_if_is_a_category_repository_instance(self):
+        self.assertIsInstance(self.repo, CategoryRepository)
+        self.assertEqual(self.repo.sortable_fields, CategoryInMemoryRepository.sortable_fields)
+
+    def test_cache_is_loaded_from_the_backend(self):
+        category = Category(name='Movie')
+        self.backend.insert(category)
+        repo = WriteBehindCategoryRepository(
+            self.backend, flush_on_exit=False, background_flush=False)
+        self.assertEqual(repo.find_by_id(category.id), category)
+
+    def test_reads_see_writes_before_they_are_flushed(self):
+        category = Category(name='Movie')
+        self.repo.insert(category)
+        self.assertEqual(self.repo.find_by_id(category.id), category)
+        self.assertEqual(self.repo.find_by_name_prefix('mo'), [category])
+        self.assertEqual(self.backend.find_all(), [])
+        self.assertEqual(self.repo.stats()['queue_depth'], 1)
+
+        self.assertEqual(self.repo.flush(), 1)
+        self.assertEqual(self.backend.find_by_id(category.id), category)
+        self.assertEqual(self.repo.stats()['queue_depth'], 0)
+        self.assertEqual(self.repo.flush(), 0)
+
+    def test_flushes_when_the_batch_is_full(self):
+        categories = [Category(name=f'cat_{i}') for i in range(3)]
+        with patch.object(
+                self.backend, 'insert_many', wraps=self.backend.insert_many) as mock_insert_many:
+            self.repo.insert(categories[0])
+            self.repo.insert_many(categories[1:])
+            mock_insert_many.assert_called_once_with(categories)
+        self.assertEqual(self.backend.find_all(), categories)
+
+    def test_flushes_when_the_oldest_write_is_due(self):
+        first, second = Category(name='first'), Category(name='second')
+        self.repo.insert(first)
+        self.now = 0.5
+        self.assertEqual(self.repo.stats()['oldest_write_age'], 0.5)
+        self.now = 1.0
+        self.repo.insert(second)
+        self.assertEqual(self.backend.find_all(), [first, second])
+
+    def test_flush_keeps_the_order_of_writes(self):
+        category, other = Category(name='Movie'), Category(name='Film')
+        self.repo.insert_many([category, other])
+        category.update('Movies')
+        self.repo.update(category)
+        self.repo.delete(other.id)
+        category.update('Series')
+        self.repo.update(category)
+        self.repo.flush()
+        self.assertEqual(self.backend.find_by_id(category.id), category)
+        self.assertEqual(self.backend.find_by_id(category.id).version, 2)
+        with self.assertRaises(EntityNotFoundException):
+            self.backend.find_by_id(other.id)
+        self.assertEqual(self.backend._tombstones[other.id].version, 1)
+        self.assertEqual(self.repo.stats()['flushed_writes'], 5)
+
+    def test_failed_write_is_not_queued(self):
+        category = Category(name='Movie')
+        self.repo.insert(category)
+        stale = self.repo.find_by_id(category.id)
+        category.update('Film')
+        self.repo.update(category)
+        stale.update('Series')
+        with self.assertRaises(EntityVersionConflictException):
+            self.repo.update(stale)
+        self.assertEqual(self.repo.stats()['queue_depth'], 2)
+
+    def test_backend_errors(self):
+        category = Category(name='Movie')
+        self.repo.insert(category)
+        with patch.object(self.backend, 'insert_many', side_effect=ConnectionError()):
+            self.now = 2.0
+            self.repo.insert(Category(name='Film'))
+            self.assertIsInstance(self.repo.last_error, ConnectionError)
+            with self.assertRaises(ConnectionError):
+                self.repo.flush()
+        stats = self.repo.stats()
+        self.assertEqual((stats['queue_depth'], stats['flush_failures']), (2, 2))
+        self.repo.flush()
+        self.assertEqual(len(self.backend.find_all()), 2)
+        stats = self.repo.stats()
+        self.assertEqual((stats['flushes'], stats['flushed_writes']), (1, 2))
+        self.assertGreater(stats['max_flush_seconds'], 0)
+        self.assertGreater(stats['mean_flush_seconds'], 0)
+
+    def test_retry_after_a_partly_applied_batch(self):
+        backend = CategoryCompactInMemoryRepository()
+        repo = WriteBehindCategoryRepository(
+            backend, flush_on_exit=False, background_flush=False)
+        categories = [Category(name=f'cat_{i}') for i in range(3)]
+        repo.insert_many(categories)
+        repo.flush()
+        for category in categories:
+            category.update(f'{category.name}_updated')
+        repo.update_many(categories)
+        repo.delete(categories[2].id)
+
+        # The backend fails while writing the second row of the batch.
+        calls = []
+        write = CategoryCompactInMemoryRepository._CategoryCompactInMemoryRepository__write
+
+        def fail_second_write(backend_, row, entity):
+            calls.append(entity.id)
+            if len(calls) == 2:
+                raise ConnectionError()
+            write(backend_, row, entity)
+        with patch.object(
+                CategoryCompactInMemoryRepository,
+                '_CategoryCompactInMemoryRepository__write', autospec=True,
+                side_effect=fail_second_write):
+            with self.assertRaises(ConnectionError):
+                repo.flush()
+            self.assertEqual(backend.find_by_id(categories[0].id).name, 'cat_0_updated')
+            self.assertEqual(repo.stats()['queue_depth'], 4)
+            self.assertEqual(repo.flush(), 4)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(backend.find_all(), repo.find_all())
+        self.assertEqual(
+            [(category.name, category.version) for category in backend.find_all()],
+            [('cat_0_updated', 1), ('cat_1_updated', 1)])
+        self.assertEqual(
+            [category.version for category in repo.find_all()], [1, 1])
+        with self.assertRaises(EntityNotFoundException):
+            backend.find_by_id(categories[2].id)
+
+    def test_replayed_insert_counts_as_done_only_when_the_backend_holds_it(self):
+        category = Category(name='Movie')
+        self.repo.insert(category)
+        insert_many = self.backend.insert_many
+
+        def apply_then_fail(entities):
+            insert_many(entities)
+            raise ConnectionError()
+        with patch.object(self.backend, 'insert_many', side_effect=apply_then_fail):
+            with self.assertRaises(ConnectionError):
+                self.repo.flush()
+        self.assertEqual(self.repo.flush(), 1)
+        self.assertEqual(self.backend.find_all(), [category])
+
+        for reuse in ['other entity', 'deleted entity']:
+            category = Category(name='Film')
+            self.repo.insert(category)
+            with patch.object(self.backend, 'insert_many', side_effect=ConnectionError()):
+                with self.assertRaises(ConnectionError):
+                    self.repo.flush()
+            self.backend.insert(Category(unique_entity_id=category.unique_entity_id, name='Other'))
+            if reuse == 'deleted entity':
+                self.backend.delete(category.id)
+            with self.assertRaises(EntityAlreadyExistsException, msg=reuse):
+                self.repo.flush()
+            self.assertEqual(self.repo.stats()['queue_depth'], 1, msg=reuse)
+            self.repo._queue.clear()
+            self.repo._in_doubt = 0
+
+    def test_timer_flushes_due_writes_without_another_write(self):
+        with patch.object(threading, 'Timer') as mock_timer:
+            repo = WriteBehindCategoryRepository(
+                self.backend, max_delay=1.0, flush_on_exit=False, clock=lambda: self.now)
+            category = Category(name='Movie')
+            repo.insert(category)
+            repo.insert(Category(name='Film'))
+            mock_timer.assert_called_once_with(1.0, ANY)
+            on_timer = mock_timer.call_args.args[1]
+
+            self.now = 1.0
+            with patch.object(self.backend, 'insert_many', side_effect=ConnectionError()):
+                on_timer()
+            self.assertEqual(repo.stats()['flush_failures'], 1)
+            self.assertEqual(mock_timer.call_args.args[0], 1.0)
+
+            self.now = 2.0
+            on_timer()
+            self.assertEqual(len(self.backend.find_all()), 2)
+            self.assertEqual(mock_timer.call_count, 2)
+
+            repo.insert(Category(name='Series'))
+            self.assertEqual(mock_timer.call_count, 3)
+            repo.close()
+            mock_timer.return_value.cancel.assert_called_once()
+            repo.insert(Category(name='Documentary'))
+            self.assertEqual(mock_timer.call_count, 3)
+
+    def test_writes_from_other_threads_during_flushes(self):
+        repo = WriteBehindCategoryRepository(
+            self.backend, max_batch_size=7, flush_on_exit=False, background_flush=False)
+
+        def write(prefix):
+            for i in range(200):
+                repo.insert(Category(name=f'{prefix}_{i}'))
+        threads = [threading.Thread(target=write, args=(f'cat_{n}',)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            repo.flush()
+        repo.flush()
+        self.assertEqual(len(self.backend.find_all()), 800)
+        self.assertEqual(repo.stats()['queue_depth'], 0)
+
+    def test_close_flushes_and_leaves_the_shutdown_hook(self):
+        repo = WriteBehindCategoryRepository(self.backend, background_flush=False)
+        self.assertIn(id(repo), repositories._open_repositories)
+        repo.insert(Category(name='Movie'))
+        repositories._close_open_repositories()
+        self.assertNotIn(id(repo), repositories._open_repositories)
+        self.assertEqual(len(self.backend.find_all()), 1)
+
+    def test_shutdown_hook_does_not_keep_repositories_alive(self):
+        repo = WriteBehindCategoryRepository(self.backend, background_flush=False)
+        key = id(repo)
+        del repo
+        gc.collect()
+        self.assertNotIn(key, repositories._open_repositories)
+
+
+class WriteBehindCategoryRepositoryUnitAsyncTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+
+    async def test_async_methods(self):
+        backend = CategoryInMemoryRepository()
+        repo = WriteBehindCategoryRepository(
+            backend, max_batch_size=100, flush_on_exit=False, background_flush=False)
+        categories = [Category(name=f'cat_{i:02d}') for i in range(4)]
+        await repo.insert_async(categories[0])
+        await repo.insert_many_async(categories[1:])
+        categories[0].update('cat_updated')
+        await repo.update_async(categories[0])
+        await repo.delete_async(categories[1].id)
+        self.assertEqual(await repo.find_by_id_async(categories[0].id), categories[0])
+        self.assertEqual(len(await repo.find_all_async()), 3)
+        self.assertEqual(await backend.find_all_async(), [])
+        self.assertEqual(await repo.flush_async(), 6)
+        self.assertEqual(
+            [category.name for category in await backend.find_all_async()],
+            ['cat_updated', 'cat_02', 'cat_03'])
+
+    async def test_async_flush_waits_for_a_threaded_flush_without_blocking_the_loop(self):
+        backend = CategoryInMemoryRepository()
+        repo = WriteBehindCategoryRepository(
+            backend, flush_on_exit=False, background_flush=False)
+        self.assertIsNone(repo._flush_lock)
+        await repo.insert_async(Category(name='Movie'))
+        repo._flush_mutex.acquire()
+        flush = asyncio.ensure_future(repo.flush_async())
+        ticks = 0
+        while ticks < 20:
+            await asyncio.sleep(0.001)
+            ticks += 1
+        self.assertFalse(flush.done())
+        repo._flush_mutex.release()
+        self.assertEqual(await flush, 1)
+        self.assertIsNotNone(repo._flush_lock)
+        self.assertFalse(repo._flush_mutex.locked())
+
+        repo._flush_mutex.acquire()
+        flush = asyncio.ensure_future(repo.flush_async())
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await flush
+        repo._flush_mutex.release()
+        await asyncio.sleep(0.05)
+        self.assertFalse(repo._flush_mutex.locked())
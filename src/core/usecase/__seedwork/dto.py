@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 
 from core.domain.__seedwork.repositories import Filter, SearchResult
 
@@ -8,9 +8,13 @@ from core.domain.__seedwork.repositories import Filter, SearchResult
 class SearchInput(Generic[Filter]):
     page: Optional[int] = None
     per_page: Optional[int] = None
+    # Comma separated for multi-field sorts: sort_by='name,created_at',
+    # sort_dir='asc,desc'.
     sort_by: Optional[str] = None
     sort_dir: Optional[str] = None
     filter_: Optional[Filter] = None
+    # Comma separated facet names, e.g. 'is_active,created_month'.
+    facets: Optional[str] = None
 
 
 Item = TypeVar('Item')
@@ -23,6 +27,7 @@ class SearchOutput(Generic[Item]):
     current_page: int
     per_page: int
     last_page: int
+    facets: Optional[Dict[str, Dict[Any, int]]] = None
 
 
 Output = TypeVar('Output', bound=SearchOutput)
@@ -43,5 +48,6 @@ class SearchOutputMapper:
             total=result.total,
             current_page=result.current_page,
             per_page=result.per_page,
-            last_page=result.last_page
+            last_page=result.last_page,
+            facets=result.facets
         )
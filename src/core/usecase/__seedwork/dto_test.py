@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import unittest
 
 from core.domain.__seedwork.repositories import Filter, SearchResult
@@ -16,7 +16,8 @@ class SearchInputUnitTests(unittest.TestCase):
                 'per_page': Optional[int],
                 'sort_by': Optional[str],
                 'sort_dir': Optional[str],
-                'filter_': Optional[Filter]
+                'filter_': Optional[Filter],
+                'facets': Optional[str]
             }
         )
 
@@ -31,7 +32,8 @@ class SearchOutputUnitTests(unittest.TestCase):
                 'total': int,
                 'current_page': int,
                 'per_page': int,
-                'last_page': int
+                'last_page': int,
+                'facets': Optional[Dict[str, Dict[Any, int]]]
             }
         )
 
@@ -66,3 +68,15 @@ class SearchOutputWrapperUnitTests(unittest.TestCase):
                 per_page=result.per_page
             )
         )
+
+    def test_to_output_with_facets(self):
+        result = SearchResult(
+            items=['foobar'],
+            total=1,
+            current_page=1,
+            per_page=1,
+            facets={'is_active': {True: 1}}
+        )
+        output_ = SearchOutputMapper.from_child(
+            SearchOutput).to_output(result.items, result)
+        self.assertEqual(output_.facets, {'is_active': {True: 1}})
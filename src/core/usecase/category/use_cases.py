@@ -1,6 +1,9 @@
-from dataclasses import asdict, dataclass
-from typing import Optional
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional
 
+from core.domain.__seedwork.changes import ChangeSet
+from core.domain.__seedwork.entities import EntityBatch
+from core.domain.__seedwork.unit_of_work import UnitOfWork
 from core.domain.category.entities import Category
 from core.domain.category.repositories import CategoryRepository
 
@@ -43,6 +46,38 @@ class CreateCategoryUseCase(GenericUseCase):
         pass
 
 
+@dataclass(slots=True, frozen=True)
+class CreateCategoryBatchUseCase(GenericUseCase):
+
+    __repo: CategoryRepository
+
+    def __init__(self, repo: CategoryRepository):
+        object.__setattr__(self, '_CreateCategoryBatchUseCase__repo', repo)
+
+    def __call__(self, input_: 'Input') -> 'Output':
+        batch = Category.create_batch(input_.items)
+        self.__repo.insert_many(batch.entities)
+        return self.__to_output(batch)
+
+    def __to_output(self, batch: EntityBatch[Category]) -> 'Output':
+        return CreateCategoryBatchUseCase.Output(
+            items=list(map(
+                CategoryOutputMapper.from_default_child().to_output, batch.entities)),
+            errors={
+                index: notification.messages for index, notification in batch.errors.items()
+            }
+        )
+
+    @dataclass(slots=True, frozen=True)
+    class Input:
+        items: List[dict]
+
+    @dataclass(slots=True, frozen=True)
+    class Output:
+        items: List[CategoryOutput]
+        errors: Dict[int, Dict[str, List[str]]]
+
+
 @dataclass(slots=True, frozen=True)
 class GetCategoryUseCase(GenericUseCase):
 
@@ -78,7 +113,10 @@ class ListCategoryUseCase(GenericUseCase):
         object.__setattr__(self, '_ListCategoryUseCase__repo', repo)
 
     def __call__(self, input_: 'Input') -> 'Output':
-        search_params = self.__repo.SearchParams(**asdict(input_))
+        # Shallow: asdict would turn a structured filter into a plain dict.
+        search_params = self.__repo.SearchParams(**{
+            field_.name: getattr(input_, field_.name) for field_ in fields(input_)
+        })
         result = self.__repo.search(search_params)
         return self.__to_output(result)
 
@@ -99,6 +137,96 @@ class ListCategoryUseCase(GenericUseCase):
         pass
 
 
+@dataclass(slots=True, frozen=True)
+class ListCategoryChangesUseCase(GenericUseCase):
+
+    __repo: CategoryRepository
+
+    def __init__(self, repo: CategoryRepository):
+        object.__setattr__(self, '_ListCategoryChangesUseCase__repo', repo)
+
+    def __call__(self, input_: 'Input') -> 'Output':
+        changes = self.__repo.find_changed_since(input_.version, input_.limit)
+        return self.__to_output(changes)
+
+    def __to_output(self, changes: ChangeSet[Category]) -> 'Output':
+        mapper = CategoryOutputMapper.from_default_child()
+        return ListCategoryChangesUseCase.Output(
+            items=[mapper.to_output(change.entity) for change in changes.items],
+            version=changes.version,
+            has_more=changes.has_more,
+            resync=changes.resync
+        )
+
+    @dataclass(slots=True, frozen=True)
+    class Input:
+        # Watermark: the version returned by the previous call, 0 for everything.
+        version: int = 0
+        limit: Optional[int] = None
+
+    @dataclass(slots=True, frozen=True)
+    class Output:
+        items: List[CategoryOutput]
+        version: int
+        has_more: bool
+        # The watermark cannot be continued from: start again from version 0.
+        resync: bool = False
+
+
+@dataclass(slots=True, frozen=True)
+class AutocompleteCategoryUseCase(GenericUseCase):
+
+    __repo: CategoryRepository
+
+    def __init__(self, repo: CategoryRepository):
+        object.__setattr__(self, '_AutocompleteCategoryUseCase__repo', repo)
+
+    def __call__(self, input_: 'Input') -> 'Output':
+        categories = self.__repo.find_by_name_prefix(input_.prefix, input_.limit)
+        return self.__to_output(categories)
+
+    def __to_output(self, categories: List[Category]) -> 'Output':
+        return AutocompleteCategoryUseCase.Output(
+            items=list(map(CategoryOutputMapper.from_default_child().to_output, categories)))
+
+    @dataclass(slots=True, frozen=True)
+    class Input:
+        prefix: str
+        limit: int = 10
+
+    @dataclass(slots=True, frozen=True)
+    class Output:
+        items: List[CategoryOutput]
+
+
+@dataclass(slots=True, frozen=True)
+class FindSimilarCategoryUseCase(GenericUseCase):
+
+    __repo: CategoryRepository
+
+    def __init__(self, repo: CategoryRepository):
+        object.__setattr__(self, '_FindSimilarCategoryUseCase__repo', repo)
+
+    def __call__(self, input_: 'Input') -> 'Output':
+        categories = self.__repo.find_by_similar_name(
+            input_.name, input_.threshold, input_.limit)
+        return self.__to_output(categories)
+
+    def __to_output(self, categories: List[Category]) -> 'Output':
+        return FindSimilarCategoryUseCase.Output(
+            items=list(map(CategoryOutputMapper.from_default_child().to_output, categories)))
+
+    @dataclass(slots=True, frozen=True)
+    class Input:
+        name: str
+        threshold: float = 0.3
+        limit: int = 10
+
+    @dataclass(slots=True, frozen=True)
+    class Output:
+        items: List[CategoryOutput]
+
+
 @dataclass(slots=True, frozen=True)
 class UpdateCategoryUseCase(GenericUseCase):
 
@@ -108,9 +236,9 @@ class UpdateCategoryUseCase(GenericUseCase):
         object.__setattr__(self, '_UpdateCategoryUseCase__repo', repo)
 
     def __call__(self, input_: 'Input') -> 'Output':
-        category = self.__repo.find_by_id(input_.id_)
-        category.update(input_.name, input_.description)
-        self.__repo.update(category)
+        with UnitOfWork(self.__repo) as uow:
+            category = uow.get(input_.id_)
+            category.update(input_.name, input_.description)
         return self.__to_output(category)
 
     def __to_output(self, category: Category) -> 'Output':
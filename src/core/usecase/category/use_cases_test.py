@@ -1,12 +1,16 @@
 import copy
+import datetime
 import random
 import unittest
-from typing import Optional
+from typing import List, Optional
 from unittest.mock import patch
 
 from django.conf import settings
 
-from core.domain.__seedwork.exceptions import EntityNotFoundException
+from core.domain.__seedwork.exceptions import (
+    EntityNotFoundException, EntityVersionConflictException
+)
+from core.domain.__seedwork.filters import AnyOf, FieldFilter
 from core.domain.category.entities import Category
 from core.infrastructure.in_memory.category.repositories import (
     CategoryInMemoryRepository, CategoryRepository
@@ -18,8 +22,12 @@ from core.usecase.__seedwork.dto import SearchInput, SearchOutput
 from .dto import CategoryOutput, CategoryOutputMapper
 from .use_cases import (
     CreateCategoryUseCase,
+    CreateCategoryBatchUseCase,
     GetCategoryUseCase,
     ListCategoryUseCase,
+    ListCategoryChangesUseCase,
+    AutocompleteCategoryUseCase,
+    FindSimilarCategoryUseCase,
     UpdateCategoryUseCase,
     DeleteCategoryUseCase
 )
@@ -93,6 +101,51 @@ class CreateCategoryUseCaseUnitTests(unittest.TestCase):
         )
 
 
+class CreateCategoryBatchUseCaseUnitTests(unittest.TestCase):
+
+    repo: CategoryInMemoryRepository
+    create_category_batch: CreateCategoryBatchUseCase
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = CategoryInMemoryRepository()
+        self.create_category_batch = CreateCategoryBatchUseCase(self.repo)
+
+    def test_if_implements_generic_use_case(self):
+        self.assertIsInstance(self.create_category_batch, GenericUseCase)
+
+    def test_input_inner_class(self):
+        self.assertEqual(
+            CreateCategoryBatchUseCase.Input.__annotations__,
+            {'items': List[dict]}
+        )
+
+    def test_create_category_batch(self):
+        with patch.object(self.repo, 'insert_many', wraps=self.repo.insert_many) as mock_insert:
+            with patch.object(self.repo, 'insert') as mock_insert_one:
+                input_ = CreateCategoryBatchUseCase.Input(items=[
+                    {'name': 'foobar'},
+                    {'name': ''},
+                    {'name': 'barfoo', 'description': 'desc', 'is_active': False}
+                ])
+                output_ = self.create_category_batch(input_)
+                mock_insert_one.assert_not_called()
+        mock_insert.assert_called_once()
+        self.assertEqual(len(self.repo._items), 1)
+        self.assertEqual(len(self.repo._tombstones), 1)
+        self.assertEqual(
+            output_.items,
+            [
+                CategoryOutputMapper.from_default_child().to_output(self.repo._items[0]),
+                CategoryOutputMapper.from_default_child().to_output(
+                    list(self.repo._tombstones.values())[0])
+            ]
+        )
+        self.assertEqual(output_.errors, {1: {'name': ['This field may not be blank.']}})
+
+
 class GetCategoryUseCaseUnitTests(unittest.TestCase):
 
     repo: CategoryInMemoryRepository
@@ -218,6 +271,55 @@ class ListCategoryUseCaseUnitTests(unittest.TestCase):
             )
         mock_search.assert_called_once()
 
+    def test_list_when_sorting_by_multiple_fields(self):
+        categories_source = [Category(
+            name=f"cat_{i % 2}", description=f"desc_{i}") for i in range(4)]
+        self.repo.insert_many(categories_source)
+        input_ = ListCategoryUseCase.Input(
+            per_page=4, sort_by='name,description', sort_dir='desc,asc')
+        output_ = self.list_category(input_)
+        self.assertEqual(
+            output_.items,
+            list(map(CategoryOutputMapper.from_default_child().to_output, [
+                categories_source[1],
+                categories_source[3],
+                categories_source[0],
+                categories_source[2],
+            ]))
+        )
+
+    def test_list_with_facets(self):
+        created_at = datetime.datetime(2022, 1, 31)
+        self.repo.insert_many([
+            Category(name='Movie', created_at=created_at),
+            Category(name='Series', created_at=created_at + datetime.timedelta(days=1)),
+            Category(name='Music', is_active=False, created_at=created_at),
+            Category(name='Documentary', created_at=created_at + datetime.timedelta(days=2)),
+        ])
+        output_ = self.list_category(ListCategoryUseCase.Input(
+            per_page=1, facets='is_active,created_month'))
+        self.assertEqual(output_.total, 3)
+        # The deleted category is not counted under is_active.
+        self.assertEqual(output_.facets, {
+            'is_active': {True: 3},
+            'created_month': {'2022-01': 1, '2022-02': 2},
+        })
+        output_ = self.list_category(ListCategoryUseCase.Input(filter_='m', facets='created_month'))
+        self.assertEqual(output_.facets, {'created_month': {'2022-01': 1, '2022-02': 1}})
+
+    def test_list_with_filter_expression(self):
+        categories = [Category(name='Movie'), Category(name='Movies'), Category(name='Music')]
+        self.repo.insert_many(categories)
+        output_ = self.list_category(
+            ListCategoryUseCase.Input(filter_=FieldFilter('name', 'eq', 'movie')))
+        self.assertEqual(output_.total, 1)
+        self.assertEqual(output_.items[0].id, categories[0].id)
+        output_ = self.list_category(ListCategoryUseCase.Input(
+            filter_=AnyOf((
+                FieldFilter('name', 'eq', 'music'), FieldFilter('name', 'eq', 'movies'))),
+            sort_by='name'))
+        self.assertEqual([item.name for item in output_.items], ['Movies', 'Music'])
+
     def test__to_output_private_method(self):
         category = Category(name='foobar')
         search_result = CategoryRepository.SearchResult(
@@ -242,6 +344,144 @@ class ListCategoryUseCaseUnitTests(unittest.TestCase):
         )
 
 
+class ListCategoryChangesUseCaseUnitTests(unittest.TestCase):
+
+    repo: CategoryInMemoryRepository
+    list_changes: ListCategoryChangesUseCase
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = CategoryInMemoryRepository()
+        self.list_changes = ListCategoryChangesUseCase(self.repo)
+
+    def test_if_implements_generic_use_case(self):
+        self.assertIsInstance(self.list_changes, GenericUseCase)
+
+    def test_input_inner_class(self):
+        self.assertEqual(
+            ListCategoryChangesUseCase.Input.__annotations__,
+            {'version': int, 'limit': Optional[int]}
+        )
+        input_ = ListCategoryChangesUseCase.Input()
+        self.assertEqual(input_.version, 0)
+        self.assertIsNone(input_.limit)
+
+    def test_list_changes_incrementally(self):
+        mapper = CategoryOutputMapper.from_default_child()
+        movie = Category(name='Movie')
+        series = Category(name='Series')
+        self.repo.insert_many([movie, series])
+
+        with patch.object(
+            self.repo, 'find_changed_since', wraps=self.repo.find_changed_since
+        ) as mock_find_changed_since:
+            output = self.list_changes(ListCategoryChangesUseCase.Input())
+            mock_find_changed_since.assert_called_once_with(0, None)
+        self.assertEqual(output.items, [mapper.to_output(movie), mapper.to_output(series)])
+        self.assertFalse(output.has_more)
+        self.assertFalse(output.resync)
+
+        movie.update('Movie changed')
+        self.repo.update(movie)
+        self.repo.delete(series.id)
+        output = self.list_changes(ListCategoryChangesUseCase.Input(version=output.version))
+        self.assertEqual([item.name for item in output.items], ['Movie changed', 'Series'])
+        self.assertEqual([item.is_active for item in output.items], [True, False])
+
+        output = self.list_changes(ListCategoryChangesUseCase.Input(version=output.version))
+        self.assertEqual(output.items, [])
+
+        page = self.list_changes(ListCategoryChangesUseCase.Input(limit=1))
+        self.assertEqual([item.name for item in page.items], ['Movie changed'])
+        self.assertTrue(page.has_more)
+
+        self.repo.compact(datetime.timedelta(0))
+        output = self.list_changes(ListCategoryChangesUseCase.Input(version=page.version))
+        self.assertTrue(output.resync)
+
+
+class AutocompleteCategoryUseCaseUnitTests(unittest.TestCase):
+
+    repo: CategoryInMemoryRepository
+    autocomplete: AutocompleteCategoryUseCase
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = CategoryInMemoryRepository()
+        self.autocomplete = AutocompleteCategoryUseCase(self.repo)
+
+    def test_if_implements_generic_use_case(self):
+        self.assertIsInstance(self.autocomplete, GenericUseCase)
+
+    def test_input_inner_class(self):
+        self.assertEqual(
+            AutocompleteCategoryUseCase.Input.__annotations__,
+            {'prefix': str, 'limit': int}
+        )
+        self.assertEqual(AutocompleteCategoryUseCase.Input(prefix='mo').limit, 10)
+
+    def test_autocomplete(self):
+        categories = [
+            Category(name=name) for name in ['Movies', 'music', 'Documentary', 'MOVIE night']
+        ]
+        self.repo.insert_many(categories)
+        with patch.object(
+            self.repo, 'find_by_name_prefix', wraps=self.repo.find_by_name_prefix
+        ) as mock_find_by_name_prefix:
+            output = self.autocomplete(AutocompleteCategoryUseCase.Input(prefix='mo'))
+            mock_find_by_name_prefix.assert_called_once_with('mo', 10)
+        mapper = CategoryOutputMapper.from_default_child()
+        self.assertEqual(
+            output.items, [mapper.to_output(categories[3]), mapper.to_output(categories[0])])
+
+        output = self.autocomplete(AutocompleteCategoryUseCase.Input(prefix='M', limit=2))
+        self.assertEqual([item.name for item in output.items], ['MOVIE night', 'Movies'])
+
+
+class FindSimilarCategoryUseCaseUnitTests(unittest.TestCase):
+
+    repo: CategoryInMemoryRepository
+    find_similar: FindSimilarCategoryUseCase
+
+    def setUp(self) -> None:
+        # Required configuration for integration tests (Django)
+        if not settings.configured:
+            settings.configure(USE_I18N=False)
+        self.repo = CategoryInMemoryRepository()
+        self.find_similar = FindSimilarCategoryUseCase(self.repo)
+
+    def test_if_implements_generic_use_case(self):
+        self.assertIsInstance(self.find_similar, GenericUseCase)
+
+    def test_input_inner_class(self):
+        self.assertEqual(
+            FindSimilarCategoryUseCase.Input.__annotations__,
+            {'name': str, 'threshold': float, 'limit': int}
+        )
+        input_ = FindSimilarCategoryUseCase.Input(name='movie')
+        self.assertEqual((input_.threshold, input_.limit), (0.3, 10))
+
+    def test_find_similar(self):
+        categories = [Category(name=name) for name in ['Documentary', 'Movie', 'Movies', 'Music']]
+        self.repo.insert_many(categories)
+        with patch.object(
+            self.repo, 'find_by_similar_name', wraps=self.repo.find_by_similar_name
+        ) as mock_find_by_similar_name:
+            output = self.find_similar(FindSimilarCategoryUseCase.Input(name='movei'))
+            mock_find_by_similar_name.assert_called_once_with('movei', 0.3, 10)
+        mapper = CategoryOutputMapper.from_default_child()
+        self.assertEqual(
+            output.items, [mapper.to_output(categories[1]), mapper.to_output(categories[2])])
+
+        output = self.find_similar(
+            FindSimilarCategoryUseCase.Input(name='movei', threshold=0.05, limit=3))
+        self.assertEqual([item.name for item in output.items], ['Movie', 'Movies', 'Music'])
+
+
 class UpdateCategoryUseCaseUnitTests(unittest.TestCase):
 
     repo: CategoryInMemoryRepository
@@ -269,7 +509,7 @@ class UpdateCategoryUseCaseUnitTests(unittest.TestCase):
     def test_update_category(self):  # sourcery skip: extract-method
         new_category = Category(name='foobar')
         self.repo._items = [new_category]
-        with patch.object(self.repo, 'update', wraps=self.repo.update) as mock_update:
+        with patch.object(self.repo, 'update_many', wraps=self.repo.update_many) as mock_update:
             input_ = UpdateCategoryUseCase.Input(
                 id_=new_category.id,
                 name='foobar_updated',
@@ -284,14 +524,26 @@ class UpdateCategoryUseCaseUnitTests(unittest.TestCase):
         self.assertEqual(found_category.name, 'foobar_updated')
         with patch.object(self.repo, 'find_by_id', wraps=self.repo.find_by_id) as mock_find_by_id:
             self.update_category(input_)
-            # 2 calls because InMemoryRepository implementation for tests (purposeful)
-            self.assertEqual(mock_find_by_id.call_count, 2)
+            # Loaded once through the unit of work, written without a lookup.
+            self.assertEqual(mock_find_by_id.call_count, 1)
 
     def test_throw_exception_if_category_not_found(self):
         with self.assertRaises(EntityNotFoundException):
             input_ = UpdateCategoryUseCase.Input(id_='fake_id', name='foobar')
             self.update_category(input_)
 
+    def test_throw_exception_if_category_changed_concurrently(self):
+        category = Category(name='foobar')
+        self.repo.insert(category)
+        stale = self.repo.find_by_id(category.id)
+        self.update_category(UpdateCategoryUseCase.Input(id_=category.id, name='first'))
+        # The other call read the category before the first one wrote it.
+        with patch.object(self.repo, 'find_by_id', return_value=stale):
+            with self.assertRaises(EntityVersionConflictException):
+                self.update_category(
+                    UpdateCategoryUseCase.Input(id_=category.id, name='second'))
+        self.assertEqual(self.repo.find_by_id(category.id).name, 'first')
+
     def test__to_output_private_method(self):
         category = Category(name='foobar')
         output_ = self.update_category._UpdateCategoryUseCase__to_output(category)
@@ -340,10 +592,11 @@ class DeleteCategoryUseCaseUnitTests(unittest.TestCase):
             self.assertEqual(self.repo.find_all(), [])
             with self.assertRaises(EntityNotFoundException):
                 self.repo.find_by_id(new_category.id)
-            self.assertEqual(len(self.repo._items), 1)
-            self.assertFalse(self.repo._items[0].is_active)
+            self.assertEqual(len(self.repo._items), 0)
+            self.assertFalse(self.repo._tombstones[new_category.id].is_active)
             mock_delete.assert_called_once()
         with patch.object(self.repo, 'find_by_id', wraps=self.repo.find_by_id) as mock_find_by_id:
             self.repo._items = [new_category]
+            self.repo._tombstones = {}
             self.delete_category(input_)
             mock_find_by_id.assert_called_once()